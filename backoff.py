@@ -0,0 +1,97 @@
+import email.utils
+import logging
+import random
+import socket
+import sys
+import time
+from typing import Optional
+
+if __package__:
+    from .config import PipelineConfig
+else:
+    from config import PipelineConfig
+
+logger = logging.getLogger(__name__)
+
+
+def _loaded_class(module: str, name: str) -> Optional[type]:
+    """
+    A class from a module that is already imported, else None. An error can
+    only come from a library that was loaded, so these checks never pay the
+    import cost of openai or the Google client on their own.
+    """
+    mod = sys.modules.get(module)
+    return getattr(mod, name, None) if mod else None
+
+
+def is_openai_status_error(e: Exception) -> bool:
+    cls = _loaded_class("openai", "APIStatusError")
+    return cls is not None and isinstance(e, cls)
+
+
+def is_google_http_error(e: Exception) -> bool:
+    cls = _loaded_class("googleapiclient.errors", "HttpError")
+    return cls is not None and isinstance(e, cls)
+
+
+def http_status_and_headers(e: Exception):
+    """HTTP status and response headers of an OpenAI or Google API error, if any."""
+    if is_openai_status_error(e):
+        return e.status_code, e.response.headers
+    if is_google_http_error(e):
+        return e.resp.status, e.resp
+    return None, {}
+
+
+def error_class(e: Exception) -> str:
+    """Maps an exception to a key of PipelineConfig.RETRY_POLICIES."""
+    status, _ = http_status_and_headers(e)
+    if status == 429:
+        return "rate_limit"
+    if is_google_http_error(e) and status == 403 and b"rateLimitExceeded" in (e.content or b""):
+        # YouTube reports per-user rate limits as 403
+        return "rate_limit"
+    if status is not None and status >= 500:
+        return "server"
+    connection_error = _loaded_class("openai", "APIConnectionError")
+    if isinstance(e, (ConnectionError, TimeoutError, socket.timeout)) or \
+            (connection_error is not None and isinstance(e, connection_error)):
+        return "network"
+    return "default"
+
+
+def retry_after_seconds(e: Exception) -> Optional[float]:
+    """Server-requested wait from a Retry-After (or retry-after-ms) header, if present."""
+    _, headers = http_status_and_headers(e)
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+    except (AttributeError, TypeError, ValueError):
+        return None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        # HTTP-date form
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(e: Exception, attempt: int) -> float:
+    """
+    Seconds to wait before retry number `attempt` (1-based) after `e`.
+    Exponential with full jitter, per the error's policy; a Retry-After
+    header from the server takes precedence. Both are capped at the
+    policy's "max".
+    """
+    policy = PipelineConfig.RETRY_POLICIES.get(error_class(e), PipelineConfig.RETRY_POLICIES["default"])
+    retry_after = retry_after_seconds(e)
+    if retry_after is not None:
+        return min(retry_after, policy["max"])
+    ceiling = min(policy["max"], policy["base"] * 2 ** max(0, attempt - 1))
+    return random.uniform(0, ceiling)
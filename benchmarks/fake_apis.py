@@ -0,0 +1,301 @@
+"""
+Local stand-ins for the OpenAI (chat, TTS, images) and YouTube upload APIs,
+so the real graph can be benchmarked without network access or credentials.
+Latency and error rates are configurable per endpoint.
+"""
+import base64
+import io
+import json
+import random
+import re
+import subprocess
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+from PIL import Image
+
+ENDPOINTS = ("chat", "tts", "images", "youtube")
+
+SENTENCE = "This is a sentence of benchmark narration about the topic at hand. "
+
+
+class FaultProfile:
+    """
+    Latency (seconds, +/- jitter) and error rate per endpoint. Errors are
+    returned as HTTP 503 so the pipeline's retry and backoff paths run.
+    """
+
+    def __init__(self, latency: Optional[Dict[str, float]] = None, error_rate: Optional[Dict[str, float]] = None,
+                 jitter: float = 0.2, seed: Optional[int] = None):
+        self.latency = latency or {}
+        self.error_rate = error_rate or {}
+        self.jitter = jitter
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self, endpoint: str) -> None:
+        base = self.latency.get(endpoint, 0.0)
+        if base > 0:
+            with self._lock:
+                factor = 1 + self._random.uniform(-self.jitter, self.jitter)
+            time.sleep(base * factor)
+
+    def should_fail(self, endpoint: str) -> bool:
+        with self._lock:
+            return self._random.random() < self.error_rate.get(endpoint, 0.0)
+
+
+class _Server:
+    """A ThreadingHTTPServer on a free local port, served from a daemon thread."""
+
+    handler = BaseHTTPRequestHandler
+
+    def __init__(self, faults: FaultProfile):
+        self.faults = faults
+        handler = type("Handler", (self.handler,), {"app": self})
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "_Server":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send(self, status: int, body: bytes = b"", content_type: str = "application/json", headers: Optional[dict] = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, payload, status: int = 200, headers: Optional[dict] = None):
+        self._send(status, json.dumps(payload).encode("utf-8"), headers=headers)
+
+    def _fault(self, endpoint: str) -> bool:
+        """Applies the endpoint's latency; returns True (after replying 503) if this call should fail."""
+        self.app.faults.delay(endpoint)
+        if self.app.faults.should_fail(endpoint):
+            self._json({"error": {"message": f"Injected {endpoint} failure", "type": "server_error"}}, status=503)
+            return True
+        return False
+
+
+class FakeOpenAI(_Server):
+    """
+    Serves /v1/chat/completions, /v1/audio/speech and /v1/images/generations.
+    Chat replies are shaped by the system prompt (script, image prompts,
+    metadata JSON or a combined plan); speech is silent MP3 lasting as long as the text would
+    take to read; images are PNGs of the requested size.
+    """
+
+    def __init__(self, faults: FaultProfile, long_script_words: int = 450, short_script_words: int = 140,
+                 chars_per_second: float = 15.0, ffmpeg: Optional[str] = None):
+        super().__init__(faults)
+        self.long_script_words = long_script_words
+        self.short_script_words = short_script_words
+        self.chars_per_second = chars_per_second
+        self.ffmpeg = ffmpeg
+        self._audio: Dict[int, bytes] = {}
+        self._images: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def chat_reply(self, system: str, user: str) -> str:
+        if "thumbnail_prompt" in system:
+            # Combined planning: everything in one JSON object
+            count = int(re.search(r"exactly (\d+) distinct", system).group(1))
+            return json.dumps({
+                "script": self.chat_reply("You are a YouTube scriptwriter.", user),
+                "image_prompts": [f"A detailed benchmark scene number {i}" for i in range(count)],
+                "title": "Benchmark Video",
+                "description": "Generated by the offline benchmark.\n\nSecond paragraph.",
+                "tags": ["benchmark", "pipeline", "offline"],
+                "thumbnail_prompt": "A high contrast benchmark thumbnail scene",
+            })
+        if "JSON" in system:
+            return json.dumps({
+                "title": "Benchmark Video",
+                "description": "Generated by the offline benchmark.\n\nSecond paragraph.",
+                "tags": ["benchmark", "pipeline", "offline"],
+            })
+        count = re.search(r"exactly (\d+)", system)
+        if count:
+            return "\n".join(f"A detailed benchmark scene number {i}" for i in range(int(count.group(1))))
+        if "thumbnail" in system.lower():
+            return "A high contrast benchmark thumbnail scene"
+        words = self.short_script_words if "Shorts" in system else self.long_script_words
+        sentence_words = len(SENTENCE.split())
+        return SENTENCE * max(1, words // sentence_words)
+
+    def speech(self, text: str) -> bytes:
+        seconds = max(1, round(len(text) / self.chars_per_second))
+        with self._lock:
+            if seconds not in self._audio:
+                result = subprocess.run([
+                    self.ffmpeg, "-hide_banner", "-loglevel", "error",
+                    "-f", "lavfi", "-i", "anullsrc=r=24000:cl=mono", "-t", str(seconds),
+                    "-c:a", "libmp3lame", "-b:a", "32k", "-f", "mp3", "pipe:1",
+                ], capture_output=True, check=True)
+                self._audio[seconds] = result.stdout
+            return self._audio[seconds]
+
+    def image(self, size: str) -> bytes:
+        with self._lock:
+            if size not in self._images:
+                width, height = (int(v) for v in size.split("x"))
+                img = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+                buf = io.BytesIO()
+                img.save(buf, format="PNG")
+                self._images[size] = buf.getvalue()
+            return self._images[size]
+
+    class handler(_Handler):
+        def do_POST(self):
+            body = json.loads(self._body() or b"{}")
+            path = urlparse(self.path).path
+            if path.endswith("/chat/completions"):
+                if self._fault("chat"):
+                    return
+                messages = body.get("messages", [])
+                system = next((m["content"] for m in messages if m["role"] == "system"), "")
+                user = next((m["content"] for m in messages if m["role"] == "user"), "")
+                content = self.app.chat_reply(system, user)
+                prompt_tokens = sum(len(str(m["content"])) for m in messages) // 4
+                completion_tokens = len(content) // 4
+                self._json({
+                    "id": f"chatcmpl-{uuid.uuid4().hex}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "gpt-4o"),
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": content}}],
+                    "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                              "total_tokens": prompt_tokens + completion_tokens},
+                })
+            elif path.endswith("/audio/speech"):
+                if self._fault("tts"):
+                    return
+                self._send(200, self.app.speech(body.get("input", "")), content_type="audio/mpeg")
+            elif path.endswith("/images/generations"):
+                if self._fault("images"):
+                    return
+                data = base64.b64encode(self.app.image(body.get("size", "1024x1024"))).decode("ascii")
+                self._json({"created": int(time.time()), "data": [{"b64_json": data}]})
+            else:
+                self._json({"error": {"message": f"Unknown path {path}"}}, status=404)
+
+
+class FakeYouTube(_Server):
+    """
+    Serves resumable video uploads (/upload/youtube/v3/videos plus the
+    session URIs it hands out, including uploads of unknown length),
+    videos.update and thumbnails.set. Injected failures hit individual
+    chunks, so upload resumption is exercised too.
+    """
+
+    def __init__(self, faults: FaultProfile):
+        super().__init__(faults)
+        self.sessions: Dict[str, dict] = {}
+        self.videos: Dict[str, int] = {}
+        self.updates: Dict[str, dict] = {}
+        self.thumbnails: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    class handler(_Handler):
+        def do_POST(self):
+            parsed = urlparse(self.path)
+            query = parse_qs(parsed.query)
+            body = self._body()
+            if parsed.path.endswith("/videos") and query.get("uploadType") == ["resumable"]:
+                if self._fault("youtube"):
+                    return
+                session_id = uuid.uuid4().hex
+                total = int(self.headers.get("X-Upload-Content-Length") or 0)
+                with self.app._lock:
+                    self.app.sessions[session_id] = {"received": 0, "total": total}
+                self._send(200, b"", headers={"Location": f"{self.app.url}/upload/session/{session_id}"})
+            elif parsed.path.endswith("/thumbnails/set"):
+                if self._fault("youtube"):
+                    return
+                with self.app._lock:
+                    self.app.thumbnails[query.get("videoId", [""])[0]] = len(body)
+                self._json({"kind": "youtube#thumbnailSetResponse", "items": []})
+            else:
+                self._json({"error": {"message": f"Unknown path {parsed.path}"}}, status=404)
+
+        def do_PUT(self):
+            path = urlparse(self.path).path
+            body = self._body()
+            if path.endswith("/youtube/v3/videos"):
+                if self._fault("youtube"):
+                    return
+                video = json.loads(body or b"{}")
+                with self.app._lock:
+                    self.app.updates[video.get("id", "")] = video.get("snippet", {})
+                self._json({"kind": "youtube#video", **video})
+                return
+
+            session_id = path.rsplit("/", 1)[-1]
+            with self.app._lock:
+                session = self.app.sessions.get(session_id)
+            if session is None:
+                self._json({"error": {"message": "Session expired"}}, status=410)
+                return
+
+            # "bytes */total" asks how much was received (and may fix the total);
+            # "bytes a-b/total" carries a chunk. A total of "*" is not known yet.
+            content_range = self.headers.get("Content-Range", "")
+            match = re.match(r"bytes (\d+)-(\d+)/(\d+|\*)", content_range)
+            if match:
+                if self._fault("youtube"):
+                    return
+                start, end = int(match.group(1)), int(match.group(2))
+                if start == session["received"] and len(body) == end - start + 1:
+                    session["received"] = end + 1
+                if match.group(3) != "*":
+                    session["total"] = int(match.group(3))
+            else:
+                query = re.match(r"bytes \*/(\d+)", content_range)
+                if query:
+                    session["total"] = int(query.group(1))
+
+            if session["total"] and session["received"] >= session["total"]:
+                video_id = uuid.uuid4().hex[:11]
+                with self.app._lock:
+                    self.app.videos[video_id] = session["received"]
+                self._json({"kind": "youtube#video", "id": video_id})
+            elif session["received"]:
+                self._send(308, b"", headers={"Range": f"bytes=0-{session['received'] - 1}"})
+            else:
+                self._send(308, b"")
@@ -0,0 +1,281 @@
+"""
+Offline end-to-end benchmark: runs the real compiled graph against the
+local fake APIs in fake_apis.py and reports throughput, per-node latency,
+peak memory and composer speed for long, short and both runs.
+
+    python benchmarks/run.py --runs 4 --workers 2 --profile draft
+    python benchmarks/run.py --mode short --latency 0.2 --error-rate 0.05 --json results.json
+
+Each mode runs in its own process so peak RSS is measured per mode.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_apis import ENDPOINTS, FakeOpenAI, FakeYouTube, FaultProfile  # noqa: E402
+
+MODES = ("long", "short", "both")
+
+# Output path and default frame rate of each composer, for composer fps
+COMPOSERS = {
+    "video_composer": ("video_path", 24),
+    "short_video_composer": ("short_video_path", 30),
+}
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident set size of this process in MB. ffmpeg children are left
+    out: a forked child inherits the parent's high-water mark, so their
+    figure says little on its own.
+    """
+    # ru_maxrss is KB on Linux, bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1)
+
+
+def _install_fake_youtube(youtube_url: str) -> None:
+    """Points the process-wide client registry's YouTube service at the fake server."""
+    from google.oauth2.credentials import Credentials
+
+    from clients import ClientRegistry, set_client_registry
+
+    https_root = youtube_url.replace("http://", "https://", 1)
+
+    class FakeYouTubeRegistry(ClientRegistry):
+        def youtube_credentials(self):
+            with self._youtube_lock:
+                if self._youtube_creds is None:
+                    self._youtube_creds = Credentials(token="benchmark")
+                return self._youtube_creds
+
+        def _build_youtube_request(self, http, *args, **kwargs):
+            request = super()._build_youtube_request(http, *args, **kwargs)
+            # Media upload URLs keep the discovery document's https scheme
+            request.uri = request.uri.replace(https_root, youtube_url, 1)
+            return request
+
+        def youtube(self):
+            from googleapiclient.discovery import build
+
+            self.youtube_credentials()
+            with self._youtube_lock:
+                if self._youtube_service is None:
+                    self._youtube_service = build(
+                        "youtube", "v3", http=self._thread_http(), requestBuilder=self._build_youtube_request,
+                        client_options={"api_endpoint": youtube_url + "/"},
+                    )
+                return self._youtube_service
+
+    set_client_registry(FakeYouTubeRegistry())
+
+
+def run_mode(mode: str, args) -> dict:
+    """Runs `args.runs` topics of one content type through the graph and summarizes them."""
+    from compositor import ffmpeg_exe, probe_duration
+
+    faults = FaultProfile(
+        latency={endpoint: args.latency for endpoint in ENDPOINTS},
+        error_rate={endpoint: args.error_rate for endpoint in ENDPOINTS},
+        seed=args.seed,
+    )
+    workdir = tempfile.mkdtemp(prefix=f"benchmark-{mode}-")
+    openai_server = FakeOpenAI(faults, long_script_words=args.long_words, short_script_words=args.short_words,
+                               ffmpeg=ffmpeg_exe()).start()
+    youtube_server = FakeYouTube(faults).start()
+    try:
+        os.environ["OPENAI_API_KEY"] = "benchmark"
+        os.environ["OPENAI_BASE_URL"] = openai_server.url + "/v1"
+
+        from config import PipelineConfig
+        PipelineConfig.OUTPUT_ROOT = os.path.join(workdir, "output")
+        PipelineConfig.UPLOAD_LEDGER_DB = os.path.join(workdir, "uploads.sqlite")
+        PipelineConfig.RATE_LIMIT_DB = os.path.join(workdir, "ratelimit.sqlite")
+        PipelineConfig.METRICS_TEXTFILE = None
+        PipelineConfig.CACHE_ENABLED = False
+        PipelineConfig.RATE_LIMIT_ENABLED = args.rate_limits
+        PipelineConfig.COMPOSITOR = args.compositor
+        PipelineConfig.STREAM_UPLOAD = args.stream_upload
+        PipelineConfig.COMBINED_PLANNING = args.combined_planning
+        PipelineConfig.DERIVED_SHORTS = args.derived_shorts
+        _install_fake_youtube(youtube_server.url)
+
+        import metrics
+        from graph import build_app, get_checkpointer, run_config
+
+        app = build_app(checkpointer=get_checkpointer(os.path.join(workdir, "checkpoints.sqlite")))
+        run_ids = [uuid.uuid4().hex[:12] for _ in range(args.runs)]
+        states = [
+            {"topic": f"Benchmark {mode} topic {i}", "run_id": run_id, "encode_profile": args.profile, "retry_count": 0}
+            for i, run_id in enumerate(run_ids)
+        ]
+        configs = [run_config(run_id) for run_id in run_ids]
+
+        from main import run_batch, run_batch_async, run_succeeded
+
+        start = time.perf_counter()
+        if args.use_async:
+            results = asyncio.run(run_batch_async(states, configs, os.path.join(workdir, "checkpoints.sqlite"),
+                                                  workers=args.workers))
+        else:
+            results = run_batch(app, states, configs, args.workers)
+        elapsed = time.perf_counter() - start
+        succeeded = sum(1 for r in results if not isinstance(r, Exception) and run_succeeded(r))
+
+        node_seconds: dict = {}
+        encode_seconds = 0.0
+        frames = 0.0
+        retries = 0
+        for run_id, result in zip(run_ids, results):
+            report = metrics.get_trace(run_id).report()
+            for span in report["spans"]:
+                node_seconds.setdefault(span["node"], []).append(span["wall_seconds"])
+            retries += sum(entry["retries"] for entry in report["nodes"].values())
+            if isinstance(result, Exception):
+                continue
+            for node, (path_key, default_fps) in COMPOSERS.items():
+                entry = report["nodes"].get(node)
+                path = result.get(path_key)
+                if entry and entry["encode_seconds"] and path and os.path.exists(path):
+                    fps = PipelineConfig.ENCODE_PROFILES[args.profile].get("fps") or default_fps
+                    frames += probe_duration(path) * fps
+                    encode_seconds += entry["encode_seconds"]
+
+        return {
+            "mode": mode,
+            "runs": args.runs,
+            "succeeded": succeeded,
+            "workers": args.workers,
+            "async": args.use_async,
+            "stream_upload": args.stream_upload,
+            "combined_planning": args.combined_planning,
+            "derived_shorts": args.derived_shorts,
+            "wall_seconds": round(elapsed, 2),
+            "runs_per_hour": round(args.runs / elapsed * 3600, 1) if elapsed else 0.0,
+            "retries": retries,
+            "nodes": {
+                node: {"count": len(values), "p50": round(percentile(values, 50), 3),
+                       "p95": round(percentile(values, 95), 3)}
+                for node, values in node_seconds.items()
+            },
+            "peak_rss_mb": peak_rss_mb(),
+            "composer_fps": round(frames / encode_seconds, 1) if encode_seconds else None,
+            "uploads": len(youtube_server.videos),
+        }
+    finally:
+        openai_server.stop()
+        youtube_server.stop()
+        if not args.keep_output:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def format_result(result: dict) -> str:
+    lines = [
+        f"== {result['mode']}: {result['succeeded']}/{result['runs']} runs succeeded "
+        f"in {result['wall_seconds']}s ({result['workers']} workers{', async' if result['async'] else ''}, "
+        f"{result['retries']} retries)",
+        f"   runs/hour: {result['runs_per_hour']}   composer fps: {result['composer_fps']}   "
+        f"peak RSS: {result['peak_rss_mb']} MB",
+        f"   {'node':<24}{'count':>6}{'p50 s':>10}{'p95 s':>10}",
+    ]
+    for node, stats in result["nodes"].items():
+        lines.append(f"   {node:<24}{stats['count']:>6}{stats['p50']:>10.3f}{stats['p95']:>10.3f}")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark of the pipeline")
+    parser.add_argument("--mode", choices=MODES + ("all",), default="all", help="Content type to benchmark")
+    parser.add_argument("--runs", type=int, default=4, help="Runs per mode")
+    parser.add_argument("--workers", type=int, default=2, help="Runs executed concurrently")
+    parser.add_argument("--profile", default="draft", help="Encode profile from PipelineConfig.ENCODE_PROFILES")
+    parser.add_argument("--compositor", default="ffmpeg", choices=("ffmpeg", "moviepy"))
+    parser.add_argument("--latency", type=float, default=0.05, help="Mean fake API latency per call, seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of fake API calls that fail with 503")
+    parser.add_argument("--long-words", type=int, default=450, help="Words per fake long-form script")
+    parser.add_argument("--short-words", type=int, default=140, help="Words per fake Shorts script")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Run topics with app.ainvoke on one event loop (main.run_batch_async)")
+    parser.add_argument("--rate-limits", action="store_true", help="Apply PipelineConfig.RATE_LIMITS")
+    parser.add_argument("--stream-upload", action="store_true",
+                        help="Upload long-form videos while they encode (PipelineConfig.STREAM_UPLOAD)")
+    parser.add_argument("--combined-planning", action="store_true",
+                        help="Plan long-form runs in one chat call (PipelineConfig.COMBINED_PLANNING)")
+    parser.add_argument("--derived-shorts", action="store_true",
+                        help="Derive the Shorts of both runs from the long-form script and images "
+                             "(PipelineConfig.DERIVED_SHORTS)")
+    parser.add_argument("--seed", type=int, help="Seed for latency jitter and error injection")
+    parser.add_argument("--keep-output", action="store_true", help="Keep the generated videos and reports")
+    parser.add_argument("--json", metavar="PATH", help="Also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    if args.mode == "all":
+        # One process per mode, so each reports its own peak RSS
+        results = []
+        passthrough = list(argv if argv is not None else sys.argv[1:])
+        for mode in MODES:
+            with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+                out = f.name
+            cmd = [sys.executable, os.path.abspath(__file__), *_without_option(passthrough, "--mode"),
+                   "--mode", mode]
+            cmd = _without_option(cmd, "--json") + ["--json", out]
+            # A mode with failed runs exits 1 but still writes its results
+            subprocess.run(cmd)
+            try:
+                with open(out) as f:
+                    results.extend(json.load(f))
+            except ValueError:
+                print(f"== {mode}: benchmark crashed", file=sys.stderr)
+                results.append({"mode": mode, "runs": args.runs, "succeeded": 0})
+            finally:
+                os.remove(out)
+    else:
+        results = [run_mode(args.mode, args)]
+        print(format_result(results[0]))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0 if all(r["succeeded"] == r["runs"] for r in results) else 1
+
+
+def _without_option(argv: list, option: str) -> list:
+    """argv minus `option` and its value (either "--opt value" or "--opt=value")."""
+    out, skip = [], False
+    for arg in argv:
+        if skip:
+            skip = False
+        elif arg == option:
+            skip = True
+        elif not arg.startswith(option + "="):
+            out.append(arg)
+    return out
+
+
+if __name__ == "__main__":
+    sys.exit(main())
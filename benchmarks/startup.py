@@ -0,0 +1,73 @@
+"""
+Startup benchmark: times fresh interpreters importing the graph and
+answering `main.py --help`, against importing langgraph on its own.
+
+    python benchmarks/startup.py --repeat 7
+    python benchmarks/startup.py --json startup.json
+
+Every sample is a new process, so nothing is cached in sys.modules; the
+median of each target is reported together with its overhead over the
+langgraph baseline, which keeps results comparable across machines.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Name -> command run from the project root. "langgraph" is the baseline.
+TARGETS = {
+    "python": ["-c", "pass"],
+    "langgraph": ["-c", "import langgraph.graph"],
+    "import graph": ["-c", "import graph"],
+    "main.py --help": ["main.py", "--help"],
+}
+BASELINE = "langgraph"
+
+
+def time_command(args: list, repeat: int) -> float:
+    """Median wall time, in seconds, of `repeat` fresh interpreters running `args`."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=ROOT, stdout=subprocess.DEVNULL, check=True)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def measure(repeat: int = 5) -> dict:
+    """Median startup time of every target, in seconds."""
+    # One untimed pass warms the OS file cache and writes any missing .pyc files
+    time_command(TARGETS[BASELINE], 1)
+    time_command(TARGETS["import graph"], 1)
+    return {name: round(time_command(args, repeat), 3) for name, args in TARGETS.items()}
+
+
+def format_result(result: dict) -> str:
+    base = result[BASELINE]
+    lines = [f"   {'target':<18}{'median s':>10}{'vs langgraph':>14}"]
+    for name, seconds in result.items():
+        lines.append(f"   {name:<18}{seconds:>10.3f}{seconds - base:>+14.3f}")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Startup time of the pipeline's entry points")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters timed per target")
+    parser.add_argument("--json", metavar="PATH", help="Also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    result = measure(max(1, args.repeat))
+    print(format_result(result))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+if __package__:
+    from .config import PipelineConfig
+    from .backoff import http_status_and_headers, is_google_http_error, is_openai_status_error
+else:
+    from config import PipelineConfig
+    from backoff import http_status_and_headers, is_google_http_error, is_openai_status_error
+
+logger = logging.getLogger(__name__)
+
+# Reasons YouTube gives for quota and account-level rejections
+YOUTUBE_FATAL_REASONS = (b"quotaExceeded", b"uploadLimitExceeded", b"forbidden", b"insufficientPermissions")
+
+
+def trips_circuit(e: Exception) -> bool:
+    """
+    True for errors no retry can fix until someone acts: exhausted quota
+    and rejected credentials. These open the upstream's circuit.
+    """
+    status, _ = http_status_and_headers(e)
+    if is_openai_status_error(e):
+        return status in (401, 403) or (status == 429 and "insufficient_quota" in str(e).lower())
+    if is_google_http_error(e):
+        return status == 401 or (status == 403 and any(r in (e.content or b"") for r in YOUTUBE_FATAL_REASONS))
+    return False
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit is open."""
+
+    def __init__(self, upstream: str, reason: str):
+        super().__init__(f"{upstream} circuit open: {reason}")
+        self.upstream = upstream
+        self.reason = reason
+
+
+class CircuitBreaker:
+    """
+    Circuit for one upstream (chat, tts, images, youtube), shared by every
+    run in the process. A quota or auth failure opens it: further calls fail
+    fast with CircuitOpenError, so nodes go straight to their fallback or
+    end instead of repeating a doomed request. After `cooldown` seconds a
+    single probe call is let through; it closes the circuit on success and
+    re-opens it on another quota/auth failure.
+    """
+
+    def __init__(self, upstream: str, cooldown: float, clock: Callable[[], float] = time.monotonic):
+        self.upstream = upstream
+        self.cooldown = cooldown
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._opened_at: Optional[float] = None
+        self._reason = ""
+        self._probing = False
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self._opened_at is not None
+
+    def before_call(self) -> None:
+        """Raises CircuitOpenError unless a call may go through now."""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if self._probing or self._clock() - self._opened_at < self.cooldown:
+                raise CircuitOpenError(self.upstream, self._reason)
+            logger.info(f"Probing {self.upstream} after cool-down...")
+            self._probing = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info(f"{self.upstream} circuit closed.")
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self, e: Exception) -> None:
+        with self._lock:
+            if trips_circuit(e):
+                if self._opened_at is None or self._probing:
+                    logger.warning(f"{self.upstream} circuit opened for {self.cooldown:.0f}s: {e}")
+                self._opened_at = self._clock()
+                self._reason = str(e)
+            # Any other outcome of a probe says nothing about quota; let the next call probe again
+            self._probing = False
+
+    def abandon(self) -> None:
+        """A call was cancelled or interrupted: no verdict, but a probe in flight is released."""
+        with self._lock:
+            self._probing = False
+
+    @contextmanager
+    def guard(self):
+        """Wraps one upstream call: fails fast while open and records the outcome."""
+        self.before_call()
+        try:
+            yield
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        except BaseException:
+            # CancelledError, KeyboardInterrupt: otherwise a cancelled probe keeps the circuit open for good
+            self.abandon()
+            raise
+        self.record_success()
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(upstream: str) -> CircuitBreaker:
+    """Returns the process-wide breaker for an upstream, creating it on first use."""
+    with _breakers_lock:
+        if upstream not in _breakers:
+            cooldown = PipelineConfig.CIRCUIT_BREAKER_COOLDOWNS.get(
+                upstream, PipelineConfig.CIRCUIT_BREAKER_COOLDOWNS["default"]
+            )
+            _breakers[upstream] = CircuitBreaker(upstream, cooldown)
+        return _breakers[upstream]
+
+
+def reset_breakers() -> None:
+    """Forgets all breakers, closing every circuit."""
+    with _breakers_lock:
+        _breakers.clear()
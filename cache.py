@@ -0,0 +1,198 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+if __package__:
+    from .config import PipelineConfig
+else:
+    from config import PipelineConfig
+
+logger = logging.getLogger(__name__)
+
+# Suffix of entries still being written; scans leave them to their writer
+TMP_SUFFIX = ".tmp"
+
+
+def cache_key(kind: str, **params) -> str:
+    """
+    Content address for an API call: a SHA-256 over the call kind, the model,
+    its parameters and the prompt. Identical requests map to the same key.
+    """
+    payload = json.dumps({"kind": kind, **params}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Cache interface for API responses. This base class stores nothing and is
+    used whenever caching is bypassed; subclass it to plug in another backend.
+    """
+
+    def get(self, key: str) -> Optional[bytes]:
+        return None
+
+    def put(self, key: str, data: bytes) -> None:
+        pass
+
+    def get_json(self, key: str) -> Any:
+        data = self.get(key)
+        return json.loads(data) if data is not None else None
+
+    def put_json(self, key: str, value: Any) -> None:
+        self.put(key, json.dumps(value).encode("utf-8"))
+
+
+class DiskCache(ResponseCache):
+    """
+    On-disk cache with one file per key. Entries older than `max_age` seconds
+    are dropped, and the least recently used entries are evicted once the
+    cache grows past `max_bytes`. Sizes and recency are tracked in memory,
+    so a put only walks the directory on first use and every `rescan_every`
+    puts (to pick up other processes' entries and sweep expired ones).
+    """
+
+    def __init__(self, directory: str, max_bytes: int, max_age: float, rescan_every: int = 1000):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.rescan_every = rescan_every
+        self._lock = threading.Lock()
+        # path -> size, least recently used first; None until the first scan
+        self._entries: Optional["OrderedDict[str, int]"] = None
+        self._total = 0
+        self._puts_since_scan = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age:
+                os.remove(path)
+                self._forget(path)
+                return None
+            with open(path, "rb") as f:
+                data = f.read()
+            # Touch on read so eviction is least-recently-used
+            os.utime(path)
+            with self._lock:
+                if self._entries is not None and path in self._entries:
+                    self._entries.move_to_end(path)
+            logger.debug(f"Cache hit: {key[:12]}")
+            return data
+        except OSError:
+            return None
+
+    def put(self, key: str, data: bytes) -> None:
+        """Stores an entry. Best effort: a failed write is logged, since the response was already paid for."""
+        path = self._path(key)
+        tmp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write atomically so concurrent readers never see a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=TMP_SUFFIX)
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write cache entry {key[:12]}: {e}")
+            if tmp_path:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+            return
+        with self._lock:
+            self._puts_since_scan += 1
+            if self._entries is None or self._puts_since_scan >= self.rescan_every:
+                self._scan()
+            else:
+                self._total += len(data) - self._entries.pop(path, 0)
+                self._entries[path] = len(data)
+            self._trim()
+
+    def evict(self) -> None:
+        """Removes expired entries, then the oldest ones until under max_bytes. Walks the whole cache."""
+        with self._lock:
+            self._scan()
+            self._trim()
+
+    def _forget(self, path: str) -> None:
+        with self._lock:
+            if self._entries is not None:
+                self._total -= self._entries.pop(path, 0)
+
+    def _scan(self) -> None:
+        """Rebuilds the size/recency index from disk, removing expired entries. Caller holds the lock."""
+        now = time.time()
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(TMP_SUFFIX):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if now - stat.st_mtime > self.max_age:
+                    # Another process may have removed it first
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                else:
+                    entries.append((stat.st_mtime, stat.st_size, path))
+
+        self._entries = OrderedDict((path, size) for _, size, path in sorted(entries))
+        self._total = sum(self._entries.values())
+        self._puts_since_scan = 0
+
+    def _trim(self) -> None:
+        """Evicts least recently used entries until under max_bytes. Caller holds the lock."""
+        while self._total > self.max_bytes and self._entries:
+            path, size = self._entries.popitem(last=False)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            self._total -= size
+
+
+_cache_override: Optional[ResponseCache] = None
+_disk_cache: Optional[DiskCache] = None
+_disk_cache_lock = threading.Lock()
+
+
+def set_cache(cache: Optional[ResponseCache]) -> None:
+    """Installs a custom cache backend. Pass None to restore the default."""
+    global _cache_override
+    _cache_override = cache
+
+
+def get_cache() -> ResponseCache:
+    """
+    Returns the active cache: a custom backend if one was installed, the
+    on-disk cache if PipelineConfig.CACHE_ENABLED, otherwise a no-op cache.
+    """
+    global _disk_cache
+    if _cache_override is not None:
+        return _cache_override
+    if not PipelineConfig.CACHE_ENABLED:
+        return ResponseCache()
+    with _disk_cache_lock:
+        if _disk_cache is None or _disk_cache.directory != PipelineConfig.CACHE_DIR:
+            _disk_cache = DiskCache(
+                PipelineConfig.CACHE_DIR,
+                max_bytes=PipelineConfig.CACHE_MAX_BYTES,
+                max_age=PipelineConfig.CACHE_MAX_AGE_SECONDS,
+            )
+        return _disk_cache
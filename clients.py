@@ -0,0 +1,259 @@
+import asyncio
+import datetime
+import logging
+import os
+import threading
+import weakref
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+import httpx
+
+# The SDKs are imported when a client is first built: together they take
+# seconds to load, and a given run may only ever need some of them
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
+    from langchain_openai import ChatOpenAI
+    from google.oauth2.credentials import Credentials
+    from google_auth_httplib2 import AuthorizedHttp
+    from googleapiclient.http import HttpRequest
+
+if __package__:
+    from .config import PipelineConfig
+else:
+    from config import PipelineConfig
+
+logger = logging.getLogger(__name__)
+
+YOUTUBE_SCOPES = ["https://www.googleapis.com/auth/youtube.upload"]
+
+
+class ClientRegistry:
+    """
+    Process-wide API clients. All OpenAI and ChatOpenAI clients share one
+    pooled, keep-alive HTTP client, so nodes reuse open TCP/TLS connections
+    instead of paying a fresh handshake on every call.
+
+    The YouTube service is built once as well, and its OAuth credentials are
+    refreshed ahead of expiry rather than on every upload.
+
+    The async nodes get the same from async_openai() and async_chat_model(),
+    pooled per event loop, since asyncio connections belong to the loop that
+    opened them.
+
+    Clients are created lazily on first use and are safe to share across
+    threads. Subclass it (or pass a stand-in to set_client_registry) to swap
+    the clients out in tests or against local servers.
+    """
+
+    def __init__(self, max_connections: Optional[int] = None, max_keepalive_connections: Optional[int] = None,
+                 keepalive_expiry: Optional[float] = None):
+        self.max_connections = max_connections or PipelineConfig.HTTP_MAX_CONNECTIONS
+        self.max_keepalive_connections = max_keepalive_connections or PipelineConfig.HTTP_MAX_KEEPALIVE_CONNECTIONS
+        self.keepalive_expiry = keepalive_expiry or PipelineConfig.HTTP_KEEPALIVE_EXPIRY
+        self._lock = threading.Lock()
+        self._http_client: Optional[httpx.Client] = None
+        self._openai: Optional["OpenAI"] = None
+        self._chat_models: Dict[Tuple[str, float], "ChatOpenAI"] = {}
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict]" = weakref.WeakKeyDictionary()
+        self._youtube_lock = threading.Lock()
+        self._youtube_creds: Optional["Credentials"] = None
+        self._youtube_service = None
+        self._youtube_http = threading.local()
+
+    def _pool_options(self) -> dict:
+        return {
+            "limits": httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+            "timeout": httpx.Timeout(PipelineConfig.HTTP_TIMEOUT),
+        }
+
+    def http_client(self) -> httpx.Client:
+        with self._lock:
+            if self._http_client is None:
+                self._http_client = httpx.Client(**self._pool_options())
+            return self._http_client
+
+    def _loop_clients(self) -> dict:
+        """Async clients of the running event loop, created on its first use."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._async_clients.get(loop)
+            if clients is None:
+                clients = {"http": httpx.AsyncClient(**self._pool_options()), "openai": None, "chat": {}}
+                self._async_clients[loop] = clients
+            return clients
+
+    def async_http_client(self) -> httpx.AsyncClient:
+        """Pooled async HTTP client for the running event loop."""
+        return self._loop_clients()["http"]
+
+    def async_openai(self) -> "AsyncOpenAI":
+        """Shared AsyncOpenAI client (TTS, images) for the running event loop."""
+        from openai import AsyncOpenAI
+
+        clients = self._loop_clients()
+        with self._lock:
+            if clients["openai"] is None:
+                clients["openai"] = AsyncOpenAI(max_retries=0, http_client=clients["http"])
+            return clients["openai"]
+
+    def async_chat_model(self, model: str, temperature: float) -> "ChatOpenAI":
+        """Shared chat model per (model, temperature) whose ainvoke runs on the running loop's pool."""
+        from langchain_openai import ChatOpenAI
+
+        clients = self._loop_clients()
+        with self._lock:
+            key = (model, temperature)
+            if key not in clients["chat"]:
+                clients["chat"][key] = ChatOpenAI(
+                    model=model, temperature=temperature, max_retries=0, http_async_client=clients["http"]
+                )
+            return clients["chat"][key]
+
+    def openai(self) -> "OpenAI":
+        """Shared OpenAI client (TTS, images). Internal retries are left to the graph."""
+        from openai import OpenAI
+
+        http_client = self.http_client()
+        with self._lock:
+            if self._openai is None:
+                self._openai = OpenAI(max_retries=0, http_client=http_client)
+            return self._openai
+
+    def chat_model(self, model: str, temperature: float) -> "ChatOpenAI":
+        """Shared chat model per (model, temperature)."""
+        from langchain_openai import ChatOpenAI
+
+        http_client = self.http_client()
+        with self._lock:
+            key = (model, temperature)
+            if key not in self._chat_models:
+                self._chat_models[key] = ChatOpenAI(
+                    model=model, temperature=temperature, max_retries=0, http_client=http_client
+                )
+            return self._chat_models[key]
+
+    def youtube_credentials(self) -> "Credentials":
+        """
+        OAuth credentials for uploads, loaded from disk once and refreshed when
+        they are within YOUTUBE_TOKEN_REFRESH_MARGIN seconds of expiring. The
+        lock makes concurrent uploads share a single refresh.
+        """
+        from google.oauth2.credentials import Credentials
+        from google_auth_oauthlib.flow import InstalledAppFlow
+        from google.auth.transport.requests import Request
+
+        with self._youtube_lock:
+            creds = self._youtube_creds
+            token_file = PipelineConfig.YOUTUBE_TOKEN_FILE
+            if creds is None and os.path.exists(token_file):
+                creds = Credentials.from_authorized_user_file(token_file, YOUTUBE_SCOPES)
+
+            if creds is None or (not creds.valid and not creds.refresh_token):
+                secrets_file = PipelineConfig.YOUTUBE_CLIENT_SECRETS_FILE
+                if not os.path.exists(secrets_file):
+                    raise FileNotFoundError(f"{secrets_file} not found.")
+                flow = InstalledAppFlow.from_client_secrets_file(secrets_file, YOUTUBE_SCOPES)
+                creds = flow.run_local_server(port=0)
+                self._save_youtube_credentials(creds)
+            elif self._expires_soon(creds):
+                logger.info("Refreshing YouTube credentials...")
+                creds.refresh(Request())
+                self._save_youtube_credentials(creds)
+
+            self._youtube_creds = creds
+            return creds
+
+    @staticmethod
+    def _expires_soon(creds: "Credentials") -> bool:
+        if not creds.valid:
+            return True
+        if creds.expiry is None:
+            return False
+        # google-auth keeps expiry as naive UTC
+        now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        margin = datetime.timedelta(seconds=PipelineConfig.YOUTUBE_TOKEN_REFRESH_MARGIN)
+        return creds.expiry - now <= margin
+
+    @staticmethod
+    def _save_youtube_credentials(creds: "Credentials") -> None:
+        with open(PipelineConfig.YOUTUBE_TOKEN_FILE, "w") as token:
+            token.write(creds.to_json())
+
+    def _thread_http(self) -> "AuthorizedHttp":
+        from google_auth_httplib2 import AuthorizedHttp
+        from googleapiclient.http import build_http
+
+        # httplib2 connections are not thread-safe, so each thread gets its own,
+        # kept open across requests and bound to the shared credentials.
+        # build_http() stops httplib2 following the 308s of resumable uploads.
+        http = getattr(self._youtube_http, "http", None)
+        if http is None or http.credentials is not self._youtube_creds:
+            http = AuthorizedHttp(self._youtube_creds, http=build_http())
+            self._youtube_http.http = http
+        return http
+
+    def _build_youtube_request(self, http, *args, **kwargs) -> "HttpRequest":
+        from googleapiclient.http import HttpRequest
+
+        return HttpRequest(self._thread_http(), *args, **kwargs)
+
+    def youtube(self):
+        """
+        Shared YouTube Data API service. The discovery document is parsed once
+        per process; requests made from it run on a per-thread connection, so
+        the service can be used from concurrent uploads.
+        """
+        from googleapiclient.discovery import build
+
+        self.youtube_credentials()
+        with self._youtube_lock:
+            if self._youtube_service is None:
+                self._youtube_service = build(
+                    "youtube", "v3", http=self._thread_http(), requestBuilder=self._build_youtube_request
+                )
+            return self._youtube_service
+
+    async def aclose(self) -> None:
+        """Closes the running event loop's async connections. Call before the loop shuts down."""
+        with self._lock:
+            clients = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if clients is not None:
+            await clients["http"].aclose()
+
+    def close(self) -> None:
+        """Closes pooled connections. Clients are rebuilt on next use."""
+        with self._lock:
+            if self._http_client is not None:
+                self._http_client.close()
+            self._http_client = None
+            self._openai = None
+            self._chat_models = {}
+            # Async connections can only be closed from their own loop (see aclose)
+            self._async_clients = weakref.WeakKeyDictionary()
+        with self._youtube_lock:
+            self._youtube_creds = None
+            self._youtube_service = None
+            self._youtube_http = threading.local()
+
+
+_registry: Optional[ClientRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def set_client_registry(registry: Optional[ClientRegistry]) -> None:
+    """Installs the process-wide registry. Pass None to fall back to a fresh default."""
+    global _registry
+    with _registry_lock:
+        _registry = registry
+
+
+def get_client_registry() -> ClientRegistry:
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ClientRegistry()
+        return _registry
@@ -0,0 +1,239 @@
+import logging
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+from typing import Optional
+
+from PIL import Image
+
+if __package__:
+    from .config import PipelineConfig
+else:
+    from config import PipelineConfig
+
+logger = logging.getLogger(__name__)
+
+# Length of the still clip encoded once per image and then looped. Each
+# loop starts on a keyframe, so this is also the keyframe interval.
+LOOP_UNIT_SECONDS = 2
+
+
+def ffmpeg_exe() -> str:
+    """Resolves the ffmpeg binary: config override, MoviePy's bundled build, then PATH."""
+    if PipelineConfig.FFMPEG_BINARY:
+        return PipelineConfig.FFMPEG_BINARY
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except (ImportError, RuntimeError):
+        pass
+    exe = shutil.which("ffmpeg")
+    if not exe:
+        raise FileNotFoundError("ffmpeg binary not found. Install FFmpeg or set PipelineConfig.FFMPEG_BINARY.")
+    return exe
+
+
+def probe_duration(media_path: str) -> float:
+    """Returns the duration of a media file in seconds, as reported by ffmpeg."""
+    result = subprocess.run(
+        [ffmpeg_exe(), "-hide_banner", "-i", media_path],
+        capture_output=True, text=True
+    )
+    match = re.search(r"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)", result.stderr)
+    if not match:
+        raise ValueError(f"Could not determine duration of {media_path}.")
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def prepare_frame(image_path: str, output_path: str, width: int, height: int) -> str:
+    """
+    Scales an image once to the exact output frame: fit height, then crop
+    the center or pillarbox the sides, matching the MoviePy compositor.
+    """
+    with Image.open(image_path) as img:
+        img = img.convert("RGB")
+        scaled_width = max(1, round(img.width * height / img.height))
+        img = img.resize((scaled_width, height), Image.LANCZOS)
+
+        if scaled_width > width:
+            # Crop center
+            left = (scaled_width - width) // 2
+            img = img.crop((left, 0, left + width, height))
+        elif scaled_width < width:
+            # Pad (Pillarbox)
+            canvas = Image.new("RGB", (width, height), (0, 0, 0))
+            canvas.paste(img, ((width - scaled_width) // 2, 0))
+            img = canvas
+
+        img.save(output_path)
+    return output_path
+
+
+def crop_to_aspect(image_path: str, output_path: str, aspect_width: int, aspect_height: int) -> str:
+    """Center-crops an image to the given aspect ratio without rescaling it."""
+    with Image.open(image_path) as img:
+        img = img.convert("RGB")
+        width = min(img.width, round(img.height * aspect_width / aspect_height))
+        height = min(img.height, round(img.width * aspect_height / aspect_width))
+        left, top = (img.width - width) // 2, (img.height - height) // 2
+        img.crop((left, top, left + width, top + height)).save(output_path)
+    return output_path
+
+
+def _run_ffmpeg(args: list[str]) -> None:
+    cmd = [ffmpeg_exe(), "-hide_banner", "-loglevel", "error", "-y", *args]
+    logger.debug(f"Running: {' '.join(cmd)}")
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed ({result.returncode}): {result.stderr.strip()}")
+
+
+def _encode_still(frame_path: str, output_path: str, frames: int, fps: int, profile: dict, raw: bool = False) -> str:
+    """
+    Encodes `frames` frames of a still image as a self-contained H.264 clip;
+    `raw` writes an Annex B elementary stream without B-frames, which can be
+    concatenated byte for byte.
+    """
+    _run_ffmpeg([
+        "-loop", "1", "-framerate", str(fps), "-i", frame_path,
+        "-frames:v", str(frames),
+        "-c:v", "libx264", "-tune", "stillimage", "-pix_fmt", "yuv420p",
+        "-preset", profile["preset"], "-crf", str(profile["crf"]),
+        "-threads", str(profile["threads"]),
+        *(["-bf", "0", "-f", "h264"] if raw else []),
+        output_path,
+    ])
+    return output_path
+
+
+def _frame_shares(total_frames: int, count: int) -> list[int]:
+    """Equal share of the narration per image, distributed so the totals add up exactly."""
+    return [round((i + 1) * total_frames / count) - round(i * total_frames / count) for i in range(count)]
+
+
+def compose_slideshow(voice_path: str, image_paths: list[str], output_path: str, width: int, height: int, fps: int,
+                      profile: Optional[dict] = None) -> str:
+    """
+    Renders a still-image slideshow with ffmpeg, without rendering frames in
+    Python. Each image is pre-scaled once and encoded once as a short clip
+    (plus a remainder clip); the concat demuxer then loops those clips to
+    fill its share of the narration and the audio is muxed in with the
+    video stream copied, so encode time no longer grows with video length.
+    """
+    profile = profile or PipelineConfig.ENCODE_PROFILES[PipelineConfig.DEFAULT_ENCODE_PROFILE]
+    duration = probe_duration(voice_path)
+    total_frames = max(len(image_paths), round(duration * fps))
+    unit_frames = max(1, round(LOOP_UNIT_SECONDS * fps))
+
+    shares = _frame_shares(total_frames, len(image_paths))
+
+    with tempfile.TemporaryDirectory(prefix="compose_") as work_dir:
+        entries = []
+        for i, path in enumerate(image_paths):
+            frame = prepare_frame(path, os.path.join(work_dir, f"frame_{i}.png"), width, height)
+
+            loops, remainder = divmod(shares[i], unit_frames)
+
+            if loops:
+                unit = _encode_still(frame, os.path.join(work_dir, f"unit_{i}.mp4"), unit_frames, fps, profile)
+                entries.extend([unit] * loops)
+            if remainder:
+                entries.append(_encode_still(frame, os.path.join(work_dir, f"rest_{i}.mp4"), remainder, fps, profile))
+
+        concat_list = os.path.join(work_dir, "segments.txt")
+        with open(concat_list, "w") as f:
+            f.writelines(f"file '{entry}'\n" for entry in entries)
+
+        _run_ffmpeg([
+            "-f", "concat", "-safe", "0", "-i", concat_list,
+            "-i", voice_path,
+            "-map", "0:v", "-map", "1:a",
+            "-c:v", "copy", "-c:a", "aac",
+            "-shortest", "-movflags", "+faststart",
+            output_path,
+        ])
+
+    return output_path
+
+
+def stream_slideshow(voice_path: str, image_paths: list[str], output_path: str, width: int, height: int, fps: int,
+                     profile: Optional[dict] = None) -> str:
+    """
+    Same slideshow as compose_slideshow, written front to back as fragmented
+    MP4 while it is still being encoded, so a reader can tail output_path
+    (see streaming.GrowingFileUpload). Clips are encoded as raw H.264 and
+    piped into the muxer as soon as each is ready; the muxer's output is
+    flushed to disk as it arrives.
+    """
+    profile = profile or PipelineConfig.ENCODE_PROFILES[PipelineConfig.DEFAULT_ENCODE_PROFILE]
+    duration = probe_duration(voice_path)
+    total_frames = max(len(image_paths), round(duration * fps))
+    unit_frames = max(1, round(LOOP_UNIT_SECONDS * fps))
+    shares = _frame_shares(total_frames, len(image_paths))
+
+    cmd = [
+        ffmpeg_exe(), "-hide_banner", "-loglevel", "error", "-y",
+        "-f", "h264", "-framerate", str(fps), "-i", "pipe:0",
+        "-i", voice_path,
+        "-map", "0:v", "-map", "1:a",
+        # A raw stream has no timestamps; number the frames at the input rate
+        "-c:v", "copy", "-bsf:v", f"setts=ts=N/({fps}*TB)", "-c:a", "aac",
+        "-shortest", "-movflags", "frag_keyframe+empty_moov+default_base_moof+delay_moov",
+        "-f", "mp4", "pipe:1",
+    ]
+    logger.debug(f"Running: {' '.join(cmd)}")
+
+    with tempfile.TemporaryDirectory(prefix="compose_") as work_dir, \
+            tempfile.TemporaryFile() as stderr:
+        mux = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=stderr)
+        feed_error: list[BaseException] = []
+
+        def feed():
+            try:
+                for i, path in enumerate(image_paths):
+                    frame = prepare_frame(path, os.path.join(work_dir, f"frame_{i}.png"), width, height)
+                    loops, remainder = divmod(shares[i], unit_frames)
+                    if loops:
+                        unit = _encode_still(frame, os.path.join(work_dir, f"unit_{i}.h264"), unit_frames, fps,
+                                             profile, raw=True)
+                        with open(unit, "rb") as f:
+                            data = f.read()
+                        for _ in range(loops):
+                            mux.stdin.write(data)
+                    if remainder:
+                        rest = _encode_still(frame, os.path.join(work_dir, f"rest_{i}.h264"), remainder, fps,
+                                             profile, raw=True)
+                        with open(rest, "rb") as f:
+                            mux.stdin.write(f.read())
+            except BrokenPipeError:
+                # The muxer stopped reading (-shortest, or it failed); its exit code tells which
+                pass
+            except BaseException as e:
+                feed_error.append(e)
+                mux.kill()
+            finally:
+                try:
+                    mux.stdin.close()
+                except BrokenPipeError:
+                    pass
+
+        feeder = threading.Thread(target=feed, name="compose-feed", daemon=True)
+        feeder.start()
+        with open(output_path, "wb") as out:
+            for chunk in iter(lambda: mux.stdout.read(1024 * 1024), b""):
+                out.write(chunk)
+                out.flush()
+        feeder.join()
+        returncode = mux.wait()
+
+        if feed_error:
+            raise feed_error[0]
+        if returncode != 0:
+            stderr.seek(0)
+            raise RuntimeError(f"ffmpeg failed ({returncode}): {stderr.read().decode(errors='replace').strip()}")
+
+    return output_path
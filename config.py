@@ -1,4 +1,5 @@
-from typing import Dict, List
+import os
+from typing import Dict, List, Optional
 
 class PipelineConfig:
     """
@@ -9,6 +10,15 @@ class PipelineConfig:
     # Retry Configuration
     # Number of times to retry a node before falling back
     MAX_RETRIES: int = 2
+    # Wait before each retry, per error class (see backoff.py): exponential
+    # from "base" seconds with full jitter, or the server's Retry-After,
+    # capped at "max" seconds either way.
+    RETRY_POLICIES: Dict[str, Dict[str, float]] = {
+        "rate_limit": {"base": 5.0, "max": 120.0},  # HTTP 429
+        "server": {"base": 2.0, "max": 60.0},       # HTTP 5xx
+        "network": {"base": 1.0, "max": 30.0},      # connection errors, timeouts
+        "default": {"base": 0.5, "max": 10.0},
+    }
     
     # Content Routing Logic
     # Maps the 'content_type' state to the list of initial nodes to execute
@@ -19,4 +29,150 @@ class PipelineConfig:
     }
     
     # Default behavior if content_type is missing or invalid
-    DEFAULT_CONTENT_TYPE: str = "long"
\ No newline at end of file
+    DEFAULT_CONTENT_TYPE: str = "long"
+
+    # Derived Shorts
+    # For "both" runs, condense the long-form script into the Shorts script
+    # and center-crop the long-form images to 9:16, instead of generating a
+    # second script and image set from scratch. The Shorts branch then starts
+    # from the long-form script rather than from the router.
+    DERIVED_SHORTS: bool = False
+
+    # Output Location
+    # Artifacts are written under OUTPUT_ROOT. With PER_RUN_OUTPUT_DIRS each
+    # run gets its own OUTPUT_ROOT/<run_id>/ workspace, so concurrent runs on
+    # one host never overwrite each other's files.
+    OUTPUT_ROOT: str = "output"
+    PER_RUN_OUTPUT_DIRS: bool = True
+
+    # Batch Mode
+    # Number of topics run concurrently by main.py --topics-file
+    BATCH_WORKERS: int = 4
+    # With --async, topics share one event loop and API calls don't hold a
+    # thread while in flight, so far more of them can run at once
+    ASYNC_BATCH_WORKERS: int = 32
+
+    # Combined Planning
+    # Ask for the long-form script, image prompts, metadata and thumbnail
+    # prompt in one JSON response instead of four chained chat calls. A
+    # response that fails schema validation falls back to the per-node calls.
+    COMBINED_PLANNING: bool = False
+
+    # Asset Generation
+    # Number of images generated per video (spread evenly across the narration)
+    IMAGE_COUNT: int = 3
+    # Upper bound on concurrent DALL-E requests within a single asset node
+    MAX_IMAGE_WORKERS: int = 4
+
+    # Voice Generation
+    # Scripts longer than the TTS input limit are split at sentence boundaries
+    # into chunks of at most TTS_CHUNK_CHARS, synthesized concurrently and
+    # joined in order.
+    TTS_CHUNK_CHARS: int = 4096
+    MAX_TTS_WORKERS: int = 4
+
+    # Video Composition
+    # "moviepy" renders frames in Python; "ffmpeg" pre-scales each still image
+    # once and hands segment durations and audio straight to ffmpeg.
+    COMPOSITOR: str = "moviepy"
+    # Path to the ffmpeg binary (None = MoviePy's bundled build, then PATH)
+    FFMPEG_BINARY: Optional[str] = None
+
+    # Encode Profiles
+    # Named x264 settings for both composers. "scale" multiplies the output
+    # resolution (1920x1080 long-form, 1080x1920 Shorts); "fps" overrides the
+    # frame rate when set; "threads" of 0 lets the encoder decide.
+    # Pick one per run with main.py --profile.
+    ENCODE_PROFILES: Dict[str, Dict] = {
+        "draft": {"preset": "ultrafast", "crf": 30, "threads": 0, "scale": 0.5, "fps": 12},
+        "standard": {"preset": "medium", "crf": 23, "threads": 0, "scale": 1.0, "fps": None},
+        "archive": {"preset": "slow", "crf": 18, "threads": 0, "scale": 1.0, "fps": None},
+    }
+    DEFAULT_ENCODE_PROFILE: str = "standard"
+
+    # HTTP Connection Pool
+    # Shared by every OpenAI / ChatOpenAI client in the process (clients.py),
+    # so connections are kept alive and reused across nodes and runs.
+    HTTP_MAX_CONNECTIONS: int = 50
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 60.0
+    HTTP_TIMEOUT: float = 600.0
+
+    # YouTube
+    # OAuth token and client secrets used for uploads. The service and its
+    # credentials are built once per process (clients.py) and the token is
+    # refreshed this many seconds before it expires.
+    YOUTUBE_TOKEN_FILE: str = "token.json"
+    YOUTUBE_CLIENT_SECRETS_FILE: str = "client_secrets.json"
+    YOUTUBE_TOKEN_REFRESH_MARGIN: int = 300
+    # Resumable upload chunk size; must be a multiple of 256 KiB. Progress is
+    # saved after every chunk, so a failed upload resumes from the last one.
+    UPLOAD_CHUNK_SIZE: int = 16 * 1024 * 1024  # 16 MB
+    # Upload the long-form video while it is being encoded (ffmpeg compositor
+    # only): the composer writes fragmented MP4 and feeds each finished chunk
+    # to the upload session. The video goes up with placeholder metadata that
+    # youtube_upload then replaces; the full file is still kept locally.
+    STREAM_UPLOAD: bool = False
+
+    # Rate Limits
+    # Per-endpoint requests- and tokens-per-minute budgets (None = unlimited),
+    # shared by every thread and process on the host through RATE_LIMIT_DB
+    # (ratelimit.py). Set these to your account's quota. Each bucket holds a
+    # full minute of budget, so a run's parallel calls go out at once until
+    # the minute's budget is spent. Set RATE_LIMIT_BURST_SECONDS to hold
+    # less and spread calls out instead (e.g. 10.0: at most 10s of budget).
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMITS: Dict[str, Dict[str, Optional[int]]] = {
+        "chat": {"rpm": 500, "tpm": 30000},
+        "tts": {"rpm": 50, "tpm": None},
+        "images": {"rpm": 5, "tpm": None},
+        "youtube": {"rpm": 10, "tpm": None},
+    }
+    RATE_LIMIT_BURST_SECONDS: Optional[float] = None
+    RATE_LIMIT_DB: str = os.path.join(".cache", "ratelimit.sqlite")
+
+    # Circuit Breakers
+    # Seconds an upstream stays blocked after a quota or auth failure before
+    # one probe call is let through (breaker.py). YouTube's upload quota only
+    # resets daily, so it is probed less often.
+    CIRCUIT_BREAKER_COOLDOWNS: Dict[str, float] = {
+        "chat": 300.0,
+        "tts": 300.0,
+        "images": 300.0,
+        "youtube": 3600.0,
+        "default": 300.0,
+    }
+    # Completion tokens reserved up front for a chat call; corrected from
+    # the reported usage once the call returns.
+    CHAT_COMPLETION_TOKEN_ESTIMATE: int = 1000
+
+    # Metrics
+    # Every node attempt is timed and its API usage recorded (metrics.py);
+    # main.py writes a run_report.json into each run's output directory.
+    # Set METRICS_TEXTFILE to also write Prometheus metrics for
+    # node_exporter's textfile collector (e.g. ".../textfile/pipeline.prom").
+    METRICS_TEXTFILE: Optional[str] = None
+    # USD list prices used for the cost estimates in the run report; keep
+    # them in line with the provider's current pricing.
+    API_PRICES: Dict[str, Dict[str, float]] = {
+        "gpt-4o": {"input_per_1m": 2.50, "output_per_1m": 10.00},
+        "tts-1": {"per_1m_chars": 15.00},
+        "dall-e-3": {"1024x1024": 0.040, "1024x1792": 0.080, "1792x1024": 0.080},
+    }
+
+    # Response Cache
+    # Content-addressed on-disk cache for LLM, TTS and image calls, so retries
+    # and re-runs of an unchanged topic skip the API. Set CACHE_ENABLED to
+    # False (or pass --no-cache) to bypass it.
+    CACHE_ENABLED: bool = True
+    CACHE_DIR: str = os.path.join(".cache", "responses")
+    CACHE_MAX_BYTES: int = 2 * 1024 ** 3  # 2 GB
+    CACHE_MAX_AGE_SECONDS: int = 30 * 24 * 3600  # 30 days
+
+    # Checkpointing
+    # SQLite database holding per-run checkpoints (keyed by run ID), used by
+    # main.py to resume an interrupted run after its last completed node.
+    CHECKPOINT_DB: str = os.path.join(".checkpoints", "pipeline.sqlite")
+    # Ledger of completed upload steps per run and video content hash, so
+    # retries skip work YouTube already has (e.g. only redo the thumbnail).
+    UPLOAD_LEDGER_DB: str = os.path.join(".checkpoints", "uploads.sqlite")
@@ -1,15 +1,22 @@
-from typing import Literal, List
+from typing import Callable, Literal, List, Optional, Tuple, Union
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, END
+import asyncio
 import logging
+import os
+import sqlite3
+import time
 
 if __package__:
     from .state import VideoState
     from .config import PipelineConfig
     from .nodes import *
+    from .metrics import trace_node
 else:
     from state import VideoState
     from config import PipelineConfig
     from nodes import *
+    from metrics import trace_node
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +26,10 @@ def route_content_type(state: VideoState) -> List[str]:
     Returns a list of node names to execute next.
     """
     c_type = state.get("content_type", PipelineConfig.DEFAULT_CONTENT_TYPE)
+
+    # Derived Shorts start from the long-form script (see long_form_fan_out)
+    if uses_derived_shorts(state):
+        return PipelineConfig.CONTENT_ROUTES["long"]
     
     # Return routes from config, defaulting to 'long' if unknown type
     return PipelineConfig.CONTENT_ROUTES.get(
@@ -26,57 +37,160 @@ def route_content_type(state: VideoState) -> List[str]:
         PipelineConfig.CONTENT_ROUTES[PipelineConfig.DEFAULT_CONTENT_TYPE]
     )
 
-def should_retry(state: VideoState) -> Literal["retry", "fallback", "next"]:
+def _node_status(state: VideoState, node_name: Optional[str]) -> Tuple[Optional[str], int]:
     """
-    Section 11.1: Retry logic based on error state.
+    Returns (error, retry_count) for a node. Without a node name the legacy
+    shared `error` / `retry_count` keys are used.
     """
+    if node_name is None:
+        return state.get("error"), state.get("retry_count", 0)
+    error = (state.get("node_errors") or {}).get(node_name)
+    retries = (state.get("node_retries") or {}).get(node_name, 0)
+    return error, retries
+
+def _retry_delay(state: VideoState, node_name: Optional[str]) -> float:
+    """The backoff the failed node asked for (see backoff.py), in seconds."""
+    if node_name is None:
+        return 0.0
+    delay = (state.get("retry_delays") or {}).get(node_name) or 0.0
+    if delay > 0:
+        logger.info(f"Retrying {node_name} in {delay:.1f}s")
+    return max(delay, 0.0)
+
+def _wait_before_retry(state: VideoState, node_name: Optional[str]) -> None:
+    """Sleeps for the failed node's backoff."""
+    delay = _retry_delay(state, node_name)
+    if delay > 0:
+        time.sleep(delay)
+
+async def _await_before_retry(state: VideoState, node_name: Optional[str]) -> None:
+    """_wait_before_retry for ainvoke: waits on the event loop instead of holding an executor thread."""
+    delay = _retry_delay(state, node_name)
+    if delay > 0:
+        await asyncio.sleep(delay)
+
+def should_retry(state: VideoState, node_name: Optional[str] = None,
+                 wait: bool = True) -> Literal["retry", "fallback", "next"]:
+    """
+    Section 11.1: Retry logic based on error state. With `wait`, a retry
+    decision first sleeps for the node's backoff.
+    """
+    error, retries = _node_status(state, node_name)
     # Check if error exists
-    if state.get("error"):
+    if error:
         # Check if we haven't exceeded max retries configured in config
-        if state.get("retry_count", 0) < PipelineConfig.MAX_RETRIES:
+        if retries < PipelineConfig.MAX_RETRIES:
+            if wait:
+                _wait_before_retry(state, node_name)
             return "retry"
         return "fallback"
     return "next"
 
-def should_retry_or_end(state: VideoState) -> Literal["retry", "end", "next"]:
+def should_retry_or_end(state: VideoState, node_name: Optional[str] = None,
+                        wait: bool = True) -> Literal["retry", "end", "next"]:
     """
     Retry logic for nodes without a fallback. Ends the graph on failure.
+    With `wait`, a retry decision first sleeps for the node's backoff.
     """
-    if state.get("error"):
-        if state.get("retry_count", 0) < PipelineConfig.MAX_RETRIES:
-            # Clear error before retry, but keep retry_count
-            state["error"] = None
+    error, retries = _node_status(state, node_name)
+    if error:
+        if retries < PipelineConfig.MAX_RETRIES:
+            if node_name is None:
+                # Clear error before retry, but keep retry_count
+                state["error"] = None
+            if wait:
+                _wait_before_retry(state, node_name)
             return "retry"
         # After max retries, log and end this branch
-        logger.error("Node failed after multiple retries. Ending branch.")
+        logger.error(f"{node_name or 'Node'} failed after multiple retries. Ending branch.")
         return "end"
     return "next"
 
+def node_router(node_name: str, router: Callable = should_retry_or_end,
+                fan_out: Optional[Union[List[str], Callable[[VideoState], List[str]]]] = None) -> RunnableLambda:
+    """
+    Binds a retry router to a single node's error/retry slot so that parallel
+    nodes are routed independently. With `fan_out` (a list, or a function of
+    the state returning one), a "next" decision starts all of the listed
+    nodes concurrently. Under ainvoke the retry backoff is awaited, so a
+    waiting retry does not tie up one of the executor threads.
+    """
+    def fan(decision, state: VideoState):
+        if decision == "next" and fan_out:
+            return list(fan_out(state) if callable(fan_out) else fan_out)
+        return decision
+
+    def route(state: VideoState):
+        return fan(router(state, node_name), state)
+
+    async def aroute(state: VideoState):
+        decision = router(state, node_name, wait=False)
+        if decision == "retry":
+            await _await_before_retry(state, node_name)
+        return fan(decision, state)
+
+    return RunnableLambda(route, afunc=aroute, name=f"route_{node_name}")
+
+def long_form_fan_out(state: VideoState) -> List[str]:
+    """Nodes started by the long-form script; with derived Shorts, the Shorts script too."""
+    nodes = ["voice_generator", "asset_generator", "metadata_generator"]
+    if uses_derived_shorts(state):
+        nodes.append("short_script_generator")
+    return nodes
+
+def short_form_fan_out(state: VideoState) -> List[str]:
+    """Nodes started by the Shorts script. Derived Shorts images wait for the long-form ones instead."""
+    if uses_derived_shorts(state):
+        return ["short_voice_generator"]
+    return ["short_voice_generator", "short_asset_generator"]
+
+def route_derived_short_assets(state: VideoState) -> str:
+    """Starts the Shorts asset node (which recrops the long-form images) once those exist."""
+    return "short_asset_generator" if uses_derived_shorts(state) else END
+
+def _node(node_name: str, fn: Callable, afn: Optional[Callable] = None):
+    """
+    A traced graph node. With an async implementation `afn`, app.invoke and
+    app.batch run `fn` while app.ainvoke and app.abatch await `afn`.
+    """
+    if afn is None:
+        return trace_node(node_name, fn)
+    return RunnableLambda(trace_node(node_name, fn), afunc=trace_node(node_name, afn), name=node_name)
+
 
 # Initialize Graph
 workflow = StateGraph(VideoState)
 
 # --- Add Nodes ---
-workflow.add_node("topic_planner", topic_planner)
-workflow.add_node("content_type_router", content_type_router)
+# Every node is wrapped in trace_node, which times each attempt and collects
+# the API usage its helpers record into the run's report (metrics.py).
+# API-bound nodes also register their async implementation for ainvoke.
+workflow.add_node("topic_planner", _node("topic_planner", topic_planner))
+workflow.add_node("content_type_router", _node("content_type_router", content_type_router))
 
 # Long Form Nodes
-workflow.add_node("script_generator", script_generator)
-workflow.add_node("script_generator_fallback", script_generator_fallback)
-workflow.add_node("voice_generator", voice_generator)
-workflow.add_node("asset_generator", asset_generator)
-workflow.add_node("video_composer", video_composer)
-workflow.add_node("metadata_generator", metadata_generator)
-workflow.add_node("thumbnail_generator", thumbnail_generator)
-workflow.add_node("youtube_upload", youtube_upload)
+workflow.add_node("script_generator", _node("script_generator", script_generator, ascript_generator))
+workflow.add_node("script_generator_fallback", _node("script_generator_fallback", script_generator_fallback))
+workflow.add_node("voice_generator", _node("voice_generator", voice_generator, avoice_generator))
+workflow.add_node("asset_generator", _node("asset_generator", asset_generator, aasset_generator))
+workflow.add_node("voice_ready", _node("voice_ready", branch_ready))
+workflow.add_node("assets_ready", _node("assets_ready", branch_ready))
+workflow.add_node("video_composer", _node("video_composer", video_composer))
+workflow.add_node("metadata_generator", _node("metadata_generator", metadata_generator, ametadata_generator))
+workflow.add_node("metadata_ready", _node("metadata_ready", branch_ready))
+workflow.add_node("thumbnail_generator", _node("thumbnail_generator", thumbnail_generator, athumbnail_generator))
+workflow.add_node("thumbnail_ready", _node("thumbnail_ready", branch_ready))
+workflow.add_node("youtube_upload", _node("youtube_upload", youtube_upload))
 
 # Short Form Nodes
-workflow.add_node("short_script_generator", short_script_generator)
-workflow.add_node("short_voice_generator", short_voice_generator)
-workflow.add_node("short_asset_generator", short_asset_generator)
-workflow.add_node("short_video_composer", short_video_composer)
-workflow.add_node("short_metadata_generator", short_metadata_generator)
-workflow.add_node("short_youtube_upload", short_youtube_upload)
+workflow.add_node("short_script_generator", _node("short_script_generator", short_script_generator, ashort_script_generator))
+workflow.add_node("short_voice_generator", _node("short_voice_generator", short_voice_generator, ashort_voice_generator))
+workflow.add_node("short_asset_generator", _node("short_asset_generator", short_asset_generator, ashort_asset_generator))
+workflow.add_node("short_voice_ready", _node("short_voice_ready", branch_ready))
+workflow.add_node("short_assets_ready", _node("short_assets_ready", branch_ready))
+workflow.add_node("short_video_composer", _node("short_video_composer", short_video_composer))
+workflow.add_node("short_metadata_generator", _node("short_metadata_generator", short_metadata_generator))
+workflow.add_node("short_youtube_upload", _node("short_youtube_upload", short_youtube_upload))
 
 # --- Define Edges ---
 
@@ -92,69 +206,138 @@ workflow.add_conditional_edges(
 )
 
 # Long Form Pipeline Flow
-# Implements Section 11.1 Retry Logic for Script Generator
+# Implements Section 11.1 Retry Logic for Script Generator.
+# Voice, assets and metadata only depend on the script, so they fan out
+# together; voice and assets join at the composer through the *_ready gates.
+# With derived Shorts, the Shorts script is condensed from it in parallel.
 workflow.add_conditional_edges(
     "script_generator",
-    should_retry,
-    {"retry": "script_generator", "fallback": "script_generator_fallback", "next": "voice_generator"}
+    node_router("script_generator", should_retry, fan_out=long_form_fan_out),
+    {
+        "retry": "script_generator",
+        "fallback": "script_generator_fallback",
+        "voice_generator": "voice_generator",
+        "asset_generator": "asset_generator",
+        "metadata_generator": "metadata_generator",
+        "short_script_generator": "short_script_generator"
+    }
 )
 
-workflow.add_edge("script_generator_fallback", "voice_generator")
+workflow.add_conditional_edges(
+    "script_generator_fallback",
+    long_form_fan_out,
+    ["voice_generator", "asset_generator", "metadata_generator", "short_script_generator"]
+)
 
 workflow.add_conditional_edges(
     "voice_generator",
-    should_retry_or_end,
-    {"retry": "voice_generator", "end": END, "next": "asset_generator"}
+    node_router("voice_generator"),
+    {"retry": "voice_generator", "end": END, "next": "voice_ready"}
 )
 
 workflow.add_conditional_edges(
     "asset_generator",
-    should_retry_or_end,
-    {"retry": "asset_generator", "end": END, "next": "video_composer"}
+    node_router("asset_generator"),
+    {"retry": "asset_generator", "end": END, "next": "assets_ready"}
 )
 
-workflow.add_edge("video_composer", "metadata_generator")
+workflow.add_edge(["voice_ready", "assets_ready"], "video_composer")
+
+# Derived Shorts images are cropped from the finished long-form images
+workflow.add_conditional_edges(
+    "assets_ready",
+    route_derived_short_assets,
+    ["short_asset_generator", END]
+)
 
 workflow.add_conditional_edges(
     "metadata_generator",
-    should_retry_or_end,
-    {"retry": "metadata_generator", "end": END, "next": "thumbnail_generator"}
+    node_router("metadata_generator"),
+    {"retry": "metadata_generator", "end": END, "next": "metadata_ready"}
 )
 
+# The thumbnail needs the title, and starts in the same step as the composer
+# so its API calls overlap the render; both join before the upload.
+workflow.add_edge(["voice_ready", "assets_ready", "metadata_ready"], "thumbnail_generator")
+
 workflow.add_conditional_edges(
     "thumbnail_generator",
-    should_retry_or_end,
-    {"retry": "thumbnail_generator", "end": END, "next": "youtube_upload"}
+    node_router("thumbnail_generator"),
+    {"retry": "thumbnail_generator", "end": END, "next": "thumbnail_ready"}
 )
 
+workflow.add_edge(["video_composer", "thumbnail_ready"], "youtube_upload")
+
 workflow.add_conditional_edges(
     "youtube_upload",
-    should_retry_or_end,
+    node_router("youtube_upload"),
     {"retry": "youtube_upload", "end": END, "next": END}
 )
 
 # Short Form Pipeline Flow
 workflow.add_conditional_edges(
     "short_script_generator",
-    should_retry_or_end,
-    {"retry": "short_script_generator", "end": END, "next": "short_voice_generator"}
+    node_router("short_script_generator", fan_out=short_form_fan_out),
+    {
+        "retry": "short_script_generator",
+        "end": END,
+        "short_voice_generator": "short_voice_generator",
+        "short_asset_generator": "short_asset_generator"
+    }
 )
 workflow.add_conditional_edges(
     "short_voice_generator",
-    should_retry_or_end,
-    {"retry": "short_voice_generator", "end": END, "next": "short_asset_generator"}
+    node_router("short_voice_generator"),
+    {"retry": "short_voice_generator", "end": END, "next": "short_voice_ready"}
 )
 workflow.add_conditional_edges(
     "short_asset_generator",
-    should_retry_or_end,
-    {"retry": "short_asset_generator", "end": END, "next": "short_video_composer"}
+    node_router("short_asset_generator"),
+    {"retry": "short_asset_generator", "end": END, "next": "short_assets_ready"}
 )
+workflow.add_edge(["short_voice_ready", "short_assets_ready"], "short_video_composer")
 workflow.add_edge("short_video_composer", "short_metadata_generator")
 workflow.add_edge("short_metadata_generator", "short_youtube_upload")
 workflow.add_conditional_edges(
     "short_youtube_upload",
-    should_retry_or_end,
+    node_router("short_youtube_upload"),
     {"retry": "short_youtube_upload", "end": END, "next": END}
 )
 
-app = workflow.compile()
\ No newline at end of file
+def get_checkpointer(path: Optional[str] = None):
+    """
+    Returns a SQLite-backed checkpointer. Every completed step is persisted
+    under the run's thread ID, so an interrupted run can be resumed.
+    """
+    from langgraph.checkpoint.sqlite import SqliteSaver
+
+    path = path or PipelineConfig.CHECKPOINT_DB
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Nodes run on worker threads, so the connection is shared across them
+    conn = sqlite3.connect(path, check_same_thread=False)
+    return SqliteSaver(conn)
+
+async def get_async_checkpointer(path: Optional[str] = None):
+    """
+    get_checkpointer for app.ainvoke / app.abatch: an aiosqlite-backed saver
+    over the same database, so runs started either way can be resumed either
+    way. Close its connection (`await saver.conn.close()`) when done.
+    """
+    import aiosqlite
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+    path = path or PipelineConfig.CHECKPOINT_DB
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    return AsyncSqliteSaver(await aiosqlite.connect(path))
+
+def build_app(checkpointer=None):
+    """Compiles the workflow, optionally with a persistent checkpointer."""
+    return workflow.compile(checkpointer=checkpointer)
+
+def run_config(run_id: str) -> dict:
+    """Invocation config that keys checkpoints by run ID."""
+    return {"configurable": {"thread_id": run_id}}
+
+app = build_app()
\ No newline at end of file
@@ -0,0 +1,94 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+if __package__:
+    from .config import PipelineConfig
+else:
+    from config import PipelineConfig
+
+logger = logging.getLogger(__name__)
+
+
+def file_digest(path: str, block_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file's contents, read in blocks so large videos stay out of memory."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class UploadLedger:
+    """
+    Local record of completed upload steps, keyed by run ID, the uploaded
+    file's content hash and the step name ("video", "metadata",
+    "thumbnail"). Upload nodes check it before each step, so a retry only
+    redoes what is missing and never re-uploads a video YouTube already has.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        # Upload nodes run on worker threads; other processes are serialized by SQLite's own locking
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS upload_steps (
+                    run_id TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    step TEXT NOT NULL,
+                    result TEXT,
+                    completed_at REAL NOT NULL,
+                    PRIMARY KEY (run_id, content_hash, step)
+                )"""
+            )
+
+    def get(self, run_id: str, content_hash: str, step: str) -> Optional[str]:
+        """Result recorded for a completed step (e.g. the video ID), or None if not done."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM upload_steps WHERE run_id = ? AND content_hash = ? AND step = ?",
+                (run_id, content_hash, step),
+            ).fetchone()
+        return row[0] if row else None
+
+    def record(self, run_id: str, content_hash: str, step: str, result: str) -> None:
+        """Marks a step as completed with its result."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO upload_steps (run_id, content_hash, step, result, completed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (run_id, content_hash, step, result, time.time()),
+            )
+        logger.debug(f"Ledger: {step} done for run {run_id} ({content_hash[:12]})")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_ledger: Optional[UploadLedger] = None
+_ledger_lock = threading.Lock()
+
+
+def set_ledger(ledger: Optional[UploadLedger]) -> None:
+    """Installs the process-wide ledger. Pass None to reopen the default on next use."""
+    global _ledger
+    with _ledger_lock:
+        _ledger = ledger
+
+
+def get_ledger() -> UploadLedger:
+    """Returns the process-wide ledger, opening PipelineConfig.UPLOAD_LEDGER_DB on first use."""
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None or _ledger.path != PipelineConfig.UPLOAD_LEDGER_DB:
+            _ledger = UploadLedger(PipelineConfig.UPLOAD_LEDGER_DB)
+        return _ledger
@@ -1,7 +1,11 @@
+import asyncio
 import logging
 import sys
 import argparse
 import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -13,36 +17,202 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def load_topics(path: str) -> list[str]:
+    """Reads one topic per line, skipping blank lines and # comments."""
+    with open(path, encoding="utf-8") as f:
+        lines = [line.strip() for line in f]
+    return [line for line in lines if line and not line.startswith("#")]
+
+def run_succeeded(final_state: dict) -> bool:
+    """True when every branch requested by the run's content_type uploaded."""
+    c_type = final_state.get("content_type")
+    if c_type in ("long", "both") and final_state.get("upload_status") != "success":
+        return False
+    if c_type in ("short", "both") and final_state.get("short_upload_status") != "success":
+        return False
+    return c_type is not None
+
+def failed_nodes(final_state: dict) -> dict:
+    """
+    Error of every node whose last attempt failed. Read from `node_errors`:
+    the shared `error` key is last-writer-wins across parallel branches, so a
+    sibling's success can overwrite a failure there.
+    """
+    return {node: error for node, error in (final_state.get("node_errors") or {}).items() if error}
+
+def summarize_run(final_state: dict) -> str:
+    """One-line outcome of a run for the batch report."""
+    parts = []
+    if final_state.get("content_type") in ("long", "both"):
+        parts.append(f"long={final_state.get('upload_status') or 'failed'}")
+    if final_state.get("content_type") in ("short", "both"):
+        parts.append(f"short={final_state.get('short_upload_status') or 'failed'}")
+    if not run_succeeded(final_state):
+        parts.extend(f"{node}={error}" for node, error in failed_nodes(final_state).items())
+    return ", ".join(parts) or "no output"
+
+def run_batch(app, states: list, configs: list, workers: int) -> list:
+    """
+    Runs every state with app.invoke on a pool of `workers` threads. Only
+    the number of topics in flight is capped: each run keeps LangGraph's
+    own concurrency for its parallel branches. Returns each run's final
+    state, or the exception it raised.
+    """
+    def run(state, config):
+        try:
+            return app.invoke(state, config, durability="sync")
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return list(pool.map(run, states, configs))
+
+async def run_batch_async(states: list, configs: list, checkpoint_path: str = None,
+                          workers: Optional[int] = None) -> list:
+    """
+    Runs every state on one event loop with app.ainvoke, so the graph's async
+    node implementations are used. At most `workers` topics (all of them if
+    None) are in flight at once; as in run_batch, this does not limit the
+    branches within a run. Returns each run's final state, or the exception
+    it raised.
+    """
+    try:
+        from langgraph_youtube_pipeline.graph import build_app, get_async_checkpointer
+        from langgraph_youtube_pipeline.clients import get_client_registry
+    except ImportError:
+        from graph import build_app, get_async_checkpointer
+        from clients import get_client_registry
+
+    checkpointer = await get_async_checkpointer(checkpoint_path)
+    try:
+        app = build_app(checkpointer=checkpointer)
+        semaphore = asyncio.Semaphore(workers or max(1, len(states)))
+
+        async def run(state, config):
+            async with semaphore:
+                try:
+                    return await app.ainvoke(state, config, durability="sync")
+                except Exception as e:
+                    return e
+
+        return await asyncio.gather(*(run(state, config) for state, config in zip(states, configs)))
+    finally:
+        await get_client_registry().aclose()
+        await checkpointer.conn.close()
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run the LangGraph YouTube Pipeline")
     parser.add_argument("--topic", type=str, help="The topic for the video", default="The Future of AI")
+    parser.add_argument("--topics-file", type=str, help="Batch mode: run every topic in this file (one per line)")
+    parser.add_argument("--workers", type=int, help="Batch mode: number of topics run concurrently")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Run on one asyncio event loop with the async node implementations")
     parser.add_argument("--verbose", action="store_true", help="Enable verbose logging")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the LLM/TTS/image response cache")
+    parser.add_argument("--profile", type=str, help="Encode profile from PipelineConfig.ENCODE_PROFILES (e.g. draft, standard, archive)")
+    parser.add_argument("--run-id", type=str, help="ID to checkpoint this run under (generated if omitted)")
+    parser.add_argument("--resume", type=str, metavar="RUN_ID", help="Resume an interrupted run after its last completed node")
     args = parser.parse_args()
 
     if args.verbose:
         logger.setLevel(logging.DEBUG)
 
     try:
-        from langgraph_youtube_pipeline.graph import app
+        from langgraph_youtube_pipeline.graph import build_app, get_checkpointer, run_config
     except ImportError:
         try:
-            from graph import app
+            from graph import build_app, get_checkpointer, run_config
         except ImportError as e:
             logger.error(f"Failed to import application: {e}")
             sys.exit(1)
 
-    logger.info(f">>> Running Pipeline for Topic: {args.topic}")
-    initial_state = {"topic": args.topic, "retry_count": 0}
-    
-    final_state = app.invoke(initial_state)
+    try:
+        from langgraph_youtube_pipeline.config import PipelineConfig
+        from langgraph_youtube_pipeline.metrics import write_prometheus_textfile, write_run_report
+    except ImportError:
+        from config import PipelineConfig
+        from metrics import write_prometheus_textfile, write_run_report
+
+    if args.no_cache:
+        PipelineConfig.CACHE_ENABLED = False
+
+    profile = args.profile or PipelineConfig.DEFAULT_ENCODE_PROFILE
+    if profile not in PipelineConfig.ENCODE_PROFILES:
+        parser.error(f"unknown profile '{profile}' (choose from: {', '.join(PipelineConfig.ENCODE_PROFILES)})")
+
+    app = build_app(checkpointer=get_checkpointer())
+
+    if args.topics_file:
+        topics = load_topics(args.topics_file)
+        workers = args.workers or (PipelineConfig.ASYNC_BATCH_WORKERS if args.use_async else PipelineConfig.BATCH_WORKERS)
+        run_ids = [uuid.uuid4().hex[:12] for _ in topics]
+        logger.info(f">>> Running batch of {len(topics)} topics with {workers} workers")
+
+        states = [
+            {"topic": topic, "run_id": run_id, "encode_profile": profile, "retry_count": 0}
+            for topic, run_id in zip(topics, run_ids)
+        ]
+        configs = [run_config(run_id) for run_id in run_ids]
+        # One process and one compiled graph for the whole batch; API waits overlap across topics
+        if args.use_async:
+            results = asyncio.run(run_batch_async(states, configs, workers=workers))
+        else:
+            results = run_batch(app, states, configs, workers)
+        for run_id in run_ids:
+            write_run_report(run_id)
+        write_prometheus_textfile()
+
+        print("\n" + "="*50)
+        print("BATCH EXECUTION COMPLETE")
+        print("="*50)
+        failures = 0
+        for topic, run_id, result in zip(topics, run_ids, results):
+            if isinstance(result, Exception):
+                failures += 1
+                print(f"❌ [{run_id}] {topic}: crashed ({result}), resume with --resume {run_id}")
+            else:
+                ok = run_succeeded(result)
+                failures += 0 if ok else 1
+                print(f"{'✅' if ok else '❌'} [{run_id}] {topic}: {summarize_run(result)}")
+        print(f"{len(topics) - failures}/{len(topics)} topics succeeded")
+        print("="*50 + "\n")
+        sys.exit(1 if failures else 0)
+
+    if args.resume:
+        run_id = args.resume
+        config = run_config(run_id)
+        snapshot = app.get_state(config)
+        if not snapshot.values:
+            logger.error(f"No checkpoint found for run {run_id}.")
+            sys.exit(1)
+        if not snapshot.next:
+            logger.info(f">>> Run {run_id} already completed. Nothing to resume.")
+        else:
+            logger.info(f">>> Resuming run {run_id} at: {', '.join(snapshot.next)}")
+            app.invoke(None, config, durability="sync")
+        final_state = app.get_state(config).values
+    else:
+        run_id = args.run_id or uuid.uuid4().hex[:12]
+        logger.info(f">>> Running Pipeline for Topic: {args.topic} (run {run_id}, resume with --resume {run_id})")
+        initial_state = {"topic": args.topic, "run_id": run_id, "encode_profile": profile, "retry_count": 0}
+
+        # Persist every step before moving on, so a crash loses at most the node in flight
+        if args.use_async:
+            [final_state] = asyncio.run(run_batch_async([initial_state], [run_config(run_id)]))
+            if isinstance(final_state, Exception):
+                raise final_state
+        else:
+            final_state = app.invoke(initial_state, run_config(run_id), durability="sync")
+
+    report_path = write_run_report(run_id)
+    write_prometheus_textfile()
     
     print("\n" + "="*50)
     print("PIPELINE EXECUTION COMPLETE")
     print("="*50)
     
-    err = final_state.get("error")
-    if err:
-        logger.error(f"Pipeline encountered error: {err}")
+    for node, err in failed_nodes(final_state).items():
+        logger.error(f"Pipeline encountered error in {node}: {err}")
     
     # Long Form Results
     if final_state.get("video_path") and os.path.exists(final_state["video_path"]):
@@ -55,5 +225,7 @@ if __name__ == "__main__":
     if final_state.get("short_video_path") and os.path.exists(final_state["short_video_path"]):
         print(f"✅ Short Video: {final_state['short_video_path']}")
         print(f"🚀 Upload Status: {final_state.get('short_upload_status')}")
-    
+
+    if report_path:
+        print(f"📊 Run Report: {report_path}")
     print("="*50 + "\n")
\ No newline at end of file
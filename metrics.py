@@ -0,0 +1,284 @@
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+if __package__:
+    from .config import PipelineConfig
+else:
+    from config import PipelineConfig
+
+logger = logging.getLogger(__name__)
+
+# Counters a node span accumulates; helpers add to them with record()
+COUNTERS = (
+    "api_calls", "api_seconds", "input_tokens", "output_tokens", "tts_chars",
+    "images", "bytes_written", "encode_seconds", "cost_usd",
+)
+
+
+class NodeSpan:
+    """One execution (attempt) of a node within a run."""
+
+    def __init__(self, node: str, attempt: int):
+        self.node = node
+        self.attempt = attempt
+        self.started_at = time.time()
+        self.wall_seconds = 0.0
+        self.status = "running"
+        self.counters: Dict[str, float] = defaultdict(float)
+        # Helpers may record from worker threads (images, TTS chunks)
+        self._lock = threading.Lock()
+
+    def add(self, **counters: float) -> None:
+        with self._lock:
+            for name, value in counters.items():
+                self.counters[name] += value
+
+    def to_dict(self) -> dict:
+        return {
+            "node": self.node,
+            "attempt": self.attempt,
+            "started_at": self.started_at,
+            "wall_seconds": round(self.wall_seconds, 3),
+            "status": self.status,
+            **{name: round(value, 6) for name, value in self.counters.items()},
+        }
+
+
+class RunTrace:
+    """All node spans of one run, in execution order."""
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.topic: Optional[str] = None
+        self.content_type: Optional[str] = None
+        self.output_dir: Optional[str] = None
+        self.spans: List[NodeSpan] = []
+        self._lock = threading.Lock()
+
+    def add_span(self, span: NodeSpan) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def update(self, state: dict) -> None:
+        for key in ("topic", "content_type", "output_dir"):
+            if state.get(key):
+                setattr(self, key, state[key])
+
+    def report(self) -> dict:
+        """Per-run summary: totals, a roll-up per node, and every span."""
+        with self._lock:
+            spans = list(self.spans)
+        nodes: Dict[str, dict] = {}
+        totals: Dict[str, float] = defaultdict(float)
+        for span in spans:
+            entry = nodes.setdefault(span.node, {"attempts": 0, "wall_seconds": 0.0, **{c: 0.0 for c in COUNTERS}})
+            entry["attempts"] += 1
+            entry["retries"] = entry["attempts"] - 1
+            entry["status"] = span.status
+            entry["wall_seconds"] += span.wall_seconds
+            for name, value in span.counters.items():
+                entry[name] += value
+                totals[name] += value
+        started = min((s.started_at for s in spans), default=None)
+        finished = max((s.started_at + s.wall_seconds for s in spans), default=None)
+        return {
+            "run_id": self.run_id,
+            "topic": self.topic,
+            "content_type": self.content_type,
+            "started_at": started,
+            "finished_at": finished,
+            "wall_seconds": round(finished - started, 3) if spans else 0.0,
+            "totals": {name: round(totals[name], 6) for name in COUNTERS},
+            "nodes": {name: {k: round(v, 6) if isinstance(v, float) else v for k, v in entry.items()}
+                      for name, entry in nodes.items()},
+            "spans": [span.to_dict() for span in spans],
+        }
+
+
+_current_span: contextvars.ContextVar[Optional[NodeSpan]] = contextvars.ContextVar("current_span", default=None)
+_traces: Dict[str, RunTrace] = {}
+_traces_lock = threading.Lock()
+
+
+def get_trace(run_id: str) -> RunTrace:
+    with _traces_lock:
+        if run_id not in _traces:
+            _traces[run_id] = RunTrace(run_id)
+        return _traces[run_id]
+
+
+def reset_traces() -> None:
+    with _traces_lock:
+        _traces.clear()
+
+
+def record(**counters: float) -> None:
+    """Adds to the counters of the node currently running. A no-op outside a traced node."""
+    span = _current_span.get()
+    if span is not None:
+        span.add(**counters)
+
+
+def file_size(path: str) -> int:
+    """Size of a written file for bytes_written; 0 if it can't be read, so metrics never fail a node."""
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def submit(pool, fn: Callable, *args):
+    """
+    ThreadPoolExecutor.submit that carries the caller's context along, so
+    work fanned out to worker threads is still recorded against its node.
+    """
+    return pool.submit(contextvars.copy_context().run, fn, *args)
+
+
+def chat_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    prices = PipelineConfig.API_PRICES.get(model, {})
+    return (input_tokens * prices.get("input_per_1m", 0.0) + output_tokens * prices.get("output_per_1m", 0.0)) / 1e6
+
+
+def tts_cost(model: str, chars: int) -> float:
+    return chars * PipelineConfig.API_PRICES.get(model, {}).get("per_1m_chars", 0.0) / 1e6
+
+
+def image_cost(model: str, size: str) -> float:
+    return PipelineConfig.API_PRICES.get(model, {}).get(size, 0.0)
+
+
+def _start_span(node_name: str, state) -> NodeSpan:
+    attempt = (state.get("node_retries") or {}).get(node_name, 0) + 1
+    return NodeSpan(node_name, attempt)
+
+
+def _finish_span(span: NodeSpan, state, result, elapsed: float) -> None:
+    if span.status != "crashed":
+        failed = (result or {}).get("node_errors", {}).get(span.node)
+        span.status = "error" if failed else "ok"
+    span.wall_seconds = elapsed
+    # topic_planner assigns the run ID, so it may only be known from the result
+    merged = {**state, **(result or {})} if span.status != "crashed" else state
+    trace = get_trace(merged.get("run_id") or "")
+    trace.update(merged)
+    trace.add_span(span)
+    logger.debug(f"{span.node} attempt {span.attempt}: {span.status} in {span.wall_seconds:.2f}s")
+
+
+def trace_node(node_name: str, fn: Callable) -> Callable:
+    """
+    Wraps a graph node so every attempt is timed and recorded as a span of
+    its run, with whatever the helpers it calls record() along the way.
+    Coroutine nodes get an async wrapper.
+    """
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def atraced(state):
+            span = _start_span(node_name, state)
+            token = _current_span.set(span)
+            start = time.perf_counter()
+            result = None
+            try:
+                result = await fn(state)
+            except BaseException:
+                span.status = "crashed"
+                raise
+            finally:
+                _current_span.reset(token)
+                _finish_span(span, state, result, time.perf_counter() - start)
+            return result
+        return atraced
+
+    @functools.wraps(fn)
+    def traced(state):
+        span = _start_span(node_name, state)
+        token = _current_span.set(span)
+        start = time.perf_counter()
+        result = None
+        try:
+            result = fn(state)
+        except BaseException:
+            span.status = "crashed"
+            raise
+        finally:
+            _current_span.reset(token)
+            _finish_span(span, state, result, time.perf_counter() - start)
+        return result
+    return traced
+
+
+def write_run_report(run_id: str, path: Optional[str] = None) -> Optional[str]:
+    """
+    Writes the run's report as JSON, by default to <output_dir>/run_report.json.
+    Returns the path, or None if nothing was traced for the run.
+    """
+    with _traces_lock:
+        trace = _traces.get(run_id)
+    if trace is None or not trace.spans:
+        return None
+    path = path or os.path.join(trace.output_dir or PipelineConfig.OUTPUT_ROOT, "run_report.json")
+    _write_atomic(path, json.dumps(trace.report(), indent=2))
+    return path
+
+
+def prometheus_text() -> str:
+    """Node metrics summed over every run traced in this process, in Prometheus text format."""
+    with _traces_lock:
+        reports = [trace.report() for trace in _traces.values()]
+    nodes: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    statuses: Dict[tuple, int] = defaultdict(int)
+    for report in reports:
+        for span in report["spans"]:
+            node = nodes[span["node"]]
+            node["wall_seconds"] += span["wall_seconds"]
+            for name in COUNTERS:
+                node[name] += span.get(name, 0.0)
+            statuses[(span["node"], span["status"])] += 1
+
+    lines = [
+        "# HELP pipeline_node_executions_total Node attempts by outcome.",
+        "# TYPE pipeline_node_executions_total counter",
+    ]
+    for (node, status), count in sorted(statuses.items()):
+        lines.append(f'pipeline_node_executions_total{{node="{node}",status="{status}"}} {count}')
+    for name in ("wall_seconds",) + COUNTERS:
+        metric = f"pipeline_node_{name}_total"
+        lines += [f"# HELP {metric} Sum of {name} per node.", f"# TYPE {metric} counter"]
+        for node, values in sorted(nodes.items()):
+            lines.append(f'{metric}{{node="{node}"}} {values[name]:.6f}')
+    lines += [
+        "# HELP pipeline_runs_total Runs traced by this process.",
+        "# TYPE pipeline_runs_total counter",
+        f"pipeline_runs_total {len(reports)}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus_textfile(path: Optional[str] = None) -> Optional[str]:
+    """Writes prometheus_text() for node_exporter's textfile collector, if a path is configured."""
+    path = path or PipelineConfig.METRICS_TEXTFILE
+    if not path:
+        return None
+    _write_atomic(path, prometheus_text())
+    return path
+
+
+def _write_atomic(path: str, text: str) -> None:
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    # Scrapers and readers never see a half-written file
+    fd, tmp_path = tempfile.mkstemp(dir=directory)
+    with os.fdopen(fd, "w") as f:
+        f.write(text)
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, path)
@@ -1,95 +1,561 @@
+import asyncio
 import logging
 import base64
+import json
 import os
 import re
-import openai
-from openai import OpenAI
-from langchain_openai import ChatOpenAI
+import time
+import uuid
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser, JsonOutputParser
-try:
-    from moviepy.editor import AudioFileClip, ImageClip, concatenate_videoclips
-except ImportError:
-    from moviepy import AudioFileClip, ImageClip, concatenate_videoclips
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
+from langchain_core.callbacks import get_usage_metadata_callback
+from langchain_core.exceptions import OutputParserException
+from pydantic import BaseModel, Field, ValidationError, field_validator
+
+# openai, moviepy and the Google client libraries take seconds to import, so
+# they are loaded by the helpers that first need them rather than here
+if TYPE_CHECKING:
+    import openai
 
 if __package__:
     from .state import VideoState
     from .config import PipelineConfig
+    from .cache import cache_key, get_cache
+    from .compositor import compose_slideshow, crop_to_aspect, stream_slideshow
+    from .clients import get_client_registry
+    from .ledger import file_digest, get_ledger
+    from .backoff import backoff_delay, is_openai_status_error
+    from .ratelimit import get_rate_limiter
+    from .breaker import CircuitOpenError, get_breaker, trips_circuit
+    from . import metrics
 else:
     from state import VideoState
     from config import PipelineConfig
+    from cache import cache_key, get_cache
+    from compositor import compose_slideshow, crop_to_aspect, stream_slideshow
+    from clients import get_client_registry
+    from ledger import file_digest, get_ledger
+    from backoff import backoff_delay, is_openai_status_error
+    from ratelimit import get_rate_limiter
+    from breaker import CircuitOpenError, get_breaker, trips_circuit
+    import metrics
 
 logger = logging.getLogger(__name__)
 
 # --- Helper Functions ---
 
 def _get_llm(model="gpt-4o", temperature=0.7):
-    # Disable internal retries to allow Graph control flow to handle errors immediately
-    return ChatOpenAI(model=model, temperature=temperature, max_retries=0)
+    # Shared, pooled client; internal retries are disabled so the Graph control flow handles errors
+    return get_client_registry().chat_model(model, temperature)
+
+def _get_openai_client() -> "openai.OpenAI":
+    return get_client_registry().openai()
+
+def _get_async_llm(model="gpt-4o", temperature=0.7):
+    return get_client_registry().async_chat_model(model, temperature)
+
+def _get_async_openai_client() -> "openai.AsyncOpenAI":
+    return get_client_registry().async_openai()
+
+def _chat_chain(llm, messages: list, json_output: bool):
+    prompt = ChatPromptTemplate.from_messages(messages)
+    parser = JsonOutputParser() if json_output else StrOutputParser()
+    return prompt | llm | parser
+
+def _chat_token_estimate(messages: list, variables: dict) -> int:
+    """Tokens reserved against the tokens-per-minute budget before a chat call."""
+    prompt_chars = sum(len(str(text)) for _, text in messages) + sum(len(str(v)) for v in variables.values())
+    return prompt_chars // 4 + PipelineConfig.CHAT_COMPLETION_TOKEN_ESTIMATE
+
+def _record_chat_usage(usage, model: str, started: float, estimate: int) -> None:
+    """Records a chat call's metrics and settles its token reservation with the reported usage."""
+    input_tokens = sum(u.get("input_tokens", 0) for u in usage.usage_metadata.values())
+    output_tokens = sum(u.get("output_tokens", 0) for u in usage.usage_metadata.values())
+    metrics.record(api_calls=1, api_seconds=time.perf_counter() - started, input_tokens=input_tokens,
+                   output_tokens=output_tokens, cost_usd=metrics.chat_cost(model, input_tokens, output_tokens))
+    used = input_tokens + output_tokens
+    if used:
+        get_rate_limiter().adjust("chat", used - estimate)
+
+def _cached_chat(key: str, validate: Optional[Callable]):
+    """A cached chat result (validated, if a validator is given), or None on a miss or a stale invalid entry."""
+    cached = get_cache().get_json(key)
+    if cached is None or validate is None:
+        return cached
+    try:
+        return validate(cached)
+    except ValueError:
+        return None
+
+def _invoke_chat(messages: list, variables: dict, json_output: bool = False, model="gpt-4o", temperature=0.7,
+                 validate: Optional[Callable] = None):
+    """
+    Runs `prompt | llm | parser` for the given messages. Results are cached
+    on the model, parameters and prompt, so identical calls skip the API.
+    `validate` checks (and may normalize) the result before it is cached: a
+    result it rejects with ValueError is raised to the caller, not cached.
+    """
+    cache = get_cache()
+    key = cache_key("chat", model=model, temperature=temperature, messages=messages,
+                    variables=variables, json_output=json_output)
+    cached = _cached_chat(key, validate)
+    if cached is not None:
+        return cached
+
+    chain = _chat_chain(_get_llm(model=model, temperature=temperature), messages, json_output)
+    # Reserve an estimate against the tokens-per-minute budget, then settle up with the reported usage
+    estimate = _chat_token_estimate(messages, variables)
+    with get_breaker("chat").guard():
+        get_rate_limiter().acquire("chat", tokens=estimate)
+        start = time.perf_counter()
+        with get_usage_metadata_callback() as usage:
+            result = chain.invoke(variables)
+    _record_chat_usage(usage, model, start, estimate)
+
+    validated = validate(result) if validate else result
+    cache.put_json(key, result)
+    return validated
+
+async def _ainvoke_chat(messages: list, variables: dict, json_output: bool = False, model="gpt-4o", temperature=0.7,
+                        validate: Optional[Callable] = None):
+    """_invoke_chat for the async nodes: same cache, validation, budget and breaker, awaited on the event loop."""
+    cache = get_cache()
+    key = cache_key("chat", model=model, temperature=temperature, messages=messages,
+                    variables=variables, json_output=json_output)
+    # Cache reads and writes are disk I/O; keep them off the event loop
+    cached = await asyncio.to_thread(_cached_chat, key, validate)
+    if cached is not None:
+        return cached
+
+    chain = _chat_chain(_get_async_llm(model=model, temperature=temperature), messages, json_output)
+    estimate = _chat_token_estimate(messages, variables)
+    with get_breaker("chat").guard():
+        await get_rate_limiter().aacquire("chat", tokens=estimate)
+        start = time.perf_counter()
+        with get_usage_metadata_callback() as usage:
+            result = await chain.ainvoke(variables)
+    # Settling the token reservation is a SQLite write; keep it off the event loop
+    await asyncio.to_thread(_record_chat_usage, usage, model, start, estimate)
+
+    validated = validate(result) if validate else result
+    await asyncio.to_thread(cache.put_json, key, result)
+    return validated
 
 def _generate_script_content(topic: str, system_prompt: str, user_prompt_fmt: str = "Topic: {topic}") -> str:
-    llm = _get_llm()
-    prompt = ChatPromptTemplate.from_messages([
+    return _invoke_chat([
         ("system", system_prompt),
         ("user", user_prompt_fmt)
-    ])
-    chain = prompt | llm | StrOutputParser()
-    return chain.invoke({"topic": topic})
+    ], {"topic": topic})
+
+async def _agenerate_script_content(topic: str, system_prompt: str, user_prompt_fmt: str = "Topic: {topic}") -> str:
+    return await _ainvoke_chat([
+        ("system", system_prompt),
+        ("user", user_prompt_fmt)
+    ], {"topic": topic})
+
+def _split_script(text: str, limit: int) -> list[str]:
+    """
+    Splits text into chunks of at most `limit` characters, breaking at
+    sentence boundaries where possible (then at words, then hard).
+    """
+    sentences = re.split(r'(?<=[.!?])\s+', text.strip())
+    chunks, current = [], ""
+    for sentence in sentences:
+        while len(sentence) > limit:
+            # Oversized sentence: break at the last space before the limit
+            cut = sentence.rfind(" ", 0, limit + 1)
+            cut = cut if cut > 0 else limit
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if current and len(current) + 1 + len(sentence) > limit:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current or not chunks:
+        chunks.append(current)
+    return chunks
+
+def _tts_cache_key(text: str) -> str:
+    return cache_key("tts", model="tts-1", voice="alloy", input=text)
+
+def _restore_cached(key: str, output_path: str) -> bool:
+    """Writes a cached response to output_path. False on a cache miss."""
+    cached = get_cache().get(key)
+    if cached is None:
+        return False
+    with open(output_path, "wb") as f:
+        f.write(cached)
+    return True
 
-def _generate_audio_file(script: str, output_filename: str) -> str:
-    client = OpenAI(max_retries=0)
+def _cache_file(key: str, path: str) -> None:
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            get_cache().put(key, f.read())
+
+def _synthesize_speech(client: "openai.OpenAI", text: str, output_path: str) -> str:
+    key = _tts_cache_key(text)
+    if _restore_cached(key, output_path):
+        return output_path
+
+    with get_breaker("tts").guard():
+        get_rate_limiter().acquire("tts")
+        start = time.perf_counter()
+        response = client.audio.speech.create(
+            model="tts-1",
+            voice="alloy",
+            input=text
+        )
+        response.stream_to_file(output_path)
+    metrics.record(api_calls=1, api_seconds=time.perf_counter() - start, tts_chars=len(text),
+                   cost_usd=metrics.tts_cost("tts-1", len(text)))
+    _cache_file(key, output_path)
+    return output_path
+
+async def _asynthesize_speech(client: "openai.AsyncOpenAI", text: str, output_path: str) -> str:
+    key = _tts_cache_key(text)
+    if await asyncio.to_thread(_restore_cached, key, output_path):
+        return output_path
+
+    with get_breaker("tts").guard():
+        await get_rate_limiter().aacquire("tts")
+        start = time.perf_counter()
+        response = await client.audio.speech.create(
+            model="tts-1",
+            voice="alloy",
+            input=text
+        )
+        await response.astream_to_file(output_path)
+    metrics.record(api_calls=1, api_seconds=time.perf_counter() - start, tts_chars=len(text),
+                   cost_usd=metrics.tts_cost("tts-1", len(text)))
+    await asyncio.to_thread(_cache_file, key, output_path)
+    return output_path
+
+def _narration_chunks(script: str, output_filename: str, output_dir: Optional[str]) -> tuple:
+    """Returns (output_path, chunks): the narration without visual cues, split for TTS."""
     # Remove visual cues
     clean_script = re.sub(r'\[.*?\]', '', script).strip()
-    
-    os.makedirs("output", exist_ok=True)
-    output_path = os.path.join("output", output_filename)
 
-    response = client.audio.speech.create(
-        model="tts-1",
-        voice="alloy",
-        input=clean_script[:4096]
-    )
-    response.stream_to_file(output_path)
+    output_dir = output_dir or PipelineConfig.OUTPUT_ROOT
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = os.path.join(output_dir, output_filename)
+    return output_path, _split_script(clean_script, PipelineConfig.TTS_CHUNK_CHARS)
+
+def _join_parts(output_path: str, part_paths: list[str]) -> None:
+    # MP3 frames are self-contained, so the parts can be joined byte for byte
+    with open(output_path, "wb") as out:
+        for part_path in part_paths:
+            with open(part_path, "rb") as part:
+                out.write(part.read())
+    metrics.record(bytes_written=metrics.file_size(output_path))
+
+def _remove_parts(part_paths: list[str]) -> None:
+    for part_path in part_paths:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+
+def _generate_audio_file(script: str, output_filename: str, output_dir: Optional[str] = None) -> str:
+    """
+    Synthesizes the narration. Scripts over PipelineConfig.TTS_CHUNK_CHARS
+    are split at sentence boundaries, the chunks are synthesized concurrently
+    and their MP3 streams are joined in order without re-encoding.
+    """
+    output_path, chunks = _narration_chunks(script, output_filename, output_dir)
+    client = _get_openai_client()
+    if len(chunks) == 1:
+        _synthesize_speech(client, chunks[0], output_path)
+        metrics.record(bytes_written=metrics.file_size(output_path))
+        return output_path
+
+    workers = max(1, min(PipelineConfig.MAX_TTS_WORKERS, len(chunks)))
+    logger.info(f"Synthesizing {len(chunks)} narration chunks ({workers} workers)...")
+    part_paths = [f"{output_path}.part{i}" for i in range(len(chunks))]
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [metrics.submit(pool, _synthesize_speech, client, chunk, path) for chunk, path in zip(chunks, part_paths)]
+        for future in futures:
+            future.result()
+        _join_parts(output_path, part_paths)
+    finally:
+        _remove_parts(part_paths)
     return output_path
 
-def _generate_image_prompts(script: str, system_prompt: str) -> list[str]:
-    llm = _get_llm()
-    prompt_generator = ChatPromptTemplate.from_messages([
+async def _gather_limited(limit: int, coros: list, return_exceptions: bool = False) -> list:
+    """asyncio.gather with at most `limit` of the coroutines in flight at once."""
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(coro):
+        async with semaphore:
+            return await coro
+    return await asyncio.gather(*(run(c) for c in coros), return_exceptions=return_exceptions)
+
+async def _agenerate_audio_file(script: str, output_filename: str, output_dir: Optional[str] = None) -> str:
+    """
+    _generate_audio_file with the chunks synthesized as concurrent requests
+    on the event loop; joining and removing the parts runs in a thread.
+    """
+    output_path, chunks = await asyncio.to_thread(_narration_chunks, script, output_filename, output_dir)
+    client = _get_async_openai_client()
+    if len(chunks) == 1:
+        await _asynthesize_speech(client, chunks[0], output_path)
+        metrics.record(bytes_written=metrics.file_size(output_path))
+        return output_path
+
+    logger.info(f"Synthesizing {len(chunks)} narration chunks (up to {PipelineConfig.MAX_TTS_WORKERS} at once)...")
+    part_paths = [f"{output_path}.part{i}" for i in range(len(chunks))]
+    try:
+        results = await _gather_limited(
+            PipelineConfig.MAX_TTS_WORKERS,
+            [_asynthesize_speech(client, chunk, path) for chunk, path in zip(chunks, part_paths)],
+            return_exceptions=True,
+        )
+        # Let every request settle before the parts are removed, then surface the first failure
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        await asyncio.to_thread(_join_parts, output_path, part_paths)
+    finally:
+        await asyncio.to_thread(_remove_parts, part_paths)
+    return output_path
+
+def _image_prompt_messages(system_prompt: str) -> list:
+    return [
         ("system", system_prompt),
         ("user", "Script: {script}")
-    ])
-    chain = prompt_generator | llm | StrOutputParser()
-    prompts_text = chain.invoke({"script": script[:4000]})
-    return [p.strip() for p in prompts_text.split('\n') if p.strip()][:3]
-
-def _generate_images(prompts: list[str], size: str, output_prefix: str) -> list[str]:
-    client = OpenAI(max_retries=0)
-    os.makedirs("output", exist_ok=True)
-    image_paths = []
-
-    for i, img_prompt in enumerate(prompts):
-        logger.info(f"Generating image {i+1} for {output_prefix}...")
-        response = client.images.generate(
-            model="dall-e-3",
-            prompt=img_prompt,
-            size=size,
-            quality="standard",
-            n=1,
-            response_format="b64_json"
+    ]
+
+def _parse_image_prompts(prompts_text: str) -> list[str]:
+    return [p.strip() for p in prompts_text.split('\n') if p.strip()][:PipelineConfig.IMAGE_COUNT]
+
+def _generate_image_prompts(script: str, system_prompt: str) -> list[str]:
+    prompts_text = _invoke_chat(_image_prompt_messages(system_prompt), {"script": script[:4000]})
+    return _parse_image_prompts(prompts_text)
+
+async def _agenerate_image_prompts(script: str, system_prompt: str) -> list[str]:
+    prompts_text = await _ainvoke_chat(_image_prompt_messages(system_prompt), {"script": script[:4000]})
+    return _parse_image_prompts(prompts_text)
+
+def _image_cache_key(img_prompt: str, size: str) -> str:
+    return cache_key("image", model="dall-e-3", prompt=img_prompt, size=size, quality="standard")
+
+def _image_response_data(key: str, response, size: str, started: float) -> bytes:
+    """Decodes a generated image, caches it and records the call."""
+    metrics.record(api_calls=1, api_seconds=time.perf_counter() - started, cost_usd=metrics.image_cost("dall-e-3", size))
+    image_data = base64.b64decode(response.data[0].b64_json)
+    get_cache().put(key, image_data)
+    return image_data
+
+def _write_image(image_data: bytes, file_path: str) -> str:
+    with open(file_path, "wb") as f:
+        f.write(image_data)
+    metrics.record(images=1, bytes_written=len(image_data))
+    return file_path
+
+def _generate_image(client: "openai.OpenAI", img_prompt: str, size: str, file_path: str) -> str:
+    key = _image_cache_key(img_prompt, size)
+    image_data = get_cache().get(key)
+    if image_data is None:
+        with get_breaker("images").guard():
+            get_rate_limiter().acquire("images")
+            start = time.perf_counter()
+            response = client.images.generate(
+                model="dall-e-3",
+                prompt=img_prompt,
+                size=size,
+                quality="standard",
+                n=1,
+                response_format="b64_json"
+            )
+        image_data = _image_response_data(key, response, size, start)
+    return _write_image(image_data, file_path)
+
+async def _agenerate_image(client: "openai.AsyncOpenAI", img_prompt: str, size: str, file_path: str) -> str:
+    """_generate_image with the request awaited; cache and file I/O run in a thread."""
+    key = _image_cache_key(img_prompt, size)
+    image_data = await asyncio.to_thread(get_cache().get, key)
+    if image_data is None:
+        with get_breaker("images").guard():
+            await get_rate_limiter().aacquire("images")
+            start = time.perf_counter()
+            response = await client.images.generate(
+                model="dall-e-3",
+                prompt=img_prompt,
+                size=size,
+                quality="standard",
+                n=1,
+                response_format="b64_json"
+            )
+        image_data = await asyncio.to_thread(_image_response_data, key, response, size, start)
+    return await asyncio.to_thread(_write_image, image_data, file_path)
+
+class ImageBatchError(Exception):
+    """Raised when some images of a batch failed. Carries the ones that were written."""
+
+    def __init__(self, completed: Dict[int, str], cause: Exception):
+        super().__init__(str(cause))
+        self.completed = completed
+        self.cause = cause
+
+def _pending_images(prompts: list[str], completed: Optional[Dict[int, str]]) -> tuple:
+    """(completed, pending): the images already on disk and the prompt indices still to generate."""
+    completed = dict(completed or {})
+    return completed, [i for i in range(len(prompts)) if i not in completed]
+
+def _image_path(output_dir: str, output_prefix: str, i: int) -> str:
+    return os.path.join(output_dir, f"{output_prefix}_{i}.png")
+
+def _settle_images(prompts: list[str], output_prefix: str, completed: Dict[int, str], outcomes: Dict[int, object]) -> list[str]:
+    """
+    Merges a batch's outcomes (a path, or the exception raised) into
+    `completed`. Returns every path in prompt order, or raises ImageBatchError
+    carrying the images that made it to disk.
+    """
+    errors = []
+    for i, outcome in outcomes.items():
+        if isinstance(outcome, Exception):
+            logger.warning(f"Image {output_prefix}_{i} failed: {outcome}")
+            errors.append(outcome)
+        elif isinstance(outcome, BaseException):
+            raise outcome
+        else:
+            completed[i] = outcome
+    if errors:
+        raise ImageBatchError(completed, errors[0])
+    return [completed[i] for i in range(len(prompts))]
+
+def _generate_images(prompts: list[str], size: str, output_prefix: str, completed: Optional[Dict[int, str]] = None,
+                     output_dir: Optional[str] = None) -> list[str]:
+    """
+    Generates one image per prompt concurrently, bounded by
+    PipelineConfig.MAX_IMAGE_WORKERS. Paths keep the prompt order.
+
+    Indices in `completed` are skipped. If any image fails, ImageBatchError
+    is raised once the whole batch has settled, carrying every image that
+    made it to disk so the caller can retry only the missing ones.
+    """
+    completed, pending = _pending_images(prompts, completed)
+    if not pending:
+        return _settle_images(prompts, output_prefix, completed, {})
+
+    client = _get_openai_client()
+    output_dir = output_dir or PipelineConfig.OUTPUT_ROOT
+    os.makedirs(output_dir, exist_ok=True)
+    workers = max(1, min(PipelineConfig.MAX_IMAGE_WORKERS, len(pending)))
+
+    logger.info(f"Generating {len(pending)} of {len(prompts)} images for {output_prefix} ({workers} workers)...")
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            i: metrics.submit(pool, _generate_image, client, prompts[i], size, _image_path(output_dir, output_prefix, i))
+            for i in pending
+        }
+
+    outcomes = {}
+    for i, future in futures.items():
+        try:
+            outcomes[i] = future.result()
+        except Exception as e:
+            outcomes[i] = e
+    return _settle_images(prompts, output_prefix, completed, outcomes)
+
+async def _agenerate_images(prompts: list[str], size: str, output_prefix: str, completed: Optional[Dict[int, str]] = None,
+                            output_dir: Optional[str] = None) -> list[str]:
+    """_generate_images with the images requested concurrently on the event loop, same failure contract."""
+    completed, pending = _pending_images(prompts, completed)
+    if not pending:
+        return _settle_images(prompts, output_prefix, completed, {})
+
+    client = _get_async_openai_client()
+    output_dir = output_dir or PipelineConfig.OUTPUT_ROOT
+    await asyncio.to_thread(os.makedirs, output_dir, exist_ok=True)
+
+    logger.info(f"Generating {len(pending)} of {len(prompts)} images for {output_prefix} "
+                f"(up to {PipelineConfig.MAX_IMAGE_WORKERS} at once)...")
+    results = await _gather_limited(
+        PipelineConfig.MAX_IMAGE_WORKERS,
+        [_agenerate_image(client, prompts[i], size, _image_path(output_dir, output_prefix, i)) for i in pending],
+        return_exceptions=True,
+    )
+    return _settle_images(prompts, output_prefix, completed, dict(zip(pending, results)))
+
+def _completed_images(state: VideoState, output_prefix: str) -> Dict[int, str]:
+    """Returns images recorded in state for this prefix that still exist on disk."""
+    completed = {}
+    pattern = re.compile(rf"^{re.escape(output_prefix)}_(\d+)$")
+    for stem, path in (state.get("generated_images") or {}).items():
+        match = pattern.match(stem)
+        if match and path and os.path.exists(path):
+            completed[int(match.group(1))] = path
+    return completed
+
+def _asset_steps(state: VideoState, node_name: str, script_key: str, system_prompt: str,
+                 size: str, output_prefix: str, prompts_key: str, paths_key: str):
+    """
+    Shared body of the asset nodes. Image prompts and finished images are
+    recorded in state on failure, so a retry reuses them instead of paying
+    for the whole set again.
+    """
+    script = state.get(script_key)
+    if not script:
+        return _node_failure(state, node_name, f"No {script_key.replace('_', ' ')} provided.", PipelineConfig.MAX_RETRIES)
+
+    prompts = state.get(prompts_key)
+    try:
+        if not prompts:
+            prompts = yield _Step(_generate_image_prompts, _agenerate_image_prompts, script, system_prompt)
+        image_paths = yield _Step(
+            _generate_images, _agenerate_images,
+            prompts, size, output_prefix, _completed_images(state, output_prefix), output_dir=_output_dir(state)
         )
-        image_data = base64.b64decode(response.data[0].b64_json)
-        file_path = os.path.join("output", f"{output_prefix}_{i}.png")
-        with open(file_path, "wb") as f:
-            f.write(image_data)
-        image_paths.append(file_path)
-    return image_paths
-
-def _compose_video_file(voice_path: str, image_paths: list[str], output_filename: str, width: int, height: int, fps: int) -> str:
+        return _node_success(node_name, **{prompts_key: prompts, paths_key: image_paths})
+    except ImageBatchError as e:
+        logger.info(f"{len(e.completed)} of {len(prompts)} images kept for retry.")
+        return {
+            **_handle_api_error(e.cause, state, node_name),
+            prompts_key: prompts,
+            "generated_images": {f"{output_prefix}_{i}": path for i, path in e.completed.items()},
+        }
+    except Exception as e:
+        return _handle_api_error(e, state, node_name)
+
+def _encode_profile(state: VideoState) -> dict:
+    """Returns the encode profile selected for this run (see PipelineConfig.ENCODE_PROFILES)."""
+    name = state.get("encode_profile") or PipelineConfig.DEFAULT_ENCODE_PROFILE
+    if name not in PipelineConfig.ENCODE_PROFILES:
+        raise ValueError(f"Unknown encode profile '{name}'. Choose from: {', '.join(PipelineConfig.ENCODE_PROFILES)}")
+    return PipelineConfig.ENCODE_PROFILES[name]
+
+def _compose_video_file(voice_path: str, image_paths: list[str], output_filename: str, width: int, height: int, fps: int,
+                        profile: Optional[dict] = None, output_dir: Optional[str] = None, fragmented: bool = False) -> str:
+    """
+    Renders the slideshow; `fragmented` (ffmpeg compositor only) writes
+    fragmented MP4 front to back so the file can be uploaded while it grows.
+    """
+    profile = profile or PipelineConfig.ENCODE_PROFILES[PipelineConfig.DEFAULT_ENCODE_PROFILE]
+    # Apply the profile's resolution scale (kept even for yuv420p) and frame rate
+    scale = profile.get("scale", 1.0)
+    width, height = int(width * scale) // 2 * 2, int(height * scale) // 2 * 2
+    fps = profile.get("fps") or fps
+    output_dir = output_dir or PipelineConfig.OUTPUT_ROOT
+    start = time.perf_counter()
+
+    if PipelineConfig.COMPOSITOR == "ffmpeg":
+        os.makedirs(output_dir, exist_ok=True)
+        output_path = os.path.join(output_dir, output_filename)
+        compose = stream_slideshow if fragmented else compose_slideshow
+        compose(voice_path, image_paths, output_path, width, height, fps, profile)
+        metrics.record(encode_seconds=time.perf_counter() - start, bytes_written=metrics.file_size(output_path))
+        return output_path
+
+    try:
+        from moviepy.editor import AudioFileClip, ImageClip, concatenate_videoclips
+    except ImportError:
+        from moviepy import AudioFileClip, ImageClip, concatenate_videoclips
+
     audio_clip = AudioFileClip(voice_path)
     img_duration = audio_clip.duration / len(image_paths)
     
@@ -114,35 +580,301 @@ def _compose_video_file(voice_path: str, image_paths: list[str], output_filename
     final_clip = concatenate_videoclips(clips, method="compose")
     final_clip = final_clip.set_audio(audio_clip)
     
-    os.makedirs("output", exist_ok=True)
-    output_path = os.path.join("output", output_filename)
-    final_clip.write_videofile(output_path, codec="libx264", audio_codec="aac", fps=fps, logger=None)
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = os.path.join(output_dir, output_filename)
+    final_clip.write_videofile(
+        output_path, codec="libx264", audio_codec="aac", fps=fps, logger=None,
+        preset=profile["preset"], threads=profile["threads"] or None,
+        ffmpeg_params=["-crf", str(profile["crf"])]
+    )
+    metrics.record(encode_seconds=time.perf_counter() - start, bytes_written=metrics.file_size(output_path))
     return output_path
 
+def _output_dir(state: VideoState) -> str:
+    """Returns the run's workspace directory (set by topic_planner)."""
+    return state.get("output_dir") or PipelineConfig.OUTPUT_ROOT
+
+def _node_retries(state: VideoState, node_name: str) -> int:
+    """Returns how many times `node_name` has failed in a row."""
+    return (state.get("node_retries") or {}).get(node_name, 0)
+
+def _node_success(node_name: str, **updates) -> VideoState:
+    """Builds a node's success update, clearing only that node's error/retry slot."""
+    return {
+        **updates,
+        "error": None,
+        "retry_count": 0,
+        "node_errors": {node_name: None},
+        "node_retries": {node_name: 0},
+    }
+
+def _node_failure(state: VideoState, node_name: str, error: str, retry_count: int = None,
+                  retry_delay: float = 0.0) -> VideoState:
+    """
+    Builds a node's failure update. Errors are recorded per node so that
+    parallel branches retry (or end) independently of each other.
+    """
+    if retry_count is None:
+        retry_count = _node_retries(state, node_name) + 1
+    return {
+        "error": error,
+        "retry_count": retry_count,
+        "node_errors": {node_name: error},
+        "node_retries": {node_name: retry_count},
+        "retry_delays": {node_name: retry_delay},
+    }
+
 def _handle_api_error(e: Exception, state: VideoState, node_name: str) -> VideoState:
     """Centralized error handling for API calls to provide more intelligent retry behavior."""
     logger.error(f"Error in {node_name}: {e}")
-    
+
+    # Upstream already known to be out of quota or unauthorized; don't wait for it
+    if isinstance(e, CircuitOpenError):
+        logger.warning(f"{e.upstream} circuit is open. Bypassing retries to fallback/end.")
+        return _node_failure(state, node_name, str(e), PipelineConfig.MAX_RETRIES)
+
     # Check for non-retriable OpenAI errors
-    if isinstance(e, openai.APIStatusError):
+    if is_openai_status_error(e):
         # Quota errors or auth errors should not be retried
         if e.status_code == 429 and 'insufficient_quota' in str(e).lower():
             logger.warning("Non-retriable error (insufficient_quota). Bypassing retries to trigger fallback/end.")
             # Set retry_count to max to trigger fallback/end immediately
-            return {"error": str(e), "retry_count": PipelineConfig.MAX_RETRIES} 
+            return _node_failure(state, node_name, str(e), PipelineConfig.MAX_RETRIES)
         if e.status_code in [401, 403]: # Unauthorized, Forbidden
             logger.warning(f"Non-retriable error (HTTP {e.status_code}). Bypassing retries to fallback/end.")
-            return {"error": str(e), "retry_count": PipelineConfig.MAX_RETRIES}
+            return _node_failure(state, node_name, str(e), PipelineConfig.MAX_RETRIES)
+
+    # Same for YouTube quota and auth errors
+    if trips_circuit(e):
+        logger.warning("Non-retriable error (quota/auth). Bypassing retries to fallback/end.")
+        return _node_failure(state, node_name, str(e), PipelineConfig.MAX_RETRIES)
+
+    # For other errors, increment retry count normally and back off before the retry
+    retry_count = _node_retries(state, node_name) + 1
+    return _node_failure(state, node_name, str(e), retry_count, backoff_delay(e, retry_count))
+
+# --- Node Steps ---
+# Each API-bound node is written once, as a generator that validates its
+# inputs, yields its blocking calls as _Steps and returns the state update.
+# _run_node makes the calls directly (app.invoke); _arun_node awaits their
+# async variants (app.ainvoke), so both node flavours share one body.
+
+class _Step:
+    """One blocking call of a node body: `fn` when run, `afn` when awaited (`fn` in a thread if None)."""
+
+    def __init__(self, fn: Callable, afn: Optional[Callable], *args, **kwargs):
+        self.fn = fn
+        self.afn = afn
+        self.args = args
+        self.kwargs = kwargs
+
+def _run_node(steps) -> VideoState:
+    """Drives a node body synchronously. A failed call is raised inside the body, at its yield."""
+    try:
+        step = next(steps)
+        while True:
+            try:
+                result = step.fn(*step.args, **step.kwargs)
+            except Exception as e:
+                step = steps.throw(e)
+            else:
+                step = steps.send(result)
+    except StopIteration as done:
+        return done.value
+
+async def _arun_node(steps) -> VideoState:
+    """_run_node for the async nodes: every call is awaited, so none blocks the event loop."""
+    try:
+        step = next(steps)
+        while True:
+            try:
+                if step.afn is None:
+                    result = await asyncio.to_thread(step.fn, *step.args, **step.kwargs)
+                else:
+                    result = await step.afn(*step.args, **step.kwargs)
+            except Exception as e:
+                step = steps.throw(e)
+            else:
+                step = steps.send(result)
+    except StopIteration as done:
+        return done.value
 
-    # For other errors, increment retry count normally
-    return {"error": str(e), "retry_count": state.get("retry_count", 0) + 1}
+
+# --- Prompts ---
+
+SCRIPT_PROMPT = """You are a professional YouTube scriptwriter. Create an engaging 3-5 minute video script.
+
+Structure:
+1. Hook (0:00-0:30): Grab attention immediately.
+2. Intro: Briefly explain the value proposition.
+3. Main Body: Cover 3-4 key points in depth.
+4. Conclusion & CTA: Summarize and ask to subscribe.
+
+Format: Use [Visual] tags for visual cues and write the narration clearly."""
+
+SHORT_SCRIPT_PROMPT = """You are an expert YouTube Shorts scriptwriter. Create a high-energy, viral script under 60 seconds.
+
+Structure:
+1. Hook (0-3s): Stop the scroll immediately.
+2. Value/Story (3-50s): Deliver the main point quickly and visually.
+3. CTA (50-60s): Quick call to action (Subscribe/Like).
+
+Format:
+- Keep sentences short.
+- Use [Visual] tags for visual cues.
+- Total word count should be around 130-150 words for normal speaking pace."""
+
+METADATA_PROMPT = """You are a YouTube SEO expert. Generate metadata for a video based on the script.
+Return a valid JSON object with exactly these keys:
+- "title": A catchy video title (max 100 chars).
+- "description": A compelling video description (min 2 paragraphs).
+- "tags": A list of 10-15 relevant tags."""
+
+CONDENSE_SHORT_PROMPT = """You are an expert YouTube Shorts scriptwriter. Condense the provided long-form video script into a high-energy, viral script under 60 seconds.
+
+Structure:
+1. Hook (0-3s): Open with the script's most striking point.
+2. Value/Story (3-50s): Keep only its strongest idea, delivered quickly and visually.
+3. CTA (50-60s): Quick call to action (Subscribe/Like).
+
+Format:
+- Keep sentences short.
+- Use [Visual] tags for visual cues.
+- Total word count should be around 130-150 words for normal speaking pace."""
+
+THUMBNAIL_PROMPT = "You are a YouTube thumbnail designer. Create a detailed prompt for DALL-E 3 to generate a high-CTR thumbnail. Focus on visual elements, high contrast, and emotion. Do not include the prompt for text overlays, just the visual scene."
+
+def _asset_prompt() -> str:
+    image_count = PipelineConfig.IMAGE_COUNT
+    return f"""You are an AI visual director. 
+Based on the provided video script, create exactly {image_count} distinct, detailed image generation prompts for DALL-E 3.
+Spread them evenly across the script, from the beginning to the end.
+Return ONLY the {image_count} prompts, separated by newlines. Do not number them."""
+
+def _short_asset_prompt() -> str:
+    image_count = PipelineConfig.IMAGE_COUNT
+    return f"""You are an AI visual director for YouTube Shorts. 
+Based on the provided video script, create exactly {image_count} distinct, detailed image generation prompts for DALL-E 3.
+The images will be generated in vertical format (9:16), so focus on central composition and verticality.
+Spread them evenly across the script, from the beginning to the end.
+Return ONLY the {image_count} prompts, separated by newlines. Do not number them."""
+
+def _plan_prompt() -> str:
+    image_count = PipelineConfig.IMAGE_COUNT
+    return f"""{SCRIPT_PROMPT}
+
+Plan the rest of the video in the same response.
+Return a valid JSON object with exactly these keys:
+- "script": The full video script described above.
+- "image_prompts": A list of exactly {image_count} distinct, detailed image generation prompts for DALL-E 3, spread evenly across the script from the beginning to the end.
+- "title": A catchy video title (max 100 chars).
+- "description": A compelling video description (min 2 paragraphs).
+- "tags": A list of 10-15 relevant tags.
+- "thumbnail_prompt": A detailed DALL-E 3 prompt for a high-CTR thumbnail. Focus on visual elements, high contrast, and emotion; describe only the visual scene, no text overlays."""
+
+# --- Combined Planning ---
+
+class ContentPlan(BaseModel):
+    """Schema of the combined planning response (PipelineConfig.COMBINED_PLANNING)."""
+    script: str = Field(min_length=1)
+    image_prompts: List[str]
+    title: str = Field(min_length=1)
+    description: str
+    tags: List[str]
+    thumbnail_prompt: str = Field(min_length=1)
+
+    @field_validator("image_prompts")
+    @classmethod
+    def _enough_image_prompts(cls, prompts: List[str]) -> List[str]:
+        prompts = [p.strip() for p in prompts if p.strip()]
+        if len(prompts) < PipelineConfig.IMAGE_COUNT:
+            raise ValueError(f"expected {PipelineConfig.IMAGE_COUNT} image prompts, got {len(prompts)}")
+        return prompts[:PipelineConfig.IMAGE_COUNT]
+
+def _plan_messages() -> list:
+    return [
+        ("system", _plan_prompt()),
+        ("user", "Topic: {topic}")
+    ]
+
+def _validate_plan(result) -> dict:
+    """The plan as state updates; raises ValidationError if it does not match ContentPlan."""
+    return ContentPlan.model_validate(result).model_dump()
+
+def _plan_content(topic: str) -> Optional[dict]:
+    """
+    Script, image prompts, metadata and thumbnail prompt from one chat call.
+    Returns None when the response is not valid JSON or fails validation
+    (such responses are never cached); API errors propagate like any other
+    chat call's.
+    """
+    try:
+        return _invoke_chat(_plan_messages(), {"topic": topic}, json_output=True, validate=_validate_plan)
+    except (OutputParserException, ValidationError) as e:
+        logger.warning(f"Combined plan is invalid, falling back to per-node generation: {e}")
+        return None
+
+async def _aplan_content(topic: str) -> Optional[dict]:
+    try:
+        return await _ainvoke_chat(_plan_messages(), {"topic": topic}, json_output=True, validate=_validate_plan)
+    except (OutputParserException, ValidationError) as e:
+        logger.warning(f"Combined plan is invalid, falling back to per-node generation: {e}")
+        return None
+
+# --- Derived Shorts ---
+
+def uses_derived_shorts(state: VideoState) -> bool:
+    """True if this run's Shorts are derived from its long-form script and images (PipelineConfig.DERIVED_SHORTS)."""
+    return PipelineConfig.DERIVED_SHORTS and state.get("content_type") == "both"
+
+def _condense_messages() -> list:
+    return [
+        ("system", CONDENSE_SHORT_PROMPT),
+        ("user", "Topic: {topic}\n\nLong-form script: {script}")
+    ]
+
+def _derive_short_assets(state: VideoState) -> VideoState:
+    """
+    Shorts assets cut from the long-form images: each is center-cropped to
+    9:16, so no image prompts or DALL-E calls are needed.
+    """
+    image_paths = state.get("image_paths")
+    if not image_paths:
+        return _node_failure(state, "short_asset_generator", "No long-form images to derive Shorts images from.",
+                             PipelineConfig.MAX_RETRIES)
+    try:
+        output_dir = _output_dir(state)
+        os.makedirs(output_dir, exist_ok=True)
+        paths = [
+            crop_to_aspect(path, os.path.join(output_dir, f"short_image_{i}.png"), 9, 16)
+            for i, path in enumerate(image_paths)
+        ]
+        metrics.record(bytes_written=sum(metrics.file_size(path) for path in paths))
+        return _node_success(
+            "short_asset_generator", short_image_prompts=state.get("image_prompts"), short_image_paths=paths
+        )
+    except Exception as e:
+        logger.error(f"Deriving Shorts images failed: {e}")
+        return _node_failure(state, "short_asset_generator", str(e))
+
+def _planned_metadata(state: VideoState) -> bool:
+    """True if the combined plan already supplied this run's metadata."""
+    return bool(state.get("title")) and state.get("description") is not None and state.get("tags") is not None
 
 
 def topic_planner(state: VideoState) -> VideoState:
     """Section 10.3: Validate or select the topic."""
     logger.info("--- Topic Planner ---")
     topic = state.get("topic") or "Default AI Topic"
-    return {"topic": topic}
+
+    # Give the run its own workspace so concurrent runs never share file names
+    run_id = state.get("run_id") or uuid.uuid4().hex[:12]
+    output_dir = state.get("output_dir")
+    if not output_dir:
+        output_dir = PipelineConfig.OUTPUT_ROOT
+        if PipelineConfig.PER_RUN_OUTPUT_DIRS:
+            output_dir = os.path.join(output_dir, run_id)
+    return {"topic": topic, "run_id": run_id, "output_dir": output_dir}
 
 def content_type_router(state: VideoState) -> VideoState:
     """Section 12.1: Decide content type (short, long, both)."""
@@ -160,32 +892,35 @@ def content_type_router(state: VideoState) -> VideoState:
     logger.info(f"Decision: {c_type}")
     return {"content_type": c_type}
 
+def branch_ready(state: VideoState) -> VideoState:
+    """
+    Join gate for parallel branches. Only reached on a branch's success path,
+    so a downstream node waiting on several gates runs once all have succeeded.
+    """
+    return {}
+
 # --- Long Form Pipeline Nodes ---
 
-def script_generator(state: VideoState) -> VideoState:
-    """Section 10.4: Generate long-form script."""
+def _script_steps(state: VideoState):
     logger.info("--- Script Generator (Long) ---")
-    
     topic = state.get("topic")
     if not topic:
-        return {"error": "No topic provided."}
+        return _node_failure(state, "script_generator", "No topic provided.", PipelineConfig.MAX_RETRIES)
 
     try:
-        system_prompt = """You are a professional YouTube scriptwriter. Create an engaging 3-5 minute video script.
-
-Structure:
-1. Hook (0:00-0:30): Grab attention immediately.
-2. Intro: Briefly explain the value proposition.
-3. Main Body: Cover 3-4 key points in depth.
-4. Conclusion & CTA: Summarize and ask to subscribe.
-
-Format: Use [Visual] tags for visual cues and write the narration clearly."""
-        
-        script = _generate_script_content(topic, system_prompt)
-        return {"script": script, "error": None, "retry_count": 0}
+        if PipelineConfig.COMBINED_PLANNING:
+            plan = yield _Step(_plan_content, _aplan_content, topic)
+            if plan:
+                return _node_success("script_generator", **plan)
+        script = yield _Step(_generate_script_content, _agenerate_script_content, topic, SCRIPT_PROMPT)
+        return _node_success("script_generator", script=script)
     except Exception as e:
         return _handle_api_error(e, state, "script_generator")
 
+def script_generator(state: VideoState) -> VideoState:
+    """Section 10.4: Generate long-form script."""
+    return _run_node(_script_steps(state))
+
 def script_generator_fallback(state: VideoState) -> VideoState:
     """Fallback logic if script generation fails repeatedly."""
     logger.info("--- Script Generator (Fallback) ---")
@@ -197,42 +932,40 @@ def script_generator_fallback(state: VideoState) -> VideoState:
         "We will be diving deeper into this in future videos. "
         "Thanks for watching and don't forget to subscribe!"
     )
-    return {"script": script, "error": None, "retry_count": 0}
+    return _node_success("script_generator_fallback", script=script)
 
-def voice_generator(state: VideoState) -> VideoState:
-    """Section 10.5: TTS for long-form."""
-    logger.info("--- Voice Generator (Long) ---")
-    
-    script = state.get("script")
+def _voice_steps(state: VideoState, node_name: str, script_key: str, output_filename: str, path_key: str):
+    """Shared body of the voice nodes."""
+    script = state.get(script_key)
     if not script:
-        return {"error": "No script provided."}
+        return _node_failure(state, node_name, f"No {script_key.replace('_', ' ')} provided.", PipelineConfig.MAX_RETRIES)
 
     try:
-        output_path = _generate_audio_file(script, "long_voice.mp3")
-        return {"voice_path": output_path, "error": None, "retry_count": 0}
+        output_path = yield _Step(
+            _generate_audio_file, _agenerate_audio_file, script, output_filename, output_dir=_output_dir(state)
+        )
+        return _node_success(node_name, **{path_key: output_path})
     except Exception as e:
-        return _handle_api_error(e, state, "voice_generator")
+        return _handle_api_error(e, state, node_name)
 
-def asset_generator(state: VideoState) -> VideoState:
-    """Section 10.6: Visual assets for long-form."""
-    logger.info("--- Asset Generator (Long) ---")
-    
-    script = state.get("script")
-    if not script:
-        return {"error": "No script provided."}
+def _long_voice_steps(state: VideoState):
+    logger.info("--- Voice Generator (Long) ---")
+    return (yield from _voice_steps(state, "voice_generator", "script", "long_voice.mp3", "voice_path"))
 
-    try:
-        system_prompt = """You are an AI visual director. 
-Based on the provided video script, create exactly 3 distinct, detailed image generation prompts for DALL-E 3.
-One for the beginning, one for the middle, and one for the end.
-Return ONLY the 3 prompts, separated by newlines. Do not number them."""
-        
-        prompts = _generate_image_prompts(script, system_prompt)
-        image_paths = _generate_images(prompts, "1024x1024", "image")
-        return {"image_paths": image_paths, "error": None, "retry_count": 0}
+def voice_generator(state: VideoState) -> VideoState:
+    """Section 10.5: TTS for long-form."""
+    return _run_node(_long_voice_steps(state))
 
-    except Exception as e:
-        return _handle_api_error(e, state, "asset_generator")
+def _long_asset_steps(state: VideoState):
+    logger.info("--- Asset Generator (Long) ---")
+    return (yield from _asset_steps(
+        state, "asset_generator", "script", _asset_prompt(),
+        size="1024x1024", output_prefix="image", prompts_key="image_prompts", paths_key="image_paths"
+    ))
+
+def asset_generator(state: VideoState) -> VideoState:
+    """Section 10.6: Visual assets for long-form."""
+    return _run_node(_long_asset_steps(state))
 
 def video_composer(state: VideoState) -> VideoState:
     """Section 10.7: Compose long-form video."""
@@ -242,122 +975,297 @@ def video_composer(state: VideoState) -> VideoState:
     image_paths = state.get("image_paths")
     
     if not voice_path or not image_paths:
-        return {"error": "Missing voice or images for video composition."}
+        return _node_failure(state, "video_composer", "Missing voice or images for video composition.", PipelineConfig.MAX_RETRIES)
         
     try:
-        output_path = _compose_video_file(
-            voice_path, image_paths, "final_video.mp4", width=1920, height=1080, fps=24
-        )
-        return {"video_path": output_path, "error": None, "retry_count": 0}
+        profile, output_dir = _encode_profile(state), _output_dir(state)
+        stream = PipelineConfig.STREAM_UPLOAD and PipelineConfig.COMPOSITOR == "ffmpeg"
+        if PipelineConfig.STREAM_UPLOAD and not stream:
+            logger.info("Streaming upload needs the ffmpeg compositor; the video will be uploaded after rendering.")
+
+        def compose():
+            return _compose_video_file(
+                voice_path, image_paths, "final_video.mp4", width=1920, height=1080, fps=24,
+                profile=profile, output_dir=output_dir, fragmented=stream
+            )
+
+        if stream:
+            output_path = _compose_with_streaming_upload(state, compose, os.path.join(output_dir, "final_video.mp4"))
+        else:
+            output_path = compose()
+        return _node_success("video_composer", video_path=output_path)
     except Exception as e:
         logger.error(f"Video composition failed: {e}")
-        return {"error": str(e), "retry_count": state.get("retry_count", 0) + 1}
+        return _node_failure(state, "video_composer", str(e))
 
-def metadata_generator(state: VideoState) -> VideoState:
-    """Section 10.8: Generate metadata."""
+def _metadata_steps(state: VideoState):
     logger.info("--- Metadata Generator (Long) ---")
-    
     topic = state.get("topic")
     script = state.get("script")
-    
+
     if not topic or not script:
-        return {"error": "Missing topic or script for metadata generation."}
+        return _node_failure(state, "metadata_generator", "Missing topic or script for metadata generation.", PipelineConfig.MAX_RETRIES)
+    if _planned_metadata(state):
+        logger.info("Using metadata from the combined plan.")
+        return _node_success("metadata_generator")
 
     try:
-        llm = _get_llm()
-        
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", """You are a YouTube SEO expert. Generate metadata for a video based on the script.
-Return a valid JSON object with exactly these keys:
-- "title": A catchy video title (max 100 chars).
-- "description": A compelling video description (min 2 paragraphs).
-- "tags": A list of 10-15 relevant tags."""),
+        result = yield _Step(_invoke_chat, _ainvoke_chat, [
+            ("system", METADATA_PROMPT),
             ("user", "Topic: {topic}\n\nScript Preview: {script_preview}")
-        ])
-        
-        chain = prompt | llm | JsonOutputParser()
-        result = chain.invoke({
-            "topic": topic, 
+        ], {
+            "topic": topic,
             "script_preview": script[:2000]
-        })
-        
-        return {
-            "title": result.get("title"),
-            "description": result.get("description"),
-            "tags": result.get("tags"),
-            "error": None,
-            "retry_count": 0
-        }
-        
+        }, json_output=True)
+
+        return _node_success(
+            "metadata_generator",
+            title=result.get("title"),
+            description=result.get("description"),
+            tags=result.get("tags"),
+        )
+
     except Exception as e:
         return _handle_api_error(e, state, "metadata_generator")
 
-def thumbnail_generator(state: VideoState) -> VideoState:
-    """Section 10.8.5: Generate thumbnail. (Specific to Long-form)"""
+def metadata_generator(state: VideoState) -> VideoState:
+    """Section 10.8: Generate metadata."""
+    return _run_node(_metadata_steps(state))
+
+def _thumbnail_path(state: VideoState) -> str:
+    output_dir = _output_dir(state)
+    os.makedirs(output_dir, exist_ok=True)
+    return os.path.join(output_dir, "thumbnail.png")
+
+def _generate_thumbnail(state: VideoState, img_prompt: str) -> str:
+    return _generate_image(_get_openai_client(), img_prompt, "1792x1024", _thumbnail_path(state))
+
+async def _agenerate_thumbnail(state: VideoState, img_prompt: str) -> str:
+    path = await asyncio.to_thread(_thumbnail_path, state)
+    return await _agenerate_image(_get_async_openai_client(), img_prompt, "1792x1024", path)
+
+def _thumbnail_steps(state: VideoState):
     logger.info("--- Thumbnail Generator ---")
-    
     topic = state.get("topic")
     title = state.get("title") or topic
-    
+
     if not topic:
-        return {"error": "No topic provided for thumbnail."}
+        return _node_failure(state, "thumbnail_generator", "No topic provided for thumbnail.", PipelineConfig.MAX_RETRIES)
 
     try:
-        # 1. Generate Prompt (Custom logic, keep explicit)
-        llm = _get_llm()
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are a YouTube thumbnail designer. Create a detailed prompt for DALL-E 3 to generate a high-CTR thumbnail. Focus on visual elements, high contrast, and emotion. Do not include the prompt for text overlays, just the visual scene."),
+        # 1. Generate Prompt (Custom logic, keep explicit), unless the combined plan has one
+        img_prompt = state.get("thumbnail_prompt") or (yield _Step(_invoke_chat, _ainvoke_chat, [
+            ("system", THUMBNAIL_PROMPT),
             ("user", "Topic: {topic}\nVideo Title: {title}")
-        ])
-        chain = prompt | llm | StrOutputParser()
-        img_prompt = chain.invoke({"topic": topic, "title": title})
+        ], {"topic": topic, "title": title}))
 
         # 2. Generate Image (16:9)
-        client = OpenAI(max_retries=0)
-        os.makedirs("output", exist_ok=True)
-        
-        response = client.images.generate(
-            model="dall-e-3",
-            prompt=img_prompt,
-            size="1792x1024", # 16:9 aspect ratio
-            quality="standard",
-            n=1,
-            response_format="b64_json"
-        )
-        
-        image_data = base64.b64decode(response.data[0].b64_json)
-        output_path = os.path.join("output", "thumbnail.png")
-        with open(output_path, "wb") as f:
-            f.write(image_data)
-            
-        return {"thumbnail_path": output_path, "error": None, "retry_count": 0}
+        output_path = yield _Step(_generate_thumbnail, _agenerate_thumbnail, state, img_prompt)
+        return _node_success("thumbnail_generator", thumbnail_path=output_path)
     except Exception as e:
         return _handle_api_error(e, state, "thumbnail_generator")
 
+def thumbnail_generator(state: VideoState) -> VideoState:
+    """Section 10.8.5: Generate thumbnail. (Specific to Long-form)"""
+    return _run_node(_thumbnail_steps(state))
+
+def _video_body(title: Optional[str], description: Optional[str], tags: Optional[list]) -> dict:
+    """insert() body for a long-form video: private, Science & Technology."""
+    return {
+        "snippet": {
+            "title": title[:100] if title else "Untitled",
+            "description": description or "",
+            "tags": tags or [],
+            "categoryId": "28" # Science & Technology
+        },
+        "status": {
+            "privacyStatus": "private", # Default to private for safety
+            "selfDeclaredMadeForKids": False
+        }
+    }
+
+def _compose_with_streaming_upload(state: VideoState, compose, output_path: str) -> str:
+    """
+    Runs `compose` (which writes output_path as fragmented MP4) on a worker
+    thread while this thread uploads the growing file. The upload starts
+    before metadata exists, so it goes up with the topic as its title and
+    youtube_upload applies the real metadata. A failed upload is only logged:
+    the finished file stays on disk and youtube_upload sends it as usual.
+    """
+    if __package__:
+        from .streaming import GrowingFileUpload
+    else:
+        from streaming import GrowingFileUpload
+
+    # The upload must not pick up a previous attempt's file
+    if os.path.exists(output_path):
+        os.remove(output_path)
+    media = GrowingFileUpload(output_path)
+    response = None
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        future = metrics.submit(pool, compose)
+        future.add_done_callback(lambda f: media.finish(f.exception()))
+        try:
+            with get_breaker("youtube").guard():
+                response = _resumable_upload(
+                    _get_youtube_service(), output_path, _video_body(state.get("title") or state.get("topic"), None, None),
+                    None, label="streamed ", media=media
+                )
+        except Exception as e:
+            logger.warning(f"Streaming upload stopped ({e}); the video will be uploaded once rendered.")
+        output_path = future.result()
+
+    video_id = response.get("id") if response else None
+    if video_id:
+        get_ledger().record(state.get("run_id") or "", file_digest(output_path), "video", video_id)
+        logger.info(f"Streamed upload complete as {video_id}.")
+    return output_path
+
 def _get_youtube_service():
-    """Helper to authenticate and return YouTube service."""
-    SCOPES = ["https://www.googleapis.com/auth/youtube.upload"]
-    creds = None
-    
-    if os.path.exists("token.json"):
-        creds = Credentials.from_authorized_user_file("token.json", SCOPES)
-        
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            if not os.path.exists("client_secrets.json"):
-                raise FileNotFoundError("client_secrets.json not found.")
-                
-            flow = InstalledAppFlow.from_client_secrets_file(
-                "client_secrets.json", SCOPES
-            )
-            creds = flow.run_local_server(port=0)
-            
-        with open("token.json", "w") as token:
-            token.write(creds.to_json())
+    """Shared YouTube service; discovery and auth are paid once per process."""
+    return get_client_registry().youtube()
+
+def _upload_session_path(state: VideoState, node_name: str) -> str:
+    return os.path.join(_output_dir(state), f"{node_name}_session.json")
+
+def _load_upload_session(session_path: str, video_path: str) -> Optional[dict]:
+    """Saved resumable session for this exact file, or None if absent or stale."""
+    try:
+        with open(session_path) as f:
+            session = json.load(f)
+    except (OSError, ValueError):
+        return None
+    stat = os.stat(video_path)
+    if session.get("size") != stat.st_size or session.get("mtime_ns") != stat.st_mtime_ns:
+        # The video was re-rendered since; its old session can't be resumed
+        return None
+    return session
+
+def _save_upload_session(session_path: str, video_path: str, request) -> None:
+    stat = os.stat(video_path)
+    session = {
+        "uri": request.resumable_uri,
+        "progress": request.resumable_progress,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+    os.makedirs(os.path.dirname(session_path) or ".", exist_ok=True)
+    tmp_path = f"{session_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(session, f)
+    os.replace(tmp_path, session_path)
 
-    return build("youtube", "v3", credentials=creds)
+def _clear_upload_session(session_path: str) -> None:
+    try:
+        os.remove(session_path)
+    except FileNotFoundError:
+        pass
+
+def _query_upload_status(request, size: Optional[int]) -> Optional[dict]:
+    """
+    Asks YouTube how much of a resumable upload it holds ("bytes */size") and
+    moves `request` to that byte. Returns the video resource if the upload is
+    already complete; with every byte sent, a known `size` completes it.
+    """
+    from googleapiclient.errors import HttpError
+
+    headers = {"Content-Range": f"bytes */{size if size is not None else '*'}", "Content-Length": "0"}
+    resp, content = request.http.request(request.resumable_uri, "PUT", headers=headers)
+    if resp.status in (200, 201):
+        return request.postproc(resp, content)
+    if resp.status != 308:
+        raise HttpError(resp, content, uri=request.resumable_uri)
+    # No Range header means nothing was stored yet
+    request.resumable_progress = int(resp["range"].split("-")[1]) + 1 if "range" in resp else 0
+    if "location" in resp:
+        request.resumable_uri = resp["location"]
+    return None
+
+def _resumable_upload(service, video_path: str, body: dict, session_path: Optional[str], label: str = "",
+                      media=None) -> dict:
+    """
+    Uploads a video in UPLOAD_CHUNK_SIZE chunks. The resumable session URI and
+    the last acknowledged byte are saved to `session_path` as the upload goes,
+    so a retry or a restarted process continues that session instead of
+    sending the file again from byte zero. `media` replaces the file body
+    (e.g. a streaming.GrowingFileUpload); with no `session_path` nothing is saved.
+    """
+    from googleapiclient.errors import HttpError
+    from googleapiclient.http import MediaFileUpload
+
+    if media is None:
+        media = MediaFileUpload(video_path, chunksize=PipelineConfig.UPLOAD_CHUNK_SIZE, resumable=True, mimetype="video/mp4")
+    request = service.videos().insert(part="snippet,status", body=body, media_body=media)
+    get_rate_limiter().acquire("youtube")
+
+    session = _load_upload_session(session_path, video_path) if session_path else None
+    # A resumed session first asks the server for the last byte it actually received
+    needs_query = bool(session)
+    if session:
+        logger.info(f"Resuming {label}upload at byte {session['progress']} of {session['size']}")
+        request.resumable_uri = session["uri"]
+        request.resumable_progress = session["progress"]
+
+    start = time.perf_counter()
+    response = None
+    while response is None:
+        try:
+            # Also when every byte went up while the length was still unknown: "bytes */total" closes the upload
+            if request.resumable_uri and (needs_query or request.resumable_progress == media.size()):
+                needs_query = False
+                status, response = None, _query_upload_status(request, media.size())
+            else:
+                status, response = request.next_chunk()
+        except HttpError as e:
+            if session and e.resp.status in (404, 410):
+                # Session expired upstream; start a new one
+                logger.warning(f"Saved {label}upload session expired, restarting upload.")
+                _clear_upload_session(session_path)
+                session = None
+                request.resumable_uri = None
+                request.resumable_progress = 0
+                continue
+            if request.resumable_uri and session_path:
+                _save_upload_session(session_path, video_path, request)
+            raise
+        except Exception:
+            if request.resumable_uri and session_path:
+                _save_upload_session(session_path, video_path, request)
+            raise
+        if status:
+            if session_path:
+                _save_upload_session(session_path, video_path, request)
+            logger.info(f"Uploaded {label}{int(status.progress() * 100)}%")
+
+    if session_path:
+        _clear_upload_session(session_path)
+    metrics.record(api_calls=1, api_seconds=time.perf_counter() - start)
+    return response
+
+def _upload_video_once(state: VideoState, node_name: str, video_path: str, body: dict, label: str = "") -> tuple:
+    """
+    Uploads the video unless the ledger shows this run already uploaded the
+    same file. Returns (video_id, content_hash); the hash keys later steps.
+    """
+    run_id = state.get("run_id") or ""
+    content_hash = file_digest(video_path)
+    ledger = get_ledger()
+
+    video_id = ledger.get(run_id, content_hash, "video")
+    if video_id:
+        logger.info(f"{label}Video already uploaded as {video_id}, skipping upload.")
+        return video_id, content_hash
+
+    with get_breaker("youtube").guard():
+        response = _resumable_upload(
+            _get_youtube_service(), video_path, body, _upload_session_path(state, node_name), label=label
+        )
+    video_id = response.get("id")
+    if video_id:
+        ledger.record(run_id, content_hash, "video", video_id)
+        # The insert() body carried the final metadata
+        ledger.record(run_id, content_hash, "metadata", video_id)
+    return video_id, content_hash
 
 def youtube_upload(state: VideoState) -> VideoState:
     """Section 10.9: Upload long-form video."""
@@ -370,117 +1278,89 @@ def youtube_upload(state: VideoState) -> VideoState:
     thumbnail_path = state.get("thumbnail_path")
     
     if not video_path or not os.path.exists(video_path):
-        return {"error": "Video path missing or file not found."}
+        return _node_failure(state, "youtube_upload", "Video path missing or file not found.", PipelineConfig.MAX_RETRIES)
 
     try:
-        service = _get_youtube_service()
-        
-        body = {
-            "snippet": {
-                "title": title[:100] if title else "Untitled",
-                "description": description or "",
-                "tags": tags or [],
-                "categoryId": "28" # Science & Technology
-            },
-            "status": {
-                "privacyStatus": "private", # Default to private for safety
-                "selfDeclaredMadeForKids": False
-            }
-        }
+        body = _video_body(title, description, tags)
         
-        media = MediaFileUpload(video_path, chunksize=-1, resumable=True, mimetype="video/mp4")
-        
-        request = service.videos().insert(
-            part="snippet,status",
-            body=body,
-            media_body=media
-        )
-        
-        response = None
-        while response is None:
-            status, response = request.next_chunk()
-            if status:
-                logger.info(f"Uploaded {int(status.progress() * 100)}%")
-                
-        video_id = response.get('id')
+        video_id, content_hash = _upload_video_once(state, "youtube_upload", video_path, body)
         logger.info(f"Upload Complete! Video ID: {video_id}")
         
-        if video_id and thumbnail_path and os.path.exists(thumbnail_path):
+        ledger = get_ledger()
+        run_id = state.get("run_id") or ""
+        if video_id and not ledger.get(run_id, content_hash, "metadata"):
+            # Streamed during composition, before the metadata existed
+            logger.info("Applying metadata to streamed upload...")
+            with get_breaker("youtube").guard():
+                get_rate_limiter().acquire("youtube")
+                start = time.perf_counter()
+                _get_youtube_service().videos().update(
+                    part="snippet", body={"id": video_id, "snippet": body["snippet"]}
+                ).execute()
+            metrics.record(api_calls=1, api_seconds=time.perf_counter() - start)
+            ledger.record(run_id, content_hash, "metadata", video_id)
+
+        if video_id and thumbnail_path and os.path.exists(thumbnail_path) \
+                and not ledger.get(run_id, content_hash, "thumbnail"):
             logger.info("Uploading thumbnail...")
-            service.thumbnails().set(
-                videoId=video_id,
-                media_body=MediaFileUpload(thumbnail_path)
-            ).execute()
+            from googleapiclient.http import MediaFileUpload
+            with get_breaker("youtube").guard():
+                get_rate_limiter().acquire("youtube")
+                start = time.perf_counter()
+                _get_youtube_service().thumbnails().set(
+                    videoId=video_id,
+                    media_body=MediaFileUpload(thumbnail_path)
+                ).execute()
+            metrics.record(api_calls=1, api_seconds=time.perf_counter() - start)
+            ledger.record(run_id, content_hash, "thumbnail", video_id)
             
-        return {"upload_status": "success", "error": None, "retry_count": 0}
+        return _node_success("youtube_upload", upload_status="success")
         
     except Exception as e:
-        logger.error(f"YouTube upload failed: {e}")
-        return {"error": str(e), "retry_count": state.get("retry_count", 0) + 1}
+        return _handle_api_error(e, state, "youtube_upload")
 
 # --- Short Form Pipeline Nodes (Section 12) ---
 
-def short_script_generator(state: VideoState) -> VideoState:
-    """Section 12.3: Generate shorts script."""
+def _short_script_steps(state: VideoState):
     logger.info("--- Script Generator (Short) ---")
-    
     topic = state.get("topic")
     if not topic:
-        return {"error": "No topic provided."}
+        return _node_failure(state, "short_script_generator", "No topic provided.", PipelineConfig.MAX_RETRIES)
 
     try:
-        system_prompt = """You are an expert YouTube Shorts scriptwriter. Create a high-energy, viral script under 60 seconds.
-
-Structure:
-1. Hook (0-3s): Stop the scroll immediately.
-2. Value/Story (3-50s): Deliver the main point quickly and visually.
-3. CTA (50-60s): Quick call to action (Subscribe/Like).
-
-Format:
-- Keep sentences short.
-- Use [Visual] tags for visual cues.
-- Total word count should be around 130-150 words for normal speaking pace."""
-
-        script = _generate_script_content(topic, system_prompt)
-        return {"short_script": script, "error": None, "retry_count": 0}
+        if uses_derived_shorts(state) and state.get("script"):
+            script = yield _Step(_invoke_chat, _ainvoke_chat, _condense_messages(), {"topic": topic, "script": state["script"]})
+        else:
+            script = yield _Step(_generate_script_content, _agenerate_script_content, topic, SHORT_SCRIPT_PROMPT)
+        return _node_success("short_script_generator", short_script=script)
     except Exception as e:
         return _handle_api_error(e, state, "short_script_generator")
 
+def short_script_generator(state: VideoState) -> VideoState:
+    """Section 12.3: Generate shorts script."""
+    return _run_node(_short_script_steps(state))
+
+def _short_voice_steps(state: VideoState):
+    logger.info("--- Voice Generator (Short) ---")
+    return (yield from _voice_steps(state, "short_voice_generator", "short_script", "short_voice.mp3", "short_voice_path"))
+
 def short_voice_generator(state: VideoState) -> VideoState:
     """Implied by 12.4: TTS for shorts."""
-    logger.info("--- Voice Generator (Short) ---")
-    
-    script = state.get("short_script")
-    if not script:
-        return {"error": "No short script provided."}
+    return _run_node(_short_voice_steps(state))
 
-    try:
-        output_path = _generate_audio_file(script, "short_voice.mp3")
-        return {"short_voice_path": output_path, "error": None, "retry_count": 0}
-    except Exception as e:
-        return _handle_api_error(e, state, "short_voice_generator")
+def _short_asset_steps(state: VideoState):
+    logger.info("--- Asset Generator (Short) ---")
+    if uses_derived_shorts(state):
+        # Local image crops, no API calls; the async node runs them in a thread
+        return (yield _Step(_derive_short_assets, None, state))
+    return (yield from _asset_steps(
+        state, "short_asset_generator", "short_script", _short_asset_prompt(),
+        size="1024x1792", output_prefix="short_image", prompts_key="short_image_prompts", paths_key="short_image_paths"
+    ))
 
 def short_asset_generator(state: VideoState) -> VideoState:
     """Implied by 12.4: Assets for shorts."""
-    logger.info("--- Asset Generator (Short) ---")
-    
-    script = state.get("short_script")
-    if not script:
-        return {"error": "No short script provided."}
-
-    try:
-        system_prompt = """You are an AI visual director for YouTube Shorts. 
-Based on the provided video script, create exactly 3 distinct, detailed image generation prompts for DALL-E 3.
-The images will be generated in vertical format (9:16), so focus on central composition and verticality.
-One for the beginning, one for the middle, and one for the end.
-Return ONLY the 3 prompts, separated by newlines. Do not number them."""
-
-        prompts = _generate_image_prompts(script, system_prompt)
-        image_paths = _generate_images(prompts, "1024x1792", "short_image")
-        return {"short_image_paths": image_paths, "error": None, "retry_count": 0}
-
-    except Exception as e:
-        return _handle_api_error(e, state, "short_asset_generator")
+    return _run_node(_short_asset_steps(state))
 
 def short_video_composer(state: VideoState) -> VideoState:
     """Section 12.4: Compose shorts video (9:16)."""
@@ -490,16 +1370,17 @@ def short_video_composer(state: VideoState) -> VideoState:
     image_paths = state.get("short_image_paths")
     
     if not voice_path or not image_paths:
-        return {"error": "Missing voice or images for shorts composition."}
+        return _node_failure(state, "short_video_composer", "Missing voice or images for shorts composition.", PipelineConfig.MAX_RETRIES)
         
     try:
         output_path = _compose_video_file(
-            voice_path, image_paths, "short_video.mp4", width=1080, height=1920, fps=30
+            voice_path, image_paths, "short_video.mp4", width=1080, height=1920, fps=30,
+            profile=_encode_profile(state), output_dir=_output_dir(state)
         )
-        return {"short_video_path": output_path, "error": None, "retry_count": 0}
+        return _node_success("short_video_composer", short_video_path=output_path)
     except Exception as e:
         logger.error(f"Short video composition failed: {e}")
-        return {"error": str(e), "retry_count": state.get("retry_count", 0) + 1}
+        return _node_failure(state, "short_video_composer", str(e))
 
 def short_metadata_generator(state: VideoState) -> VideoState:
     """Section 12.5: Shorts metadata."""
@@ -520,11 +1401,9 @@ def short_youtube_upload(state: VideoState) -> VideoState:
     tags = state.get("short_tags")
     
     if not video_path or not os.path.exists(video_path):
-        return {"error": "Short video path missing or file not found."}
+        return _node_failure(state, "short_youtube_upload", "Short video path missing or file not found.", PipelineConfig.MAX_RETRIES)
 
     try:
-        service = _get_youtube_service()
-        
         body = {
             "snippet": {
                 "title": title[:100] if title else "Untitled Short",
@@ -538,23 +1417,49 @@ def short_youtube_upload(state: VideoState) -> VideoState:
             }
         }
         
-        media = MediaFileUpload(video_path, chunksize=-1, resumable=True, mimetype="video/mp4")
-        
-        request = service.videos().insert(
-            part="snippet,status",
-            body=body,
-            media_body=media
-        )
-        
-        response = None
-        while response is None:
-            status, response = request.next_chunk()
-            if status:
-                logger.info(f"Uploaded Short {int(status.progress() * 100)}%")
-                
-        logger.info(f"Short Upload Complete! Video ID: {response.get('id')}")
-        return {"short_upload_status": "success", "error": None, "retry_count": 0}
+        video_id, _ = _upload_video_once(state, "short_youtube_upload", video_path, body, label="Short ")
+        logger.info(f"Short Upload Complete! Video ID: {video_id}")
+        return _node_success("short_youtube_upload", short_upload_status="success")
         
     except Exception as e:
-        logger.error(f"YouTube short upload failed: {e}")
-        return {"error": str(e), "retry_count": state.get("retry_count", 0) + 1}
\ No newline at end of file
+        return _handle_api_error(e, state, "short_youtube_upload")
+
+# --- Async Node Implementations ---
+# Variants of the API-bound nodes for app.ainvoke, which main.run_batch_async
+# runs for every topic of an --async batch on one event loop (see graph.py).
+# They share their sync counterpart's steps but await the OpenAI calls and
+# run cache and file I/O in threads, so one process can keep many runs in
+# flight. Composition and the YouTube upload have no async counterpart:
+# LangGraph runs those sync nodes in its executor.
+
+async def ascript_generator(state: VideoState) -> VideoState:
+    """Section 10.4: Generate long-form script. Async variant of script_generator."""
+    return await _arun_node(_script_steps(state))
+
+async def avoice_generator(state: VideoState) -> VideoState:
+    """Section 10.5: TTS for long-form. Async variant of voice_generator."""
+    return await _arun_node(_long_voice_steps(state))
+
+async def aasset_generator(state: VideoState) -> VideoState:
+    """Section 10.6: Visual assets for long-form. Async variant of asset_generator."""
+    return await _arun_node(_long_asset_steps(state))
+
+async def ametadata_generator(state: VideoState) -> VideoState:
+    """Section 10.8: Generate metadata. Async variant of metadata_generator."""
+    return await _arun_node(_metadata_steps(state))
+
+async def athumbnail_generator(state: VideoState) -> VideoState:
+    """Section 10.8.5: Generate thumbnail. Async variant of thumbnail_generator."""
+    return await _arun_node(_thumbnail_steps(state))
+
+async def ashort_script_generator(state: VideoState) -> VideoState:
+    """Section 12.3: Generate shorts script. Async variant of short_script_generator."""
+    return await _arun_node(_short_script_steps(state))
+
+async def ashort_voice_generator(state: VideoState) -> VideoState:
+    """Implied by 12.4: TTS for shorts. Async variant of short_voice_generator."""
+    return await _arun_node(_short_voice_steps(state))
+
+async def ashort_asset_generator(state: VideoState) -> VideoState:
+    """Implied by 12.4: Assets for shorts. Async variant of short_asset_generator."""
+    return await _arun_node(_short_asset_steps(state))
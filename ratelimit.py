@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+if __package__:
+    from .config import PipelineConfig
+else:
+    from config import PipelineConfig
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """
+    Rate limiting interface. This base class never waits and is used when
+    rate limiting is disabled; subclass it to plug in another backend.
+    """
+
+    def acquire(self, endpoint: str, tokens: int = 0) -> float:
+        """Blocks until one request (and `tokens` tokens) fit the endpoint's budget. Returns seconds waited."""
+        return 0.0
+
+    async def aacquire(self, endpoint: str, tokens: int = 0) -> float:
+        """acquire() for the async nodes: waits without blocking the event loop."""
+        return 0.0
+
+    def adjust(self, endpoint: str, tokens: int) -> None:
+        """Charges (or, if negative, refunds) tokens once a call's actual usage is known."""
+
+
+class TokenBucketLimiter(RateLimiter):
+    """
+    Token buckets for requests-per-minute and tokens-per-minute budgets,
+    stored in a SQLite database so every thread and every process on the
+    host draws from the same buckets. Each acquire reserves its share in one
+    short write transaction (the bucket may go negative) and then sleeps
+    off the deficit, so callers are served in arrival order and throughput
+    settles at the configured ceiling instead of bouncing off 429s.
+    """
+
+    def __init__(self, path: str, limits: Dict[str, Dict[str, Optional[int]]], burst_seconds: Optional[float] = None,
+                 clock: Callable[[], float] = time.time, sleep: Callable[[float], None] = time.sleep,
+                 asleep: Callable[[float], Awaitable[None]] = asyncio.sleep):
+        self.path = path
+        self.limits = limits
+        self.burst_seconds = burst_seconds
+        self._clock = clock
+        self._sleep = sleep
+        self._asleep = asleep
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        # Autocommit mode so transactions are managed explicitly below
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, level REAL NOT NULL, updated REAL NOT NULL)"
+            )
+
+    def _reserve(self, charges: Dict[str, tuple]) -> float:
+        """
+        Takes `amount` from each named bucket, refilled at `per_minute`, and
+        returns how long the caller must wait for the most indebted bucket.
+        """
+        wait = 0.0
+        with self._lock:
+            # BEGIN IMMEDIATE takes the write lock up front, serializing processes
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = self._clock()
+                for name, (amount, per_minute) in charges.items():
+                    rate = per_minute / 60.0
+                    # A full minute's budget unless burst smoothing is configured
+                    capacity = max(1.0, rate * (self.burst_seconds or 60.0))
+                    row = self._conn.execute("SELECT level, updated FROM buckets WHERE name = ?", (name,)).fetchone()
+                    level, updated = row if row else (capacity, now)
+                    level = min(capacity, min(capacity, level + max(0.0, now - updated) * rate) - amount)
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO buckets (name, level, updated) VALUES (?, ?, ?)", (name, level, now)
+                    )
+                    if level < 0:
+                        wait = max(wait, -level / rate)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return wait
+
+    def _charges(self, endpoint: str, tokens: int) -> Dict[str, tuple]:
+        limits = self.limits.get(endpoint) or {}
+        charges = {}
+        if limits.get("rpm"):
+            charges[f"{endpoint}:requests"] = (1, limits["rpm"])
+        if limits.get("tpm") and tokens:
+            charges[f"{endpoint}:tokens"] = (tokens, limits["tpm"])
+        return charges
+
+    def acquire(self, endpoint: str, tokens: int = 0) -> float:
+        charges = self._charges(endpoint, tokens)
+        if not charges:
+            return 0.0
+
+        wait = self._reserve(charges)
+        if wait > 0:
+            logger.debug(f"Rate limit: waiting {wait:.2f}s for {endpoint}")
+            self._sleep(wait)
+        return wait
+
+    async def aacquire(self, endpoint: str, tokens: int = 0) -> float:
+        charges = self._charges(endpoint, tokens)
+        if not charges:
+            return 0.0
+
+        # The reservation can block on another process's write lock, so it runs off the event loop
+        wait = await asyncio.to_thread(self._reserve, charges)
+        if wait > 0:
+            logger.debug(f"Rate limit: waiting {wait:.2f}s for {endpoint}")
+            await self._asleep(wait)
+        return wait
+
+    def adjust(self, endpoint: str, tokens: int) -> None:
+        tpm = (self.limits.get(endpoint) or {}).get("tpm")
+        if tpm and tokens:
+            self._reserve({f"{endpoint}:tokens": (tokens, tpm)})
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_limiter_override: Optional[RateLimiter] = None
+_bucket_limiter: Optional[TokenBucketLimiter] = None
+_bucket_limiter_lock = threading.Lock()
+
+
+def set_rate_limiter(limiter: Optional[RateLimiter]) -> None:
+    """Installs a custom rate limiter. Pass None to restore the default."""
+    global _limiter_override
+    _limiter_override = limiter
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Returns the active limiter: a custom one if installed, the shared
+    token-bucket limiter if PipelineConfig.RATE_LIMIT_ENABLED, otherwise
+    one that never waits.
+    """
+    global _bucket_limiter
+    if _limiter_override is not None:
+        return _limiter_override
+    if not PipelineConfig.RATE_LIMIT_ENABLED:
+        return RateLimiter()
+    with _bucket_limiter_lock:
+        if _bucket_limiter is None or _bucket_limiter.path != PipelineConfig.RATE_LIMIT_DB:
+            _bucket_limiter = TokenBucketLimiter(
+                PipelineConfig.RATE_LIMIT_DB,
+                limits=PipelineConfig.RATE_LIMITS,
+                burst_seconds=PipelineConfig.RATE_LIMIT_BURST_SECONDS,
+            )
+        return _bucket_limiter
@@ -1,35 +1,60 @@
-from typing import TypedDict, Optional, List, Literal, Annotated
+from typing import TypedDict, Optional, List, Dict, Literal, Annotated
 
 def replace_reducer(a, b):
     return b
 
+def merge_reducer(a, b):
+    """Merges per-node dict updates so parallel branches can write side by side."""
+    return {**(a or {}), **(b or {})}
+
 class VideoState(TypedDict):
     # Inputs
     topic: str
+    run_id: Optional[str]
+    # Workspace for this run's artifacts (e.g. output/<run_id>/)
+    output_dir: Optional[str]
     
     # Control Flow
     content_type: Literal["short", "long", "both"]
-    retry_count: int
+    encode_profile: Optional[str]
+    # Last-writer-wins across parallel nodes, like `error`; read node_retries instead
+    retry_count: Annotated[int, replace_reducer]
+    # Per-node error/retry slots, keyed by node name. Parallel nodes
+    # (e.g. voice_generator and asset_generator) each own their entry.
+    node_errors: Annotated[Dict[str, Optional[str]], merge_reducer]
+    node_retries: Annotated[Dict[str, int], merge_reducer]
+    # Seconds the retry edge waits before re-running a failed node
+    retry_delays: Annotated[Dict[str, float], merge_reducer]
     
     # Long-form Artifacts
     script: Optional[str]
     voice_path: Optional[str]
+    image_prompts: Optional[List[str]]
     image_paths: Optional[List[str]]
     video_path: Optional[str]
     title: Optional[str]
     description: Optional[str]
     tags: Optional[List[str]]
+    # Set by the combined planning call (PipelineConfig.COMBINED_PLANNING)
+    thumbnail_prompt: Optional[str]
     thumbnail_path: Optional[str]
     upload_status: Optional[str]
     
     # Short-form Artifacts
     short_script: Optional[str]
     short_voice_path: Optional[str]
+    short_image_prompts: Optional[List[str]]
     short_image_paths: Optional[List[str]]
     short_video_path: Optional[str]
     short_title: Optional[str]
     short_tags: Optional[List[str]]
     short_upload_status: Optional[str]
     
+    # Images already written to disk, keyed by file stem (e.g. "image_0",
+    # "short_image_2"), so a retried asset node only regenerates missing ones.
+    generated_images: Annotated[Dict[str, str], merge_reducer]
+
     # Common
-    error: Annotated[Optional[str], replace_reducer]
\ No newline at end of file
+    # Error of whichever node wrote last. Parallel branches overwrite each
+    # other here, so reports and routing read node_errors instead.
+    error: Annotated[Optional[str], replace_reducer]
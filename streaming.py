@@ -0,0 +1,82 @@
+import os
+import threading
+from typing import Optional
+
+from googleapiclient.http import MediaUpload
+
+if __package__:
+    from .config import PipelineConfig
+else:
+    from config import PipelineConfig
+
+
+class GrowingFileUpload(MediaUpload):
+    """
+    Resumable upload body for a file that is still being written front to
+    back (compositor.stream_slideshow). Chunks are handed out as soon as the
+    file has grown past them; the total size stays unknown until the writer
+    calls finish(), so the last chunk is the one that closes the upload.
+    """
+
+    def __init__(self, path: str, mimetype: str = "video/mp4", chunksize: Optional[int] = None,
+                 poll_interval: float = 0.1):
+        self._path = path
+        self._mimetype = mimetype
+        self._chunksize = chunksize or PipelineConfig.UPLOAD_CHUNK_SIZE
+        self._poll_interval = poll_interval
+        self._cond = threading.Condition()
+        self._done = False
+        self._error: Optional[BaseException] = None
+        self._size: Optional[int] = None
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        """Marks the file complete (its size becomes final) or, given an error, abandons the upload."""
+        with self._cond:
+            self._done = True
+            self._error = error
+            if error is None:
+                self._size = os.path.getsize(self._path)
+            self._cond.notify_all()
+
+    def _available(self) -> int:
+        try:
+            return os.path.getsize(self._path)
+        except FileNotFoundError:
+            return 0
+
+    def chunksize(self) -> int:
+        return self._chunksize
+
+    def mimetype(self) -> str:
+        return self._mimetype
+
+    def size(self) -> Optional[int]:
+        with self._cond:
+            return self._size
+
+    def resumable(self) -> bool:
+        return True
+
+    def has_stream(self) -> bool:
+        return False
+
+    def stream(self):
+        return None
+
+    def getbytes(self, begin: int, length: int) -> bytes:
+        """
+        Blocks until the file has grown past `begin + length`, or returns what
+        is left once it is done. A chunk ending exactly at the current end of
+        file waits too: the file may be complete, and only a short read (or
+        the known size) tells the server the upload is over.
+        """
+        with self._cond:
+            while True:
+                if self._error is not None:
+                    raise RuntimeError(f"Encoding of {self._path} failed; upload abandoned.") from self._error
+                if self._done or self._available() > begin + length:
+                    break
+                self._cond.wait(self._poll_interval)
+        with open(self._path, "rb") as f:
+            f.seek(begin)
+            return f.read(length)
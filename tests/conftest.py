@@ -13,4 +13,53 @@ def default_state():
         "content_type": "long",
         "retry_count": 0,
         "error": None
-    }
\ No newline at end of file
+    }
+
+@pytest.fixture(autouse=True)
+def isolated_output_root(tmp_path, monkeypatch):
+    """Keeps run workspaces (output/<run_id>/) out of the working tree."""
+    from config import PipelineConfig
+    monkeypatch.setattr(PipelineConfig, "OUTPUT_ROOT", str(tmp_path / "output"))
+
+
+@pytest.fixture(autouse=True)
+def disable_response_cache(monkeypatch):
+    """Keeps tests from reading or writing the on-disk response cache."""
+    from config import PipelineConfig
+    monkeypatch.setattr(PipelineConfig, "CACHE_ENABLED", False)
+
+
+@pytest.fixture(autouse=True)
+def disable_rate_limits(monkeypatch):
+    """Keeps tests from sharing (and waiting on) the host-wide rate limit buckets."""
+    from config import PipelineConfig
+    monkeypatch.setattr(PipelineConfig, "RATE_LIMIT_ENABLED", False)
+
+
+@pytest.fixture(autouse=True)
+def fresh_client_registry():
+    """Gives each test its own client registry, so patched client classes take effect."""
+    from clients import set_client_registry
+    set_client_registry(None)
+    yield
+    set_client_registry(None)
+
+
+@pytest.fixture(autouse=True)
+def isolated_upload_ledger(tmp_path, monkeypatch):
+    """Points the upload ledger at a per-test database."""
+    from config import PipelineConfig
+    from ledger import set_ledger
+    monkeypatch.setattr(PipelineConfig, "UPLOAD_LEDGER_DB", str(tmp_path / "uploads.sqlite"))
+    set_ledger(None)
+    yield
+    set_ledger(None)
+
+
+@pytest.fixture(autouse=True)
+def closed_circuits():
+    """Starts every test with all upstream circuits closed."""
+    from breaker import reset_breakers
+    reset_breakers()
+    yield
+    reset_breakers()
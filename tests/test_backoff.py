@@ -0,0 +1,55 @@
+import email.utils
+import time
+import httpx
+import openai
+import pytest
+from unittest.mock import patch
+from googleapiclient.errors import HttpError
+from httplib2 import Response
+from config import PipelineConfig
+from backoff import backoff_delay, error_class, retry_after_seconds
+
+def _openai_error(status, headers=None):
+    request = httpx.Request("POST", "https://api.openai.com/v1/audio/speech")
+    response = httpx.Response(status, headers=headers or {}, request=request)
+    return openai.APIStatusError("error", response=response, body=None)
+
+def _google_error(status, headers=None, content=b""):
+    return HttpError(Response({"status": status, **(headers or {})}), content)
+
+def test_error_classes():
+    """Test that errors map to their retry policies."""
+    assert error_class(_openai_error(429)) == "rate_limit"
+    assert error_class(_google_error(429)) == "rate_limit"
+    assert error_class(_google_error(403, content=b'{"reason": "rateLimitExceeded"}')) == "rate_limit"
+    assert error_class(_openai_error(503)) == "server"
+    assert error_class(_google_error(500)) == "server"
+    assert error_class(ConnectionResetError()) == "network"
+    assert error_class(ValueError("bad")) == "default"
+
+def test_retry_after_header_forms():
+    """Test that delta-seconds, milliseconds and HTTP-date forms are understood."""
+    assert retry_after_seconds(_openai_error(429, {"retry-after": "7"})) == 7.0
+    assert retry_after_seconds(_openai_error(429, {"retry-after-ms": "1500"})) == 1.5
+    assert retry_after_seconds(_google_error(429, {"retry-after": "3"})) == 3.0
+
+    date = email.utils.formatdate(time.time() + 30, usegmt=True)
+    assert 25 < retry_after_seconds(_openai_error(429, {"retry-after": date})) <= 30
+
+    assert retry_after_seconds(_openai_error(429)) is None
+    assert retry_after_seconds(ValueError("bad")) is None
+
+def test_backoff_honours_retry_after_with_cap():
+    """Test that the server's Retry-After wins, up to the policy's cap."""
+    cap = PipelineConfig.RETRY_POLICIES["rate_limit"]["max"]
+    assert backoff_delay(_openai_error(429, {"retry-after": "7"}), attempt=1) == 7.0
+    assert backoff_delay(_openai_error(429, {"retry-after": str(cap * 10)}), attempt=1) == cap
+
+@pytest.mark.parametrize("attempt", [1, 2, 3, 10])
+def test_backoff_exponential_with_jitter(attempt, monkeypatch):
+    """Test that delays are jittered within an exponentially growing, capped window."""
+    monkeypatch.setitem(PipelineConfig.RETRY_POLICIES, "server", {"base": 1.0, "max": 5.0})
+    ceiling = min(5.0, 2 ** (attempt - 1))
+    with patch("backoff.random.uniform", side_effect=lambda low, high: high) as mock_uniform:
+        assert backoff_delay(_openai_error(500), attempt) == ceiling
+    mock_uniform.assert_called_once_with(0, ceiling)
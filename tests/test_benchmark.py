@@ -0,0 +1,100 @@
+import json
+import os
+import subprocess
+import sys
+import urllib.error
+import urllib.request
+
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "benchmarks"))
+
+from fake_apis import FakeOpenAI, FakeYouTube, FaultProfile  # noqa: E402
+from run import percentile  # noqa: E402
+
+
+def _post(url, payload, headers=None):
+    request = urllib.request.Request(url, data=json.dumps(payload).encode(), method="POST",
+                                     headers={"Content-Type": "application/json", **(headers or {})})
+    return urllib.request.urlopen(request)
+
+
+def test_percentile_nearest_rank():
+    """Test p50/p95 over node timings."""
+    values = [float(v) for v in range(1, 21)]
+    assert percentile(values, 50) == 10.0
+    assert percentile(values, 95) == 19.0
+    assert percentile([3.0], 95) == 3.0
+    assert percentile([], 50) == 0.0
+
+
+def test_fake_openai_chat_replies_follow_the_prompt():
+    """Test that the fake chat endpoint answers image, metadata and script prompts in the expected shape."""
+    with FakeOpenAI(FaultProfile(), long_script_words=60) as server:
+        def chat(system):
+            body = _post(f"{server.url}/v1/chat/completions",
+                         {"model": "gpt-4o", "messages": [{"role": "system", "content": system},
+                                                          {"role": "user", "content": "topic"}]}).read()
+            return json.loads(body)
+
+        reply = chat("Write exactly 3 image generation prompts, one per line.")
+        assert len(reply["choices"][0]["message"]["content"].splitlines()) == 3
+        assert reply["usage"]["completion_tokens"] > 0
+
+        metadata = json.loads(chat("Return JSON with title, description and tags.")["choices"][0]["message"]["content"])
+        assert set(metadata) == {"title", "description", "tags"}
+
+        script = chat("You are a YouTube scriptwriter.")["choices"][0]["message"]["content"]
+        assert 40 <= len(script.split()) <= 60
+
+
+def test_fake_apis_inject_errors():
+    """Test that an endpoint with error rate 1 always fails with 503."""
+    faults = FaultProfile(error_rate={"images": 1.0})
+    with FakeOpenAI(faults) as server:
+        with pytest.raises(urllib.error.HTTPError) as excinfo:
+            _post(f"{server.url}/v1/images/generations", {"prompt": "x", "size": "1024x1024"})
+        assert excinfo.value.code == 503
+
+
+def test_fake_youtube_resumable_upload():
+    """Test the fake upload protocol: start a session, send chunks, get a video ID on the last one."""
+    with FakeYouTube(FaultProfile()) as server:
+        start = _post(f"{server.url}/upload/youtube/v3/videos?uploadType=resumable&part=snippet",
+                      {"snippet": {}}, headers={"X-Upload-Content-Length": "6"})
+        session_url = start.headers["Location"]
+
+        def put(data, content_range):
+            request = urllib.request.Request(session_url, data=data, method="PUT",
+                                             headers={"Content-Range": content_range})
+            try:
+                return urllib.request.urlopen(request)
+            except urllib.error.HTTPError as e:
+                return e
+
+        partial = put(b"abc", "bytes 0-2/6")
+        assert partial.code == 308
+        assert partial.headers["Range"] == "bytes=0-2"
+
+        done = put(b"def", "bytes 3-5/6")
+        video_id = json.loads(done.read())["id"]
+        assert server.videos == {video_id: 6}
+
+
+def test_benchmark_short_run_end_to_end(tmp_path):
+    """Test a one-run benchmark of the real graph against the fake servers."""
+    pytest.importorskip("imageio_ffmpeg")
+    out = tmp_path / "results.json"
+    subprocess.run(
+        [sys.executable, os.path.join(PROJECT_ROOT, "benchmarks", "run.py"),
+         "--mode", "short", "--runs", "1", "--workers", "1", "--latency", "0", "--json", str(out)],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True, timeout=600,
+    )
+    [result] = json.loads(out.read_text())
+
+    assert result["succeeded"] == 1
+    assert result["uploads"] == 1
+    assert result["composer_fps"] > 0
+    assert result["peak_rss_mb"] > 0
+    assert {"short_script_generator", "short_video_composer", "short_youtube_upload"} <= set(result["nodes"])
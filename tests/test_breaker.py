@@ -0,0 +1,133 @@
+import asyncio
+import threading
+import httpx
+import openai
+import pytest
+from googleapiclient.errors import HttpError
+from httplib2 import Response
+from breaker import CircuitBreaker, CircuitOpenError, get_breaker, trips_circuit
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def _openai_error(status, message="error"):
+    response = httpx.Response(status, request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"))
+    return openai.APIStatusError(message, response=response, body=None)
+
+QUOTA = _openai_error(429, "You exceeded your current quota: insufficient_quota")
+
+def _fail(breaker, error):
+    with pytest.raises(type(error)):
+        with breaker.guard():
+            raise error
+
+def test_trip_signals():
+    """Test that only quota and auth failures trip a circuit."""
+    assert trips_circuit(QUOTA)
+    assert trips_circuit(_openai_error(401))
+    assert trips_circuit(_openai_error(403))
+    assert trips_circuit(HttpError(Response({"status": 403}), b'{"reason": "quotaExceeded"}'))
+    assert trips_circuit(HttpError(Response({"status": 401}), b""))
+
+    assert not trips_circuit(_openai_error(429, "Rate limit reached"))
+    assert not trips_circuit(_openai_error(500))
+    assert not trips_circuit(HttpError(Response({"status": 403}), b'{"reason": "rateLimitExceeded"}'))
+    assert not trips_circuit(ValueError("bad"))
+
+def test_open_circuit_fails_fast():
+    """Test that a tripped circuit rejects calls without making them."""
+    breaker = CircuitBreaker("chat", cooldown=60, clock=FakeClock())
+    _fail(breaker, QUOTA)
+    assert breaker.is_open
+
+    calls = []
+    with pytest.raises(CircuitOpenError, match="chat circuit open"):
+        with breaker.guard():
+            calls.append(1)
+    assert calls == []
+
+def test_transient_errors_keep_circuit_closed():
+    breaker = CircuitBreaker("tts", cooldown=60, clock=FakeClock())
+    _fail(breaker, _openai_error(500))
+    _fail(breaker, _openai_error(429, "Rate limit reached"))
+    assert not breaker.is_open
+
+def test_probe_after_cooldown_closes_circuit():
+    """Test that one probe is let through after the cool-down and closes the circuit on success."""
+    clock = FakeClock()
+    breaker = CircuitBreaker("images", cooldown=60, clock=clock)
+    _fail(breaker, QUOTA)
+
+    clock.now = 59
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    clock.now = 61
+    with breaker.guard():
+        pass
+    assert not breaker.is_open
+
+def test_failed_probe_reopens_circuit():
+    clock = FakeClock()
+    breaker = CircuitBreaker("youtube", cooldown=60, clock=clock)
+    _fail(breaker, QUOTA)
+    clock.now = 61
+    _fail(breaker, QUOTA)
+
+    # The cool-down restarts from the failed probe
+    clock.now = 100
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+def test_cancelled_probe_releases_the_probe_slot():
+    """Test that a probe cancelled mid-call lets the next caller probe instead of keeping the circuit open."""
+    clock = FakeClock()
+    breaker = CircuitBreaker("chat", cooldown=60, clock=clock)
+    _fail(breaker, QUOTA)
+    clock.now = 61
+
+    async def probe():
+        with breaker.guard():
+            await asyncio.sleep(10)
+
+    async def cancel_probe():
+        task = asyncio.create_task(probe())
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_probe())
+    with breaker.guard():
+        pass
+    assert not breaker.is_open
+
+def test_single_probe_while_others_fail_fast():
+    """Test that concurrent callers don't all probe a recovering upstream at once."""
+    clock = FakeClock()
+    breaker = CircuitBreaker("chat", cooldown=60, clock=clock)
+    _fail(breaker, QUOTA)
+    clock.now = 61
+
+    results = []
+    def call():
+        try:
+            breaker.before_call()
+            results.append("probe")
+        except CircuitOpenError:
+            results.append("rejected")
+
+    threads = [threading.Thread(target=call) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(results) == ["probe"] + ["rejected"] * 4
+
+def test_breakers_shared_per_upstream():
+    assert get_breaker("chat") is get_breaker("chat")
+    assert get_breaker("chat") is not get_breaker("tts")
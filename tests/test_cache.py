@@ -0,0 +1,144 @@
+import os
+import time
+from unittest.mock import patch, MagicMock
+from cache import cache_key, get_cache, set_cache, DiskCache
+from nodes import _invoke_chat, _generate_image
+
+def test_cache_key_is_content_addressed():
+    """Test that identical requests share a key and any change produces a new one."""
+    key = cache_key("chat", model="gpt-4o", temperature=0.7, prompt="Hello")
+    assert key == cache_key("chat", prompt="Hello", temperature=0.7, model="gpt-4o")
+    assert key != cache_key("chat", model="gpt-4o", temperature=0.2, prompt="Hello")
+    assert key != cache_key("tts", model="gpt-4o", temperature=0.7, prompt="Hello")
+
+def test_disk_cache_roundtrip(tmp_path):
+    """Test storing and reading back bytes and JSON values."""
+    cache = DiskCache(str(tmp_path), max_bytes=1024, max_age=60)
+    cache.put("ab" * 32, b"audio")
+    cache.put_json("cd" * 32, {"title": "T"})
+
+    assert cache.get("ab" * 32) == b"audio"
+    assert cache.get_json("cd" * 32) == {"title": "T"}
+    assert cache.get("ef" * 32) is None
+
+def test_disk_cache_evicts_expired_entries(tmp_path):
+    """Test that entries past max_age are treated as misses and removed."""
+    cache = DiskCache(str(tmp_path), max_bytes=1024, max_age=60)
+    key = "ab" * 32
+    cache.put(key, b"stale")
+    old = time.time() - 120
+    os.utime(cache._path(key), (old, old))
+
+    assert cache.get(key) is None
+    assert not os.path.exists(cache._path(key))
+
+def test_disk_cache_evicts_least_recently_used_over_size(tmp_path):
+    """Test that the oldest entries are evicted once max_bytes is exceeded."""
+    cache = DiskCache(str(tmp_path), max_bytes=10, max_age=60)
+    first, second, third = "aa" * 32, "bb" * 32, "cc" * 32
+    cache.put(first, b"12345")
+    os.utime(cache._path(first), (time.time() - 10, time.time() - 10))
+    cache.put(second, b"12345")
+    cache.put(third, b"12345")
+
+    assert cache.get(first) is None
+    assert cache.get(second) == b"12345"
+    assert cache.get(third) == b"12345"
+
+def test_disk_cache_put_does_not_walk_the_cache(tmp_path):
+    """Test that puts keep a running size instead of rescanning the directory every time."""
+    cache = DiskCache(str(tmp_path), max_bytes=12, max_age=60, rescan_every=100)
+    keys = [c * 64 for c in "abcde"]
+    with patch("cache.os.walk", wraps=os.walk) as mock_walk:
+        for key in keys:
+            cache.put(key, b"12345")
+        assert mock_walk.call_count == 1
+
+    # Only the two most recently used entries fit in 12 bytes
+    assert [cache.get(key) for key in keys] == [None, None, None, b"12345", b"12345"]
+
+def test_disk_cache_put_is_best_effort(tmp_path):
+    """Test that a failed cache write is logged and skipped instead of failing the paid-for call."""
+    cache = DiskCache(str(tmp_path), max_bytes=1024, max_age=60)
+    with patch("cache.os.replace", side_effect=OSError(28, "No space left on device")):
+        cache.put("ab" * 32, b"audio")
+
+    assert cache.get("ab" * 32) is None
+    assert not [name for _, _, files in os.walk(tmp_path) for name in files]
+
+def test_disk_cache_scan_skips_entries_being_written(tmp_path):
+    """Test that a rescan neither counts nor deletes another writer's temp file, even when it looks expired."""
+    cache = DiskCache(str(tmp_path), max_bytes=1024, max_age=60)
+    in_flight = tmp_path / "ab" / "tmpwriter.tmp"
+    in_flight.parent.mkdir()
+    in_flight.write_bytes(b"x" * 2048)
+    old = time.time() - 120
+    os.utime(in_flight, (old, old))
+
+    cache.evict()
+    cache.put("ab" * 32, b"audio")
+
+    assert in_flight.exists()
+    assert cache.get("ab" * 32) == b"audio"
+
+def test_disk_cache_scan_tolerates_concurrent_removal(tmp_path):
+    """Test that an expired entry removed by another process mid-scan is not an error."""
+    cache = DiskCache(str(tmp_path), max_bytes=1024, max_age=60)
+    cache.put("ab" * 32, b"stale")
+    old = time.time() - 120
+    os.utime(cache._path("ab" * 32), (old, old))
+
+    with patch("cache.os.remove", side_effect=FileNotFoundError):
+        cache.evict()
+
+def test_get_cache_bypass():
+    """Test that disabling the cache yields a no-op backend."""
+    # conftest disables the cache for every test
+    cache = get_cache()
+    cache.put("ab" * 32, b"data")
+    assert cache.get("ab" * 32) is None
+
+def test_set_cache_plugs_in_backend(tmp_path):
+    """Test that a custom backend replaces the default one."""
+    backend = DiskCache(str(tmp_path), max_bytes=1024, max_age=60)
+    set_cache(backend)
+    try:
+        assert get_cache() is backend
+    finally:
+        set_cache(None)
+
+@patch("nodes.ChatPromptTemplate")
+@patch("langchain_openai.ChatOpenAI")
+@patch("nodes.StrOutputParser")
+def test_invoke_chat_uses_cache(mock_parser, mock_chat, mock_prompt, tmp_path):
+    """Test a repeated chat call is served from the cache."""
+    mock_chain = MagicMock()
+    mock_chain.invoke.return_value = "Script"
+    mock_prompt.from_messages.return_value.__or__.return_value.__or__.return_value = mock_chain
+
+    set_cache(DiskCache(str(tmp_path), max_bytes=1024, max_age=60))
+    try:
+        messages = [("system", "Write"), ("user", "Topic: {topic}")]
+        assert _invoke_chat(messages, {"topic": "AI"}) == "Script"
+        assert _invoke_chat(messages, {"topic": "AI"}) == "Script"
+        assert mock_chain.invoke.call_count == 1
+
+        _invoke_chat(messages, {"topic": "Space"})
+        assert mock_chain.invoke.call_count == 2
+    finally:
+        set_cache(None)
+
+def test_generate_image_uses_cache(tmp_path):
+    """Test that a cached image is written without calling DALL-E."""
+    set_cache(DiskCache(str(tmp_path / "cache"), max_bytes=1024, max_age=60))
+    try:
+        client = MagicMock()
+        client.images.generate.return_value.data = [MagicMock(b64_json="aW1hZ2U=")]
+        first = _generate_image(client, "A cat", "1024x1024", str(tmp_path / "a.png"))
+        second = _generate_image(client, "A cat", "1024x1024", str(tmp_path / "b.png"))
+    finally:
+        set_cache(None)
+
+    assert client.images.generate.call_count == 1
+    with open(first, "rb") as f1, open(second, "rb") as f2:
+        assert f1.read() == f2.read() == b"image"
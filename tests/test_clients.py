@@ -0,0 +1,140 @@
+import asyncio
+import datetime
+import threading
+import pytest
+from unittest.mock import MagicMock, patch
+from clients import ClientRegistry, get_client_registry, set_client_registry
+from nodes import _get_llm, _get_openai_client
+
+@pytest.fixture
+def api_key(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+
+def test_clients_are_built_once_and_shared(api_key):
+    """Test that repeated lookups return the same pooled clients."""
+    registry = ClientRegistry()
+    assert registry.openai() is registry.openai()
+    assert registry.chat_model("gpt-4o", 0.7) is registry.chat_model("gpt-4o", 0.7)
+    assert registry.chat_model("gpt-4o", 0.7) is not registry.chat_model("gpt-4o", 0.2)
+
+    # Every client rides on the same connection pool
+    assert registry.openai()._client is registry.http_client()
+    assert registry.chat_model("gpt-4o", 0.7).http_client is registry.http_client()
+
+def test_async_clients_shared_per_event_loop(api_key):
+    """Test that async clients are reused within a loop, rebuilt for a new loop, and closed by aclose."""
+    registry = ClientRegistry()
+
+    async def lookup():
+        client = registry.async_openai()
+        assert registry.async_openai() is client
+        assert client._client is registry.async_http_client()
+        chat = registry.async_chat_model("gpt-4o", 0.7)
+        assert chat is registry.async_chat_model("gpt-4o", 0.7)
+        assert chat.http_async_client is registry.async_http_client()
+        http = registry.async_http_client()
+        await registry.aclose()
+        return client, http
+
+    first, first_http = asyncio.run(lookup())
+    second, _ = asyncio.run(lookup())
+    assert first is not second
+    assert first_http.is_closed
+
+def test_pool_limits_come_from_arguments():
+    """Test that pool sizes are configurable."""
+    registry = ClientRegistry(max_connections=7, max_keepalive_connections=3, keepalive_expiry=5.0)
+    pool = registry.http_client()._transport._pool
+    assert pool._max_connections == 7
+    assert pool._max_keepalive_connections == 3
+    assert pool._keepalive_expiry == 5.0
+
+def test_clients_shared_across_threads(api_key):
+    """Test that concurrent first use still creates a single client."""
+    registry = ClientRegistry()
+    seen = []
+    threads = [threading.Thread(target=lambda: seen.append(registry.openai())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len({id(client) for client in seen}) == 1
+
+def test_close_rebuilds_clients(api_key):
+    """Test that closing the registry drops pooled connections and clients."""
+    registry = ClientRegistry()
+    first = registry.openai()
+    registry.close()
+    assert registry.openai() is not first
+
+def test_registry_injection():
+    """Test that nodes use whatever registry is installed."""
+    stand_in = MagicMock(spec=ClientRegistry)
+    set_client_registry(stand_in)
+
+    assert get_client_registry() is stand_in
+    assert _get_openai_client() is stand_in.openai.return_value
+    assert _get_llm() is stand_in.chat_model.return_value
+    stand_in.chat_model.assert_called_with("gpt-4o", 0.7)
+
+@pytest.fixture
+def youtube_token(tmp_path, monkeypatch):
+    from config import PipelineConfig
+    token_file = tmp_path / "token.json"
+    token_file.write_text("{}")
+    monkeypatch.setattr(PipelineConfig, "YOUTUBE_TOKEN_FILE", str(token_file))
+    return token_file
+
+def _creds(expires_in: float):
+    creds = MagicMock()
+    creds.valid = True
+    creds.refresh_token = "refresh"
+    creds.expiry = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None) + datetime.timedelta(seconds=expires_in)
+    creds.to_json.return_value = "{}"
+    return creds
+
+def test_youtube_service_built_once(youtube_token):
+    """Test that uploads reuse one service and one credentials load."""
+    creds = _creds(3600)
+    with patch("google.oauth2.credentials.Credentials.from_authorized_user_file", return_value=creds) as mock_load, \
+         patch("googleapiclient.discovery.build") as mock_build:
+        registry = ClientRegistry()
+        assert registry.youtube() is registry.youtube()
+        assert get_client_registry().youtube() is get_client_registry().youtube()
+
+    assert mock_build.call_count == 2  # one per registry
+    assert mock_load.call_count == 2
+    creds.refresh.assert_not_called()
+
+def test_youtube_credentials_refreshed_before_expiry(youtube_token):
+    """Test that a token close to expiry is refreshed proactively and saved."""
+    creds = _creds(60)
+    with patch("google.oauth2.credentials.Credentials.from_authorized_user_file", return_value=creds), \
+         patch("googleapiclient.discovery.build"):
+        ClientRegistry().youtube()
+
+    creds.refresh.assert_called_once()
+    creds.to_json.assert_called_once()
+
+def test_youtube_requests_use_per_thread_connections(youtube_token):
+    """Test that requests built from the shared service get a connection per thread."""
+    registry = ClientRegistry()
+    with patch("google.oauth2.credentials.Credentials.from_authorized_user_file", return_value=_creds(3600)), \
+         patch("googleapiclient.discovery.build"):
+        registry.youtube()
+
+    seen = []
+    def make_request():
+        first = registry._build_youtube_request(None, MagicMock(), "https://example.com", method="POST")
+        second = registry._build_youtube_request(None, MagicMock(), "https://example.com", method="POST")
+        assert first.http is second.http
+        # Resumable upload progress comes back as 308s, which must not be followed
+        assert 308 not in first.http.http.redirect_codes
+        seen.append(first.http)
+
+    threads = [threading.Thread(target=make_request) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len({id(http) for http in seen}) == 4
@@ -0,0 +1,112 @@
+import os
+import subprocess
+import pytest
+from unittest.mock import patch
+from PIL import Image
+from config import PipelineConfig
+from compositor import ffmpeg_exe, probe_duration, prepare_frame, crop_to_aspect, compose_slideshow, stream_slideshow
+from nodes import _compose_video_file, _encode_profile
+
+def _has_ffmpeg():
+    try:
+        ffmpeg_exe()
+        return True
+    except FileNotFoundError:
+        return False
+
+requires_ffmpeg = pytest.mark.skipif(not _has_ffmpeg(), reason="ffmpeg binary not available")
+
+def _make_image(path, size, color):
+    Image.new("RGB", size, color).save(path)
+    return str(path)
+
+def _make_audio(path, seconds):
+    subprocess.run(
+        [ffmpeg_exe(), "-loglevel", "error", "-y", "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}", str(path)],
+        check=True
+    )
+    return str(path)
+
+def test_prepare_frame_crops_wide_images(tmp_path):
+    """Test that images wider than the frame are scaled to height and center-cropped."""
+    src = _make_image(tmp_path / "wide.png", (400, 100), "red")
+    out = prepare_frame(src, str(tmp_path / "out.png"), width=90, height=160)
+    with Image.open(out) as img:
+        assert img.size == (90, 160)
+
+def test_prepare_frame_pillarboxes_narrow_images(tmp_path):
+    """Test that images narrower than the frame are padded with black bars."""
+    src = _make_image(tmp_path / "square.png", (100, 100), "red")
+    out = prepare_frame(src, str(tmp_path / "out.png"), width=320, height=180)
+    with Image.open(out) as img:
+        assert img.size == (320, 180)
+        assert img.getpixel((0, 90)) == (0, 0, 0)
+        assert img.getpixel((160, 90))[0] > 200
+
+def test_crop_to_aspect_keeps_the_center(tmp_path):
+    """Test center-cropping a square image to 9:16 and a tall one to 16:9, without rescaling."""
+    src = tmp_path / "square.png"
+    img = Image.new("RGB", (160, 160), "red")
+    img.paste((0, 0, 255), (70, 0, 90, 160))
+    img.save(src)
+
+    out = crop_to_aspect(str(src), str(tmp_path / "tall.png"), 9, 16)
+    with Image.open(out) as cropped:
+        assert cropped.size == (90, 160)
+        assert cropped.getpixel((45, 80)) == (0, 0, 255)
+
+    out = crop_to_aspect(str(src), str(tmp_path / "wide.png"), 16, 9)
+    with Image.open(out) as cropped:
+        assert cropped.size == (160, 90)
+
+@requires_ffmpeg
+def test_compose_slideshow(tmp_path):
+    """Test rendering a slideshow whose length follows the narration."""
+    voice = _make_audio(tmp_path / "voice.mp3", 2)
+    images = [_make_image(tmp_path / f"image_{i}.png", (64, 64), color) for i, color in enumerate(["red", "blue"])]
+
+    out = compose_slideshow(voice, images, str(tmp_path / "video.mp4"), width=160, height=90, fps=12)
+
+    assert os.path.exists(out)
+    assert probe_duration(out) == pytest.approx(2.0, abs=0.2)
+
+@requires_ffmpeg
+def test_stream_slideshow_writes_fragmented_mp4(tmp_path):
+    """Test that the streaming compositor renders the same length, as fragmented MP4 (moov before any media)."""
+    voice = _make_audio(tmp_path / "voice.mp3", 5)
+    images = [_make_image(tmp_path / f"image_{i}.png", (64, 64), color) for i, color in enumerate(["red", "blue", "green"])]
+
+    out = stream_slideshow(voice, images, str(tmp_path / "video.mp4"), width=160, height=90, fps=12)
+
+    assert probe_duration(out) == pytest.approx(5.0, abs=0.2)
+    with open(out, "rb") as f:
+        head = f.read(4096)
+    assert head.index(b"moov") < head.index(b"moof")
+
+@patch("nodes.compose_slideshow", return_value="output/final_video.mp4")
+def test_compose_video_file_dispatches_to_ffmpeg(mock_compose):
+    """Test that PipelineConfig.COMPOSITOR selects the ffmpeg backend."""
+    with patch.object(PipelineConfig, "COMPOSITOR", "ffmpeg"), patch("nodes.os.makedirs"):
+        result = _compose_video_file("voice.mp3", ["a.png"], "final_video.mp4", width=1920, height=1080, fps=24)
+
+    assert result == os.path.join(PipelineConfig.OUTPUT_ROOT, "final_video.mp4")
+    mock_compose.assert_called_once_with(
+        "voice.mp3", ["a.png"], os.path.join(PipelineConfig.OUTPUT_ROOT, "final_video.mp4"), 1920, 1080, 24,
+        PipelineConfig.ENCODE_PROFILES["standard"]
+    )
+
+@patch("nodes.compose_slideshow", return_value="output/final_video.mp4")
+def test_compose_video_file_applies_profile(mock_compose):
+    """Test that an encode profile scales the resolution and overrides the frame rate."""
+    draft = PipelineConfig.ENCODE_PROFILES["draft"]
+    with patch.object(PipelineConfig, "COMPOSITOR", "ffmpeg"), patch("nodes.os.makedirs"):
+        _compose_video_file("voice.mp3", ["a.png"], "short_video.mp4", width=1080, height=1920, fps=30, profile=draft)
+
+    assert mock_compose.call_args[0][3:6] == (540, 960, draft["fps"])
+
+def test_encode_profile_selection():
+    """Test resolving the run's encode profile from state."""
+    assert _encode_profile({}) == PipelineConfig.ENCODE_PROFILES[PipelineConfig.DEFAULT_ENCODE_PROFILE]
+    assert _encode_profile({"encode_profile": "archive"})["preset"] == "slow"
+    with pytest.raises(ValueError):
+        _encode_profile({"encode_profile": "cinema"})
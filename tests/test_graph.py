@@ -1,5 +1,13 @@
+import asyncio
+import os
+import threading
 import pytest
-from graph import route_content_type, should_retry, app
+from unittest.mock import AsyncMock, patch
+from config import PipelineConfig
+from graph import (
+    route_content_type, should_retry, should_retry_or_end, node_router,
+    build_app, get_async_checkpointer, get_checkpointer, run_config, app
+)
 
 def test_app_compilation():
     """Test that the app is compiled and ready for execution."""
@@ -30,6 +38,12 @@ def test_route_content_type_both():
     assert "short_script_generator" in result
     assert len(result) == 2
 
+def test_route_content_type_both_derived(monkeypatch):
+    """Test that derived Shorts start from the long-form script instead of the router."""
+    monkeypatch.setattr(PipelineConfig, "DERIVED_SHORTS", True)
+    assert route_content_type({"content_type": "both"}) == ["script_generator"]
+    assert route_content_type({"content_type": "short"}) == ["short_script_generator"]
+
 def test_route_content_type_default():
     """Test default routing when content_type is missing."""
     state = {}
@@ -75,4 +89,247 @@ def test_should_retry_logic_simulated_api_failure():
 def test_should_retry_logic_empty_error():
     """Test retry logic when error is present but empty string."""
     state = {"error": "", "retry_count": 0}
-    assert should_retry(state) == "next"
\ No newline at end of file
+    assert should_retry(state) == "next"
+
+# --- Per-Node Retry State ---
+
+def test_should_retry_or_end_node_scoped():
+    """Test that node-scoped routing only looks at that node's slot."""
+    state = {
+        "error": "Voice failed",
+        "node_errors": {"voice_generator": "Voice failed", "asset_generator": None},
+        "node_retries": {"voice_generator": 1, "asset_generator": 0}
+    }
+    assert should_retry_or_end(state, "voice_generator") == "retry"
+    assert should_retry_or_end(state, "asset_generator") == "next"
+
+def test_should_retry_or_end_node_scoped_exhausted():
+    """Test that a node ends its branch after its own retries are exhausted."""
+    state = {"node_errors": {"voice_generator": "Voice failed"}, "node_retries": {"voice_generator": 2}}
+    assert should_retry_or_end(state, "voice_generator") == "end"
+
+def test_node_router_fan_out():
+    """Test that a successful script fans out to voice and assets together."""
+    route = node_router("script_generator", should_retry, fan_out=["voice_generator", "asset_generator"])
+    assert route.invoke({"node_errors": {"script_generator": None}}) == ["voice_generator", "asset_generator"]
+    assert route.invoke({"node_errors": {"script_generator": "Err"}, "node_retries": {"script_generator": 0}}) == "retry"
+
+@patch("graph.time.sleep")
+def test_retry_edge_waits_for_backoff(mock_sleep):
+    """Test that the retry edge sleeps for the failed node's backoff, and only when retrying."""
+    state = {
+        "node_errors": {"voice_generator": "Rate limited"},
+        "node_retries": {"voice_generator": 1},
+        "retry_delays": {"voice_generator": 4.5},
+    }
+    assert should_retry_or_end(state, "voice_generator") == "retry"
+    mock_sleep.assert_called_once_with(4.5)
+
+    mock_sleep.reset_mock()
+    state["node_retries"]["voice_generator"] = PipelineConfig.MAX_RETRIES
+    assert should_retry_or_end(state, "voice_generator") == "end"
+    mock_sleep.assert_not_called()
+
+@patch("graph.time.sleep")
+def test_async_retry_edge_awaits_backoff(mock_sleep):
+    """Test that under ainvoke the retry edge awaits the backoff instead of sleeping in a thread."""
+    state = {
+        "node_errors": {"voice_generator": "Rate limited"},
+        "node_retries": {"voice_generator": 1},
+        "retry_delays": {"voice_generator": 4.5},
+    }
+    route = node_router("voice_generator")
+    with patch("graph.asyncio.sleep", new_callable=AsyncMock) as mock_async_sleep:
+        assert asyncio.run(route.ainvoke(state)) == "retry"
+
+    mock_async_sleep.assert_awaited_once_with(4.5)
+    mock_sleep.assert_not_called()
+
+@patch("nodes._compose_video_file")
+@patch("nodes._generate_images", return_value=["output/image_0.png"])
+@patch("nodes._generate_image_prompts", return_value=["Prompt"])
+@patch("nodes._generate_audio_file", side_effect=Exception("TTS down"))
+@patch("nodes._generate_script_content", return_value="Script")
+def test_parallel_voice_failure_does_not_retry_assets(mock_script, mock_audio, mock_prompts, mock_images, mock_compose):
+    """Test that a failing voice branch retries on its own and never reaches the composer."""
+    final_state = app.invoke({"topic": "History of Math", "retry_count": 0})
+
+    # Voice used up its own MAX_RETRIES attempts; assets ran exactly once
+    assert mock_audio.call_count == 2
+    assert mock_images.call_count == 1
+    assert final_state["image_paths"] == ["output/image_0.png"]
+    assert final_state["node_errors"]["asset_generator"] is None
+    mock_compose.assert_not_called()
+
+@patch("nodes._compose_video_file", return_value="output/final_video.mp4")
+@patch("nodes._generate_images", return_value=["output/image_0.png"])
+@patch("nodes._generate_image_prompts", return_value=["Prompt"])
+@patch("nodes._generate_audio_file", return_value="output/long_voice.mp3")
+@patch("nodes._generate_script_content", return_value="Script")
+def test_parallel_branches_join_at_composer(mock_script, mock_audio, mock_prompts, mock_images, mock_compose):
+    """Test that the composer runs once, after both voice and assets succeed."""
+    final_state = app.invoke({"topic": "History of Math", "retry_count": 0})
+
+    mock_compose.assert_called_once()
+    assert mock_compose.call_args[0][:2] == ("output/long_voice.mp3", ["output/image_0.png"])
+    assert final_state["video_path"] == "output/final_video.mp4"
+
+@patch("nodes._compose_video_file", return_value="output/final_video.mp4")
+@patch("nodes._generate_script_content")
+@patch("nodes._agenerate_images", new_callable=AsyncMock, return_value=["output/image_0.png"])
+@patch("nodes._agenerate_image_prompts", new_callable=AsyncMock, return_value=["Prompt"])
+@patch("nodes._agenerate_audio_file", new_callable=AsyncMock, return_value="output/long_voice.mp3")
+@patch("nodes._agenerate_script_content", new_callable=AsyncMock, return_value="Script")
+def test_ainvoke_runs_async_nodes(mock_ascript, mock_aaudio, mock_aprompts, mock_aimages, mock_script, mock_compose):
+    """Test that app.ainvoke awaits the async node implementations and still joins at the composer."""
+    final_state = asyncio.run(app.ainvoke({"topic": "History of Math", "retry_count": 0}))
+
+    mock_ascript.assert_awaited_once()
+    mock_script.assert_not_called()
+    mock_compose.assert_called_once()
+    assert final_state["video_path"] == "output/final_video.mp4"
+
+@patch("nodes._get_youtube_service")
+@patch("nodes._upload_video_once", return_value=("vid123", "hash"))
+@patch("nodes._get_openai_client")
+@patch("nodes._generate_image", return_value="output/thumbnail.png")
+@patch("nodes._invoke_chat", side_effect=lambda messages, variables, json_output=False, **kwargs:
+       {"title": "Math", "description": "Desc", "tags": []} if json_output else "Thumbnail prompt")
+@patch("nodes._generate_images", return_value=["output/image_0.png"])
+@patch("nodes._generate_image_prompts", return_value=["Prompt"])
+@patch("nodes._generate_audio_file", return_value="output/long_voice.mp3")
+@patch("nodes._generate_script_content", return_value="Script")
+def test_thumbnail_overlaps_composer_and_joins_at_upload(mock_script, mock_audio, mock_prompts, mock_images, mock_chat,
+                                                         mock_thumbnail, mock_client, mock_upload, mock_youtube, tmp_path):
+    """Test that metadata is ready before the render, the thumbnail is generated during it, and upload waits for both."""
+    video_path = tmp_path / "final_video.mp4"
+    video_path.write_bytes(b"video")
+    thumbnail_started = threading.Event()
+    mock_thumbnail.side_effect = lambda *args: thumbnail_started.set() or "output/thumbnail.png"
+
+    def compose(*args, **kwargs):
+        # Only returns once the thumbnail is under way in parallel
+        assert thumbnail_started.wait(timeout=10)
+        return str(video_path)
+
+    with patch("nodes._compose_video_file", side_effect=compose) as mock_compose:
+        final_state = app.invoke({"topic": "History of Math", "retry_count": 0})
+
+    mock_compose.assert_called_once()
+    assert final_state["title"] == "Math"
+    assert final_state["thumbnail_path"] == "output/thumbnail.png"
+    assert final_state["upload_status"] == "success"
+    mock_upload.assert_called_once()
+    assert mock_upload.call_args[0][3]["snippet"]["title"] == "Math"
+
+@patch("nodes._compose_video_file", side_effect=lambda voice, images, name, **kwargs: f"output/{name}")
+@patch("nodes._invoke_chat", side_effect=lambda messages, variables, json_output=False, **kwargs:
+       {"title": "T", "description": "D", "tags": []} if json_output else f"Short version of {variables['script']}")
+@patch("nodes._generate_image_prompts", return_value=["Prompt 1", "Prompt 2"])
+@patch("nodes._generate_audio_file", side_effect=lambda script, name, output_dir=None: f"output/{name}")
+@patch("nodes._generate_script_content", return_value="Long script")
+def test_derived_shorts_reuse_long_form_work(mock_script, mock_audio, mock_prompts, mock_chat, mock_compose,
+                                            tmp_path, monkeypatch):
+    """Test that a derived "both" run condenses the long script and crops the long images for the Short."""
+    from PIL import Image
+    monkeypatch.setattr(PipelineConfig, "DERIVED_SHORTS", True)
+    long_images = []
+    for i in range(2):
+        path = str(tmp_path / f"image_{i}.png")
+        Image.new("RGB", (1024, 1024), "red").save(path)
+        long_images.append(path)
+
+    with patch("nodes._generate_images", return_value=long_images) as mock_images:
+        final_state = app.invoke({"topic": "both: History of Math", "output_dir": str(tmp_path), "retry_count": 0})
+
+    assert final_state["content_type"] == "both"
+    mock_script.assert_called_once()
+    mock_prompts.assert_called_once()
+    mock_images.assert_called_once()
+    assert final_state["short_script"] == "Short version of Long script"
+    assert final_state["short_image_prompts"] == ["Prompt 1", "Prompt 2"]
+    for path in final_state["short_image_paths"]:
+        with Image.open(path) as img:
+            assert img.size == (576, 1024)
+    assert final_state["short_video_path"] == "output/short_video.mp4"
+    assert final_state["video_path"] == "output/final_video.mp4"
+
+# --- Checkpointing ---
+
+@patch("nodes._compose_video_file")
+@patch("nodes._generate_images", return_value=["output/image_0.png"])
+@patch("nodes._generate_image_prompts", return_value=["Prompt"])
+@patch("nodes._generate_audio_file", return_value="output/long_voice.mp3")
+@patch("nodes._generate_script_content", return_value="Script")
+def test_resume_after_crash_skips_completed_nodes(mock_script, mock_audio, mock_prompts, mock_images, mock_compose, tmp_path):
+    """Test that a run interrupted in the composer resumes without redoing earlier nodes."""
+    checkpointed_app = build_app(checkpointer=get_checkpointer(str(tmp_path / "checkpoints.sqlite")))
+    config = run_config("run-1")
+
+    # Simulate the process dying mid-composition (not caught by the node)
+    mock_compose.side_effect = KeyboardInterrupt
+    with pytest.raises(KeyboardInterrupt):
+        checkpointed_app.invoke({"topic": "History of Math", "run_id": "run-1", "retry_count": 0}, config, durability="sync")
+    assert checkpointed_app.get_state(config).next == ("video_composer",)
+
+    mock_compose.side_effect = None
+    mock_compose.return_value = "output/final_video.mp4"
+    final_state = checkpointed_app.invoke(None, config, durability="sync")
+
+    assert final_state["video_path"] == "output/final_video.mp4"
+    assert mock_script.call_count == 1
+    assert mock_audio.call_count == 1
+    assert mock_images.call_count == 1
+
+@patch("nodes._compose_video_file")
+@patch("nodes._generate_images", return_value=["output/image_0.png"])
+@patch("nodes._generate_image_prompts", return_value=["Prompt"])
+@patch("nodes._generate_audio_file", return_value="output/long_voice.mp3")
+@patch("nodes._generate_script_content", return_value="Script")
+def test_sync_run_resumes_under_ainvoke(mock_script, mock_audio, mock_prompts, mock_images, mock_compose, tmp_path):
+    """Test that a run interrupted under invoke resumes from the same database with ainvoke."""
+    path = str(tmp_path / "checkpoints.sqlite")
+    config = run_config("run-1")
+
+    mock_compose.side_effect = KeyboardInterrupt
+    with pytest.raises(KeyboardInterrupt):
+        build_app(checkpointer=get_checkpointer(path)).invoke(
+            {"topic": "History of Math", "run_id": "run-1", "retry_count": 0}, config, durability="sync"
+        )
+
+    mock_compose.side_effect = None
+    mock_compose.return_value = "output/final_video.mp4"
+
+    async def resume():
+        saver = await get_async_checkpointer(path)
+        try:
+            return await build_app(checkpointer=saver).ainvoke(None, config)
+        finally:
+            await saver.conn.close()
+
+    final_state = asyncio.run(resume())
+    assert final_state["video_path"] == "output/final_video.mp4"
+    assert mock_script.call_count == 1
+    assert mock_audio.call_count == 1
+
+# --- Batch Execution ---
+
+@patch("nodes._compose_video_file", side_effect=lambda voice, images, name, output_dir=None, **kwargs: f"{output_dir}/{name}")
+@patch("nodes._generate_images", return_value=["output/image_0.png"])
+@patch("nodes._generate_image_prompts", return_value=["Prompt"])
+@patch("nodes._generate_audio_file", side_effect=lambda script, name, output_dir=None: f"{output_dir}/{name}")
+@patch("nodes._generate_script_content", side_effect=lambda topic, prompt: f"Script about {topic}")
+def test_batch_runs_topics_in_isolated_workspaces(mock_script, mock_audio, mock_prompts, mock_images, mock_compose):
+    """Test that app.batch runs several topics concurrently, each in its own output directory."""
+    topics = ["History of Math", "Deep Sea Life", "Volcanoes"]
+    results = app.batch(
+        [{"topic": topic, "run_id": f"run-{i}", "retry_count": 0} for i, topic in enumerate(topics)],
+        {"max_concurrency": 3}
+    )
+
+    for i, result in enumerate(results):
+        workspace = os.path.join(PipelineConfig.OUTPUT_ROOT, f"run-{i}")
+        assert result["output_dir"] == workspace
+        assert result["voice_path"] == f"{workspace}/long_voice.mp3"
+        assert result["video_path"] == f"{workspace}/final_video.mp4"
+    assert mock_compose.call_count == 3
@@ -0,0 +1,44 @@
+import threading
+from ledger import UploadLedger, file_digest, get_ledger
+
+def test_record_and_get(tmp_path):
+    """Test that completed steps are returned only for the same run, file and step."""
+    ledger = UploadLedger(str(tmp_path / "uploads.sqlite"))
+    ledger.record("run1", "abc", "video", "vid123")
+
+    assert ledger.get("run1", "abc", "video") == "vid123"
+    assert ledger.get("run1", "abc", "thumbnail") is None
+    assert ledger.get("run1", "def", "video") is None
+    assert ledger.get("run2", "abc", "video") is None
+
+def test_ledger_persists_across_processes(tmp_path):
+    """Test that a reopened ledger still knows about earlier uploads."""
+    path = str(tmp_path / "nested" / "uploads.sqlite")
+    UploadLedger(path).record("run1", "abc", "video", "vid123")
+    assert UploadLedger(path).get("run1", "abc", "video") == "vid123"
+
+def test_concurrent_records(tmp_path):
+    """Test that upload nodes on different threads can share the ledger."""
+    ledger = UploadLedger(str(tmp_path / "uploads.sqlite"))
+    threads = [
+        threading.Thread(target=ledger.record, args=(f"run{i}", "abc", "video", f"vid{i}"))
+        for i in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert [ledger.get(f"run{i}", "abc", "video") for i in range(8)] == [f"vid{i}" for i in range(8)]
+
+def test_file_digest_tracks_content(tmp_path):
+    """Test that the content hash changes with the file's bytes, not its name."""
+    a, b = tmp_path / "a.mp4", tmp_path / "b.mp4"
+    a.write_bytes(b"video")
+    b.write_bytes(b"video")
+    assert file_digest(str(a)) == file_digest(str(b))
+    b.write_bytes(b"re-rendered")
+    assert file_digest(str(a)) != file_digest(str(b))
+
+def test_get_ledger_shared():
+    """Test that the process-wide ledger is opened once."""
+    assert get_ledger() is get_ledger()
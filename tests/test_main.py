@@ -0,0 +1,74 @@
+import asyncio
+import threading
+import pytest
+from unittest.mock import AsyncMock, patch
+from main import load_topics, run_batch, run_batch_async, run_succeeded, summarize_run
+
+def test_load_topics_skips_blanks_and_comments(tmp_path):
+    """Test reading a topics file for batch mode."""
+    path = tmp_path / "topics.txt"
+    path.write_text("# Weekly schedule\nThe Future of AI\n\n  Quantum Computing  \n#skip me\nAI Trends #Shorts\n")
+    assert load_topics(str(path)) == ["The Future of AI", "Quantum Computing", "AI Trends #Shorts"]
+
+def test_run_succeeded_requires_every_requested_upload():
+    """Test that a 'both' run only succeeds when both uploads did."""
+    assert run_succeeded({"content_type": "long", "upload_status": "success"})
+    assert not run_succeeded({"content_type": "both", "upload_status": "success"})
+    assert run_succeeded({"content_type": "both", "upload_status": "success", "short_upload_status": "success"})
+    assert not run_succeeded({})
+
+def test_summarize_run():
+    """Test the one-line batch report entry."""
+    summary = summarize_run({
+        "content_type": "both", "upload_status": "success",
+        "node_errors": {"youtube_upload": None, "short_youtube_upload": "Upload failed"},
+    })
+    assert summary == "long=success, short=failed, short_youtube_upload=Upload failed"
+
+def test_summarize_run_reports_errors_a_sibling_cleared():
+    """Test that a failed branch is reported even when a parallel branch's success reset the shared error key."""
+    summary = summarize_run({
+        "content_type": "long", "error": None,
+        "node_errors": {"voice_generator": "TTS down", "asset_generator": None},
+    })
+    assert summary == "long=failed, voice_generator=TTS down"
+
+@patch("nodes._compose_video_file", side_effect=lambda voice, images, name, output_dir=None, **kwargs: f"{output_dir}/{name}")
+@patch("nodes._agenerate_images", new_callable=AsyncMock, return_value=["output/image_0.png"])
+@patch("nodes._agenerate_image_prompts", new_callable=AsyncMock, return_value=["Prompt"])
+@patch("nodes._agenerate_audio_file", new_callable=AsyncMock, side_effect=lambda script, name, output_dir=None: f"{output_dir}/{name}")
+@patch("nodes._agenerate_script_content", new_callable=AsyncMock, side_effect=lambda topic, prompt: f"Script about {topic}")
+def test_async_batch_runner_checkpoints_every_run(mock_script, mock_audio, mock_prompts, mock_images, mock_compose, tmp_path):
+    """Test that the asyncio runner runs every topic on one loop and checkpoints them under their run IDs."""
+    from graph import build_app, get_checkpointer, run_config
+
+    topics = ["History of Math", "Deep Sea Life", "Volcanoes"]
+    states = [{"topic": topic, "run_id": f"run-{i}", "retry_count": 0} for i, topic in enumerate(topics)]
+    configs = [run_config(f"run-{i}") for i in range(len(topics))]
+    checkpoints = str(tmp_path / "checkpoints.sqlite")
+
+    results = asyncio.run(run_batch_async(states, configs, checkpoints, workers=2))
+
+    assert [r["script"] for r in results] == [f"Script about {topic}" for topic in topics]
+    assert mock_script.await_count == 3
+    # The sync app can read (and so resume) what the async runner wrote
+    snapshot = build_app(checkpointer=get_checkpointer(checkpoints)).get_state(run_config("run-1"))
+    assert snapshot.values["topic"] == "Deep Sea Life"
+
+@patch("nodes._compose_video_file", side_effect=lambda voice, images, name, output_dir=None, **kwargs: f"{output_dir}/{name}")
+@patch("nodes._generate_image_prompts", return_value=["Prompt"])
+@patch("nodes._generate_script_content", side_effect=lambda topic, prompt: f"Script about {topic}")
+def test_one_worker_still_runs_branches_in_parallel(mock_script, mock_prompts, mock_compose, tmp_path):
+    """Test that --workers caps topics in flight, not the voice and asset branches within a run."""
+    from graph import build_app, get_checkpointer, run_config
+
+    app = build_app(checkpointer=get_checkpointer(str(tmp_path / "checkpoints.sqlite")))
+
+    # Each branch only finishes once the other has started
+    barrier = threading.Barrier(2, timeout=10)
+    with patch("nodes._generate_audio_file", side_effect=lambda *a, **k: barrier.wait() and None or "voice.mp3"), \
+         patch("nodes._generate_images", side_effect=lambda *a, **k: barrier.wait() and None or ["image_0.png"]):
+        results = run_batch(app, [{"topic": "Volcanoes", "run_id": "run-0", "retry_count": 0}], [run_config("run-0")], 1)
+
+    assert results[0]["voice_path"] == "voice.mp3"
+    assert results[0]["image_paths"] == ["image_0.png"]
@@ -0,0 +1,82 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+import pytest
+import metrics
+from graph import app
+
+@pytest.fixture(autouse=True)
+def fresh_traces():
+    metrics.reset_traces()
+    yield
+    metrics.reset_traces()
+
+def test_trace_node_records_attempts_and_counters():
+    """Test that each attempt becomes a span carrying what its helpers recorded."""
+    def node(state):
+        metrics.record(api_calls=1, input_tokens=100)
+        # Work fanned out to a pool still counts against the node
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = [metrics.submit(pool, lambda: metrics.record(images=1)) for _ in range(3)]
+        for f in futures:
+            f.result()
+        if state.get("fail"):
+            return {"node_errors": {"asset_generator": "boom"}, "node_retries": {"asset_generator": 1}}
+        return {"node_errors": {"asset_generator": None}}
+
+    traced = metrics.trace_node("asset_generator", node)
+    traced({"run_id": "r1", "fail": True})
+    traced({"run_id": "r1", "node_retries": {"asset_generator": 1}})
+
+    report = metrics.get_trace("r1").report()
+    assert [(s["attempt"], s["status"]) for s in report["spans"]] == [(1, "error"), (2, "ok")]
+    entry = report["nodes"]["asset_generator"]
+    assert entry["attempts"] == 2 and entry["retries"] == 1 and entry["status"] == "ok"
+    assert entry["images"] == 6
+    assert report["totals"]["input_tokens"] == 200
+
+def test_trace_node_marks_crashes():
+    def node(state):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        metrics.trace_node("video_composer", node)({"run_id": "r2"})
+    assert metrics.get_trace("r2").report()["spans"][0]["status"] == "crashed"
+
+def test_record_outside_node_is_noop():
+    metrics.record(api_calls=1)
+
+def test_costs():
+    assert metrics.chat_cost("gpt-4o", 1_000_000, 0) == pytest.approx(2.50)
+    assert metrics.tts_cost("tts-1", 1000) == pytest.approx(0.015)
+    assert metrics.image_cost("dall-e-3", "1792x1024") == pytest.approx(0.08)
+    assert metrics.chat_cost("unknown-model", 1000, 1000) == 0
+
+@patch("nodes._compose_video_file", return_value="output/final_video.mp4")
+@patch("nodes._generate_images", return_value=["output/image_0.png"])
+@patch("nodes._generate_image_prompts", return_value=["Prompt"])
+@patch("nodes._generate_audio_file", side_effect=[Exception("TTS down"), "output/long_voice.mp3"])
+@patch("nodes._generate_script_content", return_value="Script")
+def test_run_report_and_prometheus_textfile(mock_script, mock_audio, mock_prompts, mock_images, mock_compose, tmp_path):
+    """Test that a graph run produces a per-node report and Prometheus metrics."""
+    with patch("graph.time.sleep"):
+        app.invoke({"topic": "History of Math", "run_id": "run42", "output_dir": str(tmp_path), "retry_count": 0})
+
+    path = metrics.write_run_report("run42")
+    assert path == str(tmp_path / "run_report.json")
+    report = json.loads((tmp_path / "run_report.json").read_text())
+    assert report["topic"] == "History of Math"
+    assert report["nodes"]["voice_generator"]["attempts"] == 2
+    assert report["nodes"]["voice_generator"]["retries"] == 1
+    assert {"topic_planner", "script_generator", "asset_generator", "video_composer"} <= set(report["nodes"])
+    assert report["wall_seconds"] >= 0
+
+    textfile = metrics.write_prometheus_textfile(str(tmp_path / "pipeline.prom"))
+    text = open(textfile).read()
+    assert 'pipeline_node_executions_total{node="voice_generator",status="error"} 1' in text
+    assert 'pipeline_node_executions_total{node="voice_generator",status="ok"} 1' in text
+    assert "pipeline_runs_total 1" in text
+
+def test_no_textfile_unless_configured():
+    assert metrics.write_prometheus_textfile() is None
+    assert metrics.write_run_report("never-ran") is None
@@ -1,6 +1,21 @@
+import asyncio
+import base64
+import json
+import os
+import threading
+import time
 import pytest
-from unittest.mock import patch, MagicMock, mock_open
+from unittest.mock import patch, AsyncMock, MagicMock, mock_open
+from langchain_core.exceptions import OutputParserException
+from config import PipelineConfig
 from nodes import (
+    ImageBatchError,
+    _agenerate_audio_file,
+    _agenerate_images,
+    _generate_images,
+    _plan_content,
+    _generate_audio_file,
+    _split_script,
     topic_planner,
     content_type_router,
     script_generator,
@@ -15,7 +30,8 @@ from nodes import (
     short_asset_generator,
     short_video_composer,
     short_metadata_generator,
-    short_youtube_upload
+    short_youtube_upload,
+    ascript_generator,
 )
 
 # --- Core Logic Nodes ---
@@ -33,6 +49,19 @@ def test_topic_planner_preserves_topic():
     """Test that topic planner keeps existing topic."""
     assert topic_planner({"topic": "Custom Topic"})["topic"] == "Custom Topic"
 
+def test_topic_planner_assigns_run_workspace():
+    """Test that each run gets its own output directory under OUTPUT_ROOT."""
+    result = topic_planner({"topic": "AI", "run_id": "abc123"})
+    assert result["run_id"] == "abc123"
+    assert result["output_dir"] == os.path.join(PipelineConfig.OUTPUT_ROOT, "abc123")
+
+    # Runs without an ID get a fresh one, and therefore a fresh workspace
+    first, second = topic_planner({"topic": "AI"}), topic_planner({"topic": "AI"})
+    assert first["output_dir"] != second["output_dir"]
+
+    with patch.object(PipelineConfig, "PER_RUN_OUTPUT_DIRS", False):
+        assert topic_planner({"topic": "AI", "run_id": "abc123"})["output_dir"] == PipelineConfig.OUTPUT_ROOT
+
 def test_content_type_router_logic():
     """Test routing logic based on keywords."""
     # Long form default
@@ -61,7 +90,7 @@ def test_script_generator():
     assert "Test" in result["script"]
 
 @patch("nodes.ChatPromptTemplate")
-@patch("nodes.ChatOpenAI")
+@patch("langchain_openai.ChatOpenAI")
 @patch("nodes.StrOutputParser")
 def test_script_generator_success(mock_parser, mock_chat, mock_prompt):
     """Test script generator success path with mocks."""
@@ -81,7 +110,7 @@ def test_script_generator_success(mock_parser, mock_chat, mock_prompt):
 def test_voice_generator():
     assert "error" in voice_generator({})
 
-@patch("nodes.OpenAI")
+@patch("openai.OpenAI")
 @patch("nodes.os.makedirs")
 @patch("nodes.os.path.join", return_value="output/long_voice.mp3")
 def test_voice_generator_success(mock_join, mock_makedirs, mock_openai):
@@ -97,13 +126,85 @@ def test_voice_generator_success(mock_join, mock_makedirs, mock_openai):
     assert result["error"] is None
     mock_response.stream_to_file.assert_called_once()
 
+@patch("openai.OpenAI")
+def test_api_helpers_acquire_rate_limits(mock_openai, tmp_path):
+    """Test that TTS and image calls draw from their endpoint's rate limit."""
+    import base64
+    limiter = MagicMock()
+    client = mock_openai.return_value
+    client.images.generate.return_value.data = [MagicMock(b64_json=base64.b64encode(b"png").decode())]
+
+    with patch("nodes.get_rate_limiter", return_value=limiter):
+        _generate_audio_file("Short script.", "voice.mp3", output_dir=str(tmp_path))
+        _generate_images(["Prompt"], "1024x1024", "image", output_dir=str(tmp_path))
+
+    assert [c.args[0] for c in limiter.acquire.call_args_list] == ["tts", "images"]
+
+def test_quota_error_opens_chat_circuit_for_later_runs():
+    """Test that after an insufficient_quota error, other runs fail fast without calling the API."""
+    import httpx
+    import openai
+    response = httpx.Response(429, request=httpx.Request("POST", "https://api.openai.com"))
+    quota_error = openai.RateLimitError("insufficient_quota", response=response, body=None)
+    llm = MagicMock(side_effect=quota_error)
+
+    with patch("nodes._get_llm", return_value=llm):
+        first = script_generator({"topic": "Run one"})
+        second = script_generator({"topic": "Run two"})
+
+    assert llm.call_count == 1
+    assert "circuit open" in second["error"]
+    # Both go straight to the fallback
+    assert first["node_retries"]["script_generator"] == PipelineConfig.MAX_RETRIES
+    assert second["node_retries"]["script_generator"] == PipelineConfig.MAX_RETRIES
+
+def test_split_script_sentence_boundaries():
+    """Test that scripts are split between sentences and every chunk fits the limit."""
+    text = "First sentence here. Second one! Third question? Fourth."
+    chunks = _split_script(text, 40)
+    assert chunks == ["First sentence here. Second one!", "Third question? Fourth."]
+    assert " ".join(chunks) == text
+    assert _split_script("Short script.", 4096) == ["Short script."]
+
+def test_split_script_oversized_sentence():
+    """Test that a sentence longer than the limit is broken at word boundaries."""
+    chunks = _split_script("one two three four five six", 10)
+    assert all(len(chunk) <= 10 for chunk in chunks)
+    assert " ".join(chunks) == "one two three four five six"
+
+@patch("openai.OpenAI")
+def test_generate_audio_file_chunked(mock_openai, tmp_path, monkeypatch):
+    """Test long scripts are synthesized in chunks and joined in script order."""
+    def create(model, voice, input):
+        response = MagicMock()
+        # Earlier chunks finish last to prove joining does not depend on completion
+        delay = 0.05 if input.startswith("Alpha") else 0.0
+        def stream_to_file(path):
+            time.sleep(delay)
+            with open(path, "wb") as f:
+                f.write(input.encode())
+        response.stream_to_file.side_effect = stream_to_file
+        return response
+
+    mock_openai.return_value.audio.speech.create.side_effect = create
+    monkeypatch.chdir(tmp_path)
+
+    with patch.object(PipelineConfig, "TTS_CHUNK_CHARS", 20):
+        path = _generate_audio_file("Alpha beta gamma. [Visual: sky] Delta epsilon. Zeta eta.", "long_voice.mp3")
+
+    assert mock_openai.return_value.audio.speech.create.call_count == 3
+    with open(path, "rb") as f:
+        assert f.read() == b"Alpha beta gamma.Delta epsilon.Zeta eta."
+    # Temporary chunk files are cleaned up
+    assert sorted(os.listdir(tmp_path / "output")) == ["long_voice.mp3"]
+
 def test_asset_generator():
     result = asset_generator({})
     assert "error" in result
 
 @patch("nodes.ChatPromptTemplate")
-@patch("nodes.ChatOpenAI")
-@patch("nodes.OpenAI")
+@patch("langchain_openai.ChatOpenAI")
+@patch("openai.OpenAI")
 @patch("nodes.base64.b64decode", return_value=b"fake_image_data")
 @patch("builtins.open", new_callable=mock_open)
 @patch("nodes.os.makedirs")
@@ -133,6 +234,67 @@ def test_asset_generator_success(mock_makedirs, mock_file, mock_b64, mock_openai
     assert result["error"] is None
     assert mock_client.images.generate.call_count == 3
 
+@patch("openai.OpenAI")
+@patch("nodes.base64.b64decode", return_value=b"fake_image_data")
+@patch("builtins.open", new_callable=mock_open)
+@patch("nodes.os.makedirs")
+def test_generate_images_concurrent_and_ordered(mock_makedirs, mock_file, mock_b64, mock_openai):
+    """Test images are generated concurrently, capped by config, in prompt order."""
+    lock = threading.Lock()
+    in_flight = {"now": 0, "peak": 0}
+
+    def slow_generate(**kwargs):
+        with lock:
+            in_flight["now"] += 1
+            in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        # Earlier prompts finish last to prove ordering does not depend on completion
+        time.sleep(0.05 * (6 - int(kwargs["prompt"].split()[-1])))
+        with lock:
+            in_flight["now"] -= 1
+        response = MagicMock()
+        response.data = [MagicMock(b64_json="fake_b64")]
+        return response
+
+    mock_openai.return_value.images.generate.side_effect = slow_generate
+    prompts = [f"Prompt {i}" for i in range(6)]
+
+    with patch.object(PipelineConfig, "MAX_IMAGE_WORKERS", 3):
+        paths = _generate_images(prompts, "1024x1024", "image")
+
+    assert paths == [os.path.join(PipelineConfig.OUTPUT_ROOT, f"image_{i}.png") for i in range(6)]
+    assert in_flight["peak"] == 3
+
+@patch("nodes._generate_image_prompts")
+@patch("openai.OpenAI")
+@patch("nodes._generate_image")
+def test_asset_generator_retries_only_missing_images(mock_generate, mock_openai, mock_prompts, tmp_path, monkeypatch):
+    """Test a retried asset node reuses prompts and images that already succeeded."""
+    mock_prompts.return_value = ["Prompt 0", "Prompt 1", "Prompt 2"]
+
+    def write_image(client, prompt, size, file_path):
+        if prompt == "Prompt 2" and mock_generate.call_count <= 3:
+            raise Exception("DALL-E timeout")
+        open(file_path, "wb").close()
+        return file_path
+
+    mock_generate.side_effect = write_image
+    monkeypatch.chdir(tmp_path)
+    state = {"script": "Script"}
+
+    first = asset_generator(state)
+    assert first["node_errors"]["asset_generator"] == "DALL-E timeout"
+    assert first["image_prompts"] == ["Prompt 0", "Prompt 1", "Prompt 2"]
+    assert sorted(first["generated_images"]) == ["image_0", "image_1"]
+
+    second = asset_generator({**state, **first})
+
+    assert second["error"] is None
+    assert second["image_paths"] == [os.path.join(PipelineConfig.OUTPUT_ROOT, f"image_{i}.png") for i in range(3)]
+    # Prompts generated once; only the failed image was requested again
+    mock_prompts.assert_called_once()
+    assert mock_generate.call_count == 4
+    assert mock_generate.call_args[0][1] == "Prompt 2"
+
 def test_video_composer():
     assert "error" in video_composer({})
 
@@ -141,7 +303,7 @@ def test_metadata_generator():
     assert "error" in metadata_generator({"topic": "Test"})
 
 @patch("nodes.ChatPromptTemplate")
-@patch("nodes.ChatOpenAI")
+@patch("langchain_openai.ChatOpenAI")
 @patch("nodes.JsonOutputParser")
 def test_metadata_generator_success(mock_parser, mock_chat, mock_prompt):
     """Test metadata generator success path."""
@@ -164,12 +326,92 @@ def test_metadata_generator_success(mock_parser, mock_chat, mock_prompt):
     assert result["tags"] == ["tag1", "tag2"]
     assert result["error"] is None
 
+def _plan(**overrides):
+    return {
+        "script": "Planned script", "image_prompts": ["Scene 1", "Scene 2", "Scene 3", "Scene 4"],
+        "title": "Planned Title", "description": "Planned description", "tags": ["ai"],
+        "thumbnail_prompt": "Planned thumbnail", **overrides
+    }
+
+def _chat_returning(result):
+    """side_effect for a patched _invoke_chat that still applies the caller's validator."""
+    def chat(*args, validate=None, **kwargs):
+        return validate(result) if validate else result
+    return chat
+
+def test_combined_planning_replaces_per_node_calls(monkeypatch):
+    """Test that one planning call supplies the script, image prompts, metadata and thumbnail prompt."""
+    monkeypatch.setattr(PipelineConfig, "COMBINED_PLANNING", True)
+    with patch("nodes._invoke_chat", side_effect=_chat_returning(_plan())) as mock_chat, \
+         patch("nodes._get_openai_client"), \
+         patch("nodes._generate_image", return_value="output/thumbnail.png") as mock_image, \
+         patch("nodes.os.makedirs"):
+        planned = script_generator({"topic": "AI"})
+        state = {"topic": "AI", **planned}
+        metadata = metadata_generator(state)
+        thumbnail = thumbnail_generator(state)
+
+    assert planned["script"] == "Planned script"
+    assert planned["image_prompts"] == ["Scene 1", "Scene 2", "Scene 3"]
+    assert planned["title"] == "Planned Title"
+    assert metadata["error"] is None and "title" not in metadata
+    assert thumbnail["thumbnail_path"] == "output/thumbnail.png"
+    assert mock_image.call_args[0][1] == "Planned thumbnail"
+    mock_chat.assert_called_once()
+    assert mock_chat.call_args.kwargs["json_output"] is True
+
+@pytest.mark.parametrize("failure", [
+    {"side_effect": _chat_returning(_plan(image_prompts=["Only one"]))},
+    {"side_effect": _chat_returning(_plan(title=""))},
+    {"side_effect": _chat_returning({"script": "Planned script"})},
+    {"side_effect": OutputParserException("Invalid json output")},
+])
+def test_combined_planning_falls_back_when_invalid(monkeypatch, failure):
+    """Test that a plan failing schema validation falls back to the per-node script call."""
+    monkeypatch.setattr(PipelineConfig, "COMBINED_PLANNING", True)
+    with patch("nodes._invoke_chat", **failure), \
+         patch("nodes._generate_script_content", return_value="Per-node script") as mock_script:
+        result = script_generator({"topic": "AI"})
+
+    assert result["script"] == "Per-node script"
+    assert "title" not in result and "image_prompts" not in result
+    mock_script.assert_called_once()
+
+def test_invalid_plans_are_not_cached(tmp_path, monkeypatch):
+    """Test that a plan failing validation is asked for again next run, while a valid one is served from cache."""
+    monkeypatch.setattr(PipelineConfig, "CACHE_ENABLED", True)
+    monkeypatch.setattr(PipelineConfig, "CACHE_DIR", str(tmp_path / "cache"))
+    chain = MagicMock()
+    chain.invoke.return_value = _plan(title="")
+    with patch("nodes._get_llm"), patch("nodes._chat_chain", return_value=chain):
+        assert _plan_content("AI") is None
+        assert _plan_content("AI") is None
+        assert chain.invoke.call_count == 2
+
+        chain.invoke.return_value = _plan()
+        assert _plan_content("AI")["title"] == "Planned Title"
+        assert _plan_content("AI")["title"] == "Planned Title"
+        assert chain.invoke.call_count == 3
+
+def test_async_combined_planning(monkeypatch):
+    """Test that the async script node plans with one awaited call."""
+    monkeypatch.setattr(PipelineConfig, "COMBINED_PLANNING", True)
+
+    async def chat(*args, validate=None, **kwargs):
+        return validate(_plan()) if validate else _plan()
+
+    with patch("nodes._ainvoke_chat", side_effect=chat) as mock_chat:
+        result = asyncio.run(ascript_generator({"topic": "AI"}))
+
+    assert result["thumbnail_prompt"] == "Planned thumbnail"
+    mock_chat.assert_awaited_once()
+
 def test_thumbnail_generator():
     assert "error" in thumbnail_generator({})
 
 @patch("nodes.ChatPromptTemplate")
-@patch("nodes.ChatOpenAI")
-@patch("nodes.OpenAI")
+@patch("langchain_openai.ChatOpenAI")
+@patch("openai.OpenAI")
 @patch("nodes.base64.b64decode", return_value=b"fake_thumb_data")
 @patch("builtins.open", new_callable=mock_open)
 @patch("nodes.os.makedirs")
@@ -195,7 +437,7 @@ def test_thumbnail_generator_success(mock_makedirs, mock_file, mock_b64, mock_op
     state = {"topic": "AI", "title": "AI Video"}
     result = thumbnail_generator(state)
     
-    assert result["thumbnail_path"] == "output/thumbnail.png"
+    assert result["thumbnail_path"] == os.path.join(PipelineConfig.OUTPUT_ROOT, "thumbnail.png")
     assert result["error"] is None
 
 def test_youtube_upload():
@@ -215,6 +457,156 @@ def test_youtube_upload_missing_file(mock_exists):
     assert "error" in result
     assert "Video path missing or file not found" in result["error"]
 
+def _youtube_service(responses):
+    """Real YouTube service whose HTTP traffic is served from `responses`."""
+    from googleapiclient.discovery import build
+    from googleapiclient.http import HttpMockSequence
+    return build("youtube", "v3", http=HttpMockSequence(responses), static_discovery=True)
+
+def test_youtube_upload_resumes_session(tmp_path, monkeypatch):
+    """Test that a failed upload continues its saved session from the last acknowledged byte."""
+    chunk = 256 * 1024
+    monkeypatch.setattr(PipelineConfig, "UPLOAD_CHUNK_SIZE", chunk)
+    video_path = tmp_path / "video.mp4"
+    video_path.write_bytes(b"0" * (3 * chunk))
+    state = {"video_path": str(video_path), "title": "Title", "output_dir": str(tmp_path)}
+    session_path = tmp_path / "youtube_upload_session.json"
+
+    # First attempt: session opened, first chunk stored, then the link drops
+    first = _youtube_service([
+        ({"status": "200", "location": "https://upload.example/session"}, ""),
+        ({"status": "308", "range": f"bytes=0-{chunk - 1}"}, ""),
+        ({"status": "503"}, ""),
+    ])
+    with patch("nodes._get_youtube_service", return_value=first):
+        result = youtube_upload(state)
+    assert result["node_errors"]["youtube_upload"]
+    saved = json.loads(session_path.read_text())
+    assert saved["uri"] == "https://upload.example/session"
+    assert saved["progress"] == chunk
+
+    # Retry: no new session is opened; the server reports two chunks received, so only the last is sent
+    second = _youtube_service([
+        ({"status": "308", "range": f"bytes=0-{2 * chunk - 1}"}, ""),
+        ({"status": "200"}, '{"id": "vid123"}'),
+    ])
+    with patch("nodes._get_youtube_service", return_value=second):
+        result = youtube_upload(state)
+    assert result["upload_status"] == "success"
+    assert not session_path.exists()
+
+def test_youtube_upload_restarts_expired_session(tmp_path):
+    """Test that a saved session the server no longer knows is dropped and the upload starts over."""
+    video_path = tmp_path / "video.mp4"
+    video_path.write_bytes(b"0" * 1024)
+    stat = os.stat(video_path)
+    session_path = tmp_path / "youtube_upload_session.json"
+    session_path.write_text(json.dumps({"uri": "https://upload.example/old", "progress": 512,
+                                        "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}))
+
+    service = _youtube_service([
+        ({"status": "404"}, ""),
+        ({"status": "200", "location": "https://upload.example/new"}, ""),
+        ({"status": "200"}, '{"id": "vid123"}'),
+    ])
+    with patch("nodes._get_youtube_service", return_value=service):
+        result = youtube_upload({"video_path": str(video_path), "output_dir": str(tmp_path)})
+    assert result["upload_status"] == "success"
+    assert not session_path.exists()
+
+def test_youtube_upload_ignores_stale_session(tmp_path):
+    """Test that a session saved for a different render of the file is not resumed."""
+    video_path = tmp_path / "video.mp4"
+    video_path.write_bytes(b"0" * 1024)
+    session_path = tmp_path / "youtube_upload_session.json"
+    session_path.write_text(json.dumps({"uri": "https://old", "progress": 10, "size": 99, "mtime_ns": 0}))
+
+    service = _youtube_service([
+        ({"status": "200", "location": "https://upload.example/new"}, ""),
+        ({"status": "200"}, '{"id": "vid123"}'),
+    ])
+    with patch("nodes._get_youtube_service", return_value=service):
+        result = youtube_upload({"video_path": str(video_path), "output_dir": str(tmp_path)})
+    assert result["upload_status"] == "success"
+
+def test_youtube_upload_retries_only_thumbnail(tmp_path):
+    """Test that a retry after a thumbnail failure does not upload the video again."""
+    video_path = tmp_path / "video.mp4"
+    video_path.write_bytes(b"video")
+    thumbnail_path = tmp_path / "thumbnail.png"
+    thumbnail_path.write_bytes(b"png")
+    state = {
+        "run_id": "run1", "video_path": str(video_path), "thumbnail_path": str(thumbnail_path),
+        "output_dir": str(tmp_path),
+    }
+
+    service = MagicMock()
+    service.thumbnails().set().execute.side_effect = [Exception("Thumbnail rejected"), {}]
+    with patch("nodes._get_youtube_service", return_value=service), \
+         patch("nodes._resumable_upload", return_value={"id": "vid123"}) as mock_upload:
+        first = youtube_upload(state)
+        second = youtube_upload(state)
+        third = youtube_upload(state)
+
+    assert "Thumbnail rejected" in first["error"]
+    assert second["upload_status"] == "success"
+    assert third["upload_status"] == "success"
+    mock_upload.assert_called_once()
+    assert service.thumbnails().set().execute.call_count == 2
+
+def test_streamed_upload_gets_metadata_at_upload(tmp_path, monkeypatch):
+    """Test that a video streamed during composition is not re-sent, only given its final metadata."""
+    monkeypatch.setattr(PipelineConfig, "STREAM_UPLOAD", True)
+    monkeypatch.setattr(PipelineConfig, "COMPOSITOR", "ffmpeg")
+    state = {
+        "run_id": "run1", "topic": "AI", "voice_path": "voice.mp3", "image_paths": ["a.png"],
+        "output_dir": str(tmp_path),
+    }
+
+    def render(voice_path, image_paths, output_path, *args):
+        with open(output_path, "wb") as f:
+            f.write(b"fragmented video")
+        return output_path
+
+    def upload(service, video_path, body, session_path, label="", media=None):
+        assert body["snippet"]["title"] == "AI"
+        assert session_path is None
+        return {"id": "vid123", "media": media.getbytes(0, 1024)}
+
+    with patch("nodes.stream_slideshow", side_effect=render), \
+         patch("nodes._get_youtube_service"), \
+         patch("nodes._resumable_upload", side_effect=upload) as mock_upload:
+        composed = video_composer(state)
+    assert composed["video_path"] == str(tmp_path / "final_video.mp4")
+    mock_upload.assert_called_once()
+
+    service = MagicMock()
+    with patch("nodes._get_youtube_service", return_value=service), \
+         patch("nodes._resumable_upload") as mock_upload:
+        result = youtube_upload({**state, **composed, "title": "Final Title"})
+        again = youtube_upload({**state, **composed, "title": "Final Title"})
+
+    assert result["upload_status"] == "success"
+    assert again["upload_status"] == "success"
+    mock_upload.assert_not_called()
+    service.videos().update.assert_called_once_with(
+        part="snippet", body={"id": "vid123", "snippet": {
+            "title": "Final Title", "description": "", "tags": [], "categoryId": "28"
+        }}
+    )
+
+def test_rate_limited_voice_backs_off(monkeypatch):
+    """Test that a 429 records the server's Retry-After as the node's retry delay."""
+    import httpx
+    import openai
+    response = httpx.Response(429, headers={"retry-after": "12"}, request=httpx.Request("POST", "https://api.openai.com"))
+    error = openai.RateLimitError("Rate limit reached", response=response, body=None)
+
+    with patch("nodes._generate_audio_file", side_effect=error):
+        result = voice_generator({"script": "Script"})
+    assert result["node_retries"]["voice_generator"] == 1
+    assert result["retry_delays"]["voice_generator"] == 12.0
+
 # --- Short Form Nodes ---
 
 def test_short_script_generator():
@@ -223,7 +615,7 @@ def test_short_script_generator():
     assert "Test" in result["short_script"]
 
 @patch("nodes.ChatPromptTemplate")
-@patch("nodes.ChatOpenAI")
+@patch("langchain_openai.ChatOpenAI")
 @patch("nodes.StrOutputParser")
 def test_short_script_generator_success(mock_parser, mock_chat, mock_prompt):
     """Test short script generator success path."""
@@ -242,7 +634,7 @@ def test_short_script_generator_success(mock_parser, mock_chat, mock_prompt):
 def test_short_voice_generator():
     assert "error" in short_voice_generator({})
 
-@patch("nodes.OpenAI")
+@patch("openai.OpenAI")
 @patch("nodes.os.makedirs")
 @patch("nodes.os.path.join", return_value="output/short_voice.mp3")
 def test_short_voice_generator_success(mock_join, mock_makedirs, mock_openai):
@@ -270,4 +662,74 @@ def test_short_metadata_generator():
     assert "#Shorts" in result["short_tags"]
 
 def test_short_youtube_upload():
-    assert "error" in short_youtube_upload({})
\ No newline at end of file
+    assert "error" in short_youtube_upload({})
+# --- Async Nodes ---
+
+@patch("nodes._agenerate_script_content", new_callable=AsyncMock, return_value="Async script")
+def test_async_script_generator(mock_script):
+    """Test the async script node awaits the async helper and reports success like the sync node."""
+    result = asyncio.run(ascript_generator({"topic": "Test Topic"}))
+    assert result["script"] == "Async script"
+    assert result["node_errors"] == {"script_generator": None}
+    mock_script.assert_awaited_once()
+
+@patch("nodes._agenerate_script_content", new_callable=AsyncMock, side_effect=Exception("API Error"))
+def test_async_script_generator_failure(mock_script):
+    """Test that async nodes go through the same error handling as the sync ones."""
+    result = asyncio.run(ascript_generator({"topic": "Test Topic"}))
+    assert result["node_errors"]["script_generator"] == "API Error"
+    assert result["node_retries"]["script_generator"] == 1
+
+@patch("openai.AsyncOpenAI")
+def test_agenerate_audio_file_chunked(mock_openai, tmp_path, monkeypatch):
+    """Test async narration: chunks requested concurrently and joined in script order."""
+    in_flight = {"now": 0, "peak": 0}
+
+    async def create(model, voice, input):
+        in_flight["now"] += 1
+        in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        # Earlier chunks finish last to prove joining does not depend on completion
+        await asyncio.sleep(0.05 if input.startswith("Alpha") else 0.0)
+        in_flight["now"] -= 1
+        response = MagicMock()
+
+        async def astream_to_file(path):
+            with open(path, "wb") as f:
+                f.write(input.encode())
+        response.astream_to_file = astream_to_file
+        return response
+
+    mock_openai.return_value.audio.speech.create.side_effect = create
+    monkeypatch.chdir(tmp_path)
+
+    with patch.object(PipelineConfig, "TTS_CHUNK_CHARS", 20):
+        path = asyncio.run(_agenerate_audio_file("Alpha beta gamma. [Visual: sky] Delta epsilon. Zeta eta.", "long_voice.mp3"))
+
+    assert in_flight["peak"] == 3
+    with open(path, "rb") as f:
+        assert f.read() == b"Alpha beta gamma.Delta epsilon.Zeta eta."
+    assert sorted(os.listdir(tmp_path / "output")) == ["long_voice.mp3"]
+
+@patch("openai.AsyncOpenAI")
+def test_agenerate_images_bounded_and_keeps_completed(mock_openai, tmp_path, monkeypatch):
+    """Test async images respect MAX_IMAGE_WORKERS and report the ones written when some fail."""
+    in_flight = {"now": 0, "peak": 0}
+
+    async def generate(**kwargs):
+        in_flight["now"] += 1
+        in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        await asyncio.sleep(0.01)
+        in_flight["now"] -= 1
+        if kwargs["prompt"] == "Prompt 4":
+            raise Exception("DALL-E timeout")
+        return MagicMock(data=[MagicMock(b64_json=base64.b64encode(b"png").decode())])
+
+    mock_openai.return_value.images.generate.side_effect = generate
+    monkeypatch.chdir(tmp_path)
+
+    with patch.object(PipelineConfig, "MAX_IMAGE_WORKERS", 2), pytest.raises(ImageBatchError) as excinfo:
+        asyncio.run(_agenerate_images([f"Prompt {i}" for i in range(6)], "1024x1024", "image"))
+
+    assert in_flight["peak"] == 2
+    assert sorted(excinfo.value.completed) == [0, 1, 2, 3, 5]
+    assert str(excinfo.value.cause) == "DALL-E timeout"
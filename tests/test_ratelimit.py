@@ -0,0 +1,123 @@
+import asyncio
+import threading
+import pytest
+from config import PipelineConfig
+from ratelimit import RateLimiter, TokenBucketLimiter, get_rate_limiter
+
+class FakeClock:
+    """Clock that only moves when the limiter sleeps."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+    async def asleep(self, seconds):
+        self.sleep(seconds)
+
+def _limiter(path, clock, limits, burst_seconds=10.0):
+    return TokenBucketLimiter(str(path), limits=limits, burst_seconds=burst_seconds, clock=clock.time, sleep=clock.sleep,
+                              asleep=clock.asleep)
+
+def test_requests_per_minute(tmp_path):
+    """Test that a burst is served immediately and later calls are paced at the RPM ceiling."""
+    clock = FakeClock()
+    limiter = _limiter(tmp_path / "rl.sqlite", clock, {"images": {"rpm": 60, "tpm": None}}, burst_seconds=3)
+
+    waits = [limiter.acquire("images") for _ in range(6)]
+    assert waits[:3] == [0, 0, 0]
+    assert waits[3:] == pytest.approx([1.0, 1.0, 1.0])
+    # 6 requests at 60/min: the burst of 3, then one per second
+    assert clock.now - 1000.0 == pytest.approx(3.0)
+
+def test_tokens_per_minute_and_adjust(tmp_path):
+    """Test that token budgets are charged up front and corrected from actual usage."""
+    clock = FakeClock()
+    limiter = _limiter(tmp_path / "rl.sqlite", clock, {"chat": {"rpm": None, "tpm": 600}})  # 10 tokens/s, burst 100
+
+    assert limiter.acquire("chat", tokens=100) == 0
+    # Only 40 of the 100 reserved tokens were actually used
+    limiter.adjust("chat", -60)
+    assert limiter.acquire("chat", tokens=60) == 0
+    assert limiter.acquire("chat", tokens=50) == pytest.approx(5.0)
+
+def test_default_bucket_holds_a_minute_of_budget(tmp_path):
+    """Test that without burst smoothing a minute's requests go out at once, e.g. a run's parallel images."""
+    clock = FakeClock()
+    limiter = _limiter(tmp_path / "rl.sqlite", clock, {"images": {"rpm": 5, "tpm": None}}, burst_seconds=None)
+
+    assert [limiter.acquire("images") for _ in range(5)] == [0] * 5
+    assert limiter.acquire("images") == pytest.approx(12.0)
+
+def test_async_acquire_shares_the_buckets(tmp_path):
+    """Test that aacquire draws from the same buckets as acquire and awaits the deficit."""
+    clock = FakeClock()
+    limiter = _limiter(tmp_path / "rl.sqlite", clock, {"images": {"rpm": 60, "tpm": None}}, burst_seconds=2)
+
+    assert limiter.acquire("images") == 0
+    assert asyncio.run(limiter.aacquire("images")) == 0
+    assert asyncio.run(limiter.aacquire("images")) == pytest.approx(1.0)
+    assert clock.slept == [pytest.approx(1.0)]
+    assert asyncio.run(RateLimiter().aacquire("images")) == 0.0
+
+def test_async_reservation_runs_off_the_event_loop(tmp_path):
+    """Test that aacquire's SQLite transaction (which may wait on another process) runs in a worker thread."""
+    clock = FakeClock()
+    limiter = _limiter(tmp_path / "rl.sqlite", clock, {"images": {"rpm": 60, "tpm": None}})
+    reserve, threads = limiter._reserve, []
+
+    def recording_reserve(charges):
+        threads.append(threading.current_thread())
+        return reserve(charges)
+
+    limiter._reserve = recording_reserve
+
+    async def acquire():
+        await limiter.aacquire("images")
+        return threading.current_thread()
+
+    loop_thread = asyncio.run(acquire())
+    assert threads and threads[0] is not loop_thread
+
+def test_unlimited_endpoint_never_waits(tmp_path):
+    clock = FakeClock()
+    limiter = _limiter(tmp_path / "rl.sqlite", clock, {"tts": {"rpm": None, "tpm": None}})
+    assert all(limiter.acquire(endpoint) == 0 for endpoint in ["tts", "unknown"] * 50)
+
+def test_budget_shared_across_limiters(tmp_path):
+    """Test that separate limiters on one database (as in separate processes) share the buckets."""
+    clock = FakeClock()
+    path = tmp_path / "rl.sqlite"
+    limits = {"tts": {"rpm": 60, "tpm": None}}
+    first, second = _limiter(path, clock, limits, burst_seconds=2), _limiter(path, clock, limits, burst_seconds=2)
+
+    assert first.acquire("tts") == 0
+    assert second.acquire("tts") == 0
+    assert first.acquire("tts") == pytest.approx(1.0)
+
+def test_concurrent_acquires_are_spaced(tmp_path):
+    """Test that threads sharing a limiter reserve distinct slots."""
+    clock = FakeClock()
+    limiter = _limiter(tmp_path / "rl.sqlite", clock, {"tts": {"rpm": 60, "tpm": None}}, burst_seconds=1)
+    # Freeze time so every reservation is measured against the same instant
+    limiter._sleep = lambda seconds: None
+    waits = []
+    threads = [threading.Thread(target=lambda: waits.append(limiter.acquire("tts"))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(waits) == pytest.approx([0, 1, 2, 3, 4])
+
+def test_get_rate_limiter_respects_config(tmp_path, monkeypatch):
+    assert type(get_rate_limiter()) is RateLimiter
+    monkeypatch.setattr(PipelineConfig, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(PipelineConfig, "RATE_LIMIT_DB", str(tmp_path / "rl.sqlite"))
+    assert isinstance(get_rate_limiter(), TokenBucketLimiter)
+    assert get_rate_limiter() is get_rate_limiter()
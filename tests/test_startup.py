@@ -0,0 +1,51 @@
+import json
+import os
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "benchmarks"))
+
+from startup import format_result, measure  # noqa: E402
+
+# Libraries that must only load once a node actually needs them
+HEAVY_MODULES = ["openai", "langchain_openai", "moviepy", "googleapiclient", "google_auth_oauthlib",
+                 "google_auth_httplib2", "httplib2", "langgraph.checkpoint.sqlite"]
+
+# Startup allowed relative to importing langgraph alone, which the graph
+# needs anyway. Generous enough for noisy CI machines: eager SDK imports
+# used to add several times langgraph's own import time.
+MAX_GRAPH_IMPORT_RATIO = 2.0
+
+PROBE = """
+import json, sys
+import graph
+print(json.dumps([m for m in %r if m in sys.modules]))
+""" % (HEAVY_MODULES,)
+
+def _loaded_after_import() -> list:
+    """Imports the graph in a fresh interpreter, so nothing is already cached in sys.modules."""
+    result = subprocess.run([sys.executable, "-c", PROBE], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def test_graph_import_is_lazy():
+    """Test that importing the graph does not load any SDK."""
+    assert _loaded_after_import() == []
+
+def test_cli_help_does_not_import_graph():
+    """Test that `main.py --help` answers without building the pipeline."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "main.py", "--help"], cwd=PROJECT_ROOT, capture_output=True, text=True
+    )
+    assert result.returncode == 0
+    assert "--topics-file" in result.stdout
+    assert "langgraph" not in result.stderr
+
+def test_startup_time_relative_to_langgraph():
+    """Test that startup stays close to the langgraph baseline measured by benchmarks/startup.py."""
+    result = measure(repeat=3)
+    print(format_result(result))
+
+    assert result["import graph"] < MAX_GRAPH_IMPORT_RATIO * result["langgraph"]
+    # --help never imports langgraph at all
+    assert result["main.py --help"] < result["langgraph"]
@@ -0,0 +1,74 @@
+import threading
+import time
+import pytest
+from config import PipelineConfig
+from nodes import _resumable_upload
+from streaming import GrowingFileUpload
+
+def _youtube_service(responses, sent):
+    """Real YouTube service served from `responses`; the Content-Range of every request is appended to `sent`."""
+    from googleapiclient.discovery import build
+    from googleapiclient.http import HttpMockSequence
+
+    class RecordingHttp(HttpMockSequence):
+        def request(self, uri, method="GET", body=None, headers=None, *args, **kwargs):
+            sent.append((headers or {}).get("Content-Range"))
+            return super().request(uri, method, body, headers, *args, **kwargs)
+
+    return build("youtube", "v3", http=RecordingHttp(responses), static_discovery=True)
+
+def test_getbytes_waits_for_the_writer(tmp_path):
+    """Test that a chunk is handed out only once the file has grown past it."""
+    path = tmp_path / "video.mp4"
+    path.write_bytes(b"a" * 10)
+    media = GrowingFileUpload(str(path), chunksize=10, poll_interval=0.01)
+
+    def write_more():
+        time.sleep(0.2)
+        with open(path, "ab") as f:
+            f.write(b"b" * 5)
+
+    writer = threading.Thread(target=write_more)
+    writer.start()
+    start = time.perf_counter()
+    assert media.getbytes(0, 10) == b"a" * 10
+    assert time.perf_counter() - start >= 0.15
+    writer.join()
+    assert media.size() is None
+
+    media.finish()
+    assert media.size() == 15
+    assert media.getbytes(10, 10) == b"b" * 5
+
+def test_getbytes_raises_when_encoding_fails(tmp_path):
+    """Test that a failed writer abandons the upload instead of leaving it waiting."""
+    path = tmp_path / "video.mp4"
+    path.write_bytes(b"a")
+    media = GrowingFileUpload(str(path), chunksize=10, poll_interval=0.01)
+    threading.Timer(0.1, media.finish, args=(ValueError("ffmpeg failed"),)).start()
+
+    with pytest.raises(RuntimeError, match="upload abandoned"):
+        media.getbytes(0, 10)
+
+def test_streamed_upload_ending_on_a_chunk_boundary(tmp_path, monkeypatch):
+    """Test that a file ending exactly on a chunk boundary is closed with "bytes */total"."""
+    chunk = 256 * 1024
+    monkeypatch.setattr(PipelineConfig, "UPLOAD_CHUNK_SIZE", chunk)
+    path = tmp_path / "video.mp4"
+    path.write_bytes(b"0" * (2 * chunk))
+    media = GrowingFileUpload(str(path), poll_interval=0.01)
+    threading.Timer(0.3, media.finish).start()
+
+    sent = []
+    service = _youtube_service([
+        ({"status": "200", "location": "https://upload.example/session"}, ""),
+        ({"status": "308", "range": f"bytes=0-{chunk - 1}"}, ""),
+        ({"status": "308", "range": f"bytes=0-{2 * chunk - 1}"}, ""),
+        ({"status": "200"}, '{"id": "vid123"}'),
+    ], sent)
+    response = _resumable_upload(service, str(path), {"snippet": {"title": "Topic"}}, None, media=media)
+
+    assert response["id"] == "vid123"
+    assert sent[1] == f"bytes 0-{chunk - 1}/*"
+    assert sent[-1] == f"bytes */{2 * chunk}"
+    assert not list(tmp_path.glob("*session*"))